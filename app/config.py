@@ -12,12 +12,46 @@ class Settings:
         self.EI_OUTPUT_DIR: Path = Path(os.getenv("EI_OUTPUT_DIR", "data/ei_output")).resolve()
         self.EI_OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
         self.EI_VERSION_FILE: Path = Path(os.getenv("EI_VERSION_FILE", "ei_version.txt")).resolve()
+        # Parallel/batched EI runs: processes in flight, logs per invocation, timeout per log
+        self.EI_WORKERS: int = int(os.getenv("EI_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+        self.EI_BATCH_SIZE: int = int(os.getenv("EI_BATCH_SIZE", "10"))
+        self.EI_TIMEOUT_S: float = float(os.getenv("EI_TIMEOUT_S", "300"))
 
         # dps.report integration (canonical EI JSON source)
         self.DPS_REPORT_ENABLED: bool = os.getenv("DPS_REPORT_ENABLED", "1").lower() in {"1", "true", "yes"}
         self.DPS_REPORT_BASE_URL: str = os.getenv("DPS_REPORT_BASE_URL", "https://dps.report").rstrip("/")
         self.DPS_REPORT_CACHE_DIR: Path = Path(os.getenv("DPS_REPORT_CACHE_DIR", "data/dps_report")).resolve()
         self.DPS_REPORT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        # Zip raw .evtc into a .zevtc container before uploading
+        self.DPS_REPORT_COMPRESS_EVTC: bool = os.getenv("DPS_REPORT_COMPRESS_EVTC", "1").lower() in {"1", "true", "yes"}
+        # Always stream cached getJson files, keeping only the subtrees the mapper needs:
+        # caps worker memory at the cost of ~2.7x the decode time (see cpu_pool.STREAM_ABOVE_BYTES)
+        self.DPS_REPORT_STREAM_JSON: bool = os.getenv("DPS_REPORT_STREAM_JSON", "0").lower() in {"1", "true", "yes"}
+
+        # Single-flight dedupe of concurrent uploads of the same log
+        self.INGEST_SINGLE_FLIGHT_TIMEOUT_S: float = float(os.getenv("INGEST_SINGLE_FLIGHT_TIMEOUT_S", "180"))
+        self.INGEST_SINGLE_FLIGHT_STALE_S: float = float(os.getenv("INGEST_SINGLE_FLIGHT_STALE_S", "300"))
+
+        # Background ingestion queue (ingest_jobs table): worker threads per process,
+        # idle poll interval, heartbeat age after which a running job is requeued
+        self.INGEST_WORKERS: int = int(os.getenv("INGEST_WORKERS", "2"))
+        self.INGEST_JOB_POLL_S: float = float(os.getenv("INGEST_JOB_POLL_S", "1.0"))
+        self.INGEST_JOB_STALE_S: float = float(os.getenv("INGEST_JOB_STALE_S", "300"))
+        self.INGEST_JOB_MAX_ATTEMPTS: int = int(os.getenv("INGEST_JOB_MAX_ATTEMPTS", "3"))
+        # Worker processes for JSON decode + mapping + role detection (0 = run inline)
+        self.CPU_POOL_WORKERS: int = int(os.getenv("CPU_POOL_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+        # Single-writer queue for ingestion writes: auto (SQLite only), 1/true/yes, or off
+        self.DB_WRITE_QUEUE: str = os.getenv("DB_WRITE_QUEUE", "auto").lower()
+        # Multi-file uploads: logs accepted per request (zip members included)
+        self.INGEST_BATCH_MAX_FILES: int = int(os.getenv("INGEST_BATCH_MAX_FILES", "100"))
+
+        # META result cache, shared by uvicorn workers through a SQLite file; a stale
+        # entry is refreshed by one worker at a time, holding a lease of this length
+        self.META_CACHE_ENABLED: bool = os.getenv("META_CACHE_ENABLED", "1").lower() in {"1", "true", "yes"}
+        self.META_CACHE_PATH: Path = Path(os.getenv("META_CACHE_PATH", "data/meta_cache.db")).resolve()
+        self.META_CACHE_REFRESH_LEASE_S: float = float(os.getenv("META_CACHE_REFRESH_LEASE_S", "60"))
+        # Balance patches offered as META windows: JSON list of {"name", "start": "YYYY-MM-DD"}
+        self.META_PATCHES_FILE: Path = Path(os.getenv("META_PATCHES_FILE", "data/patches.json")).resolve()
 
 
 settings = Settings()
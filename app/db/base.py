@@ -1,5 +1,6 @@
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
@@ -8,12 +9,34 @@ DATABASE_URL = os.getenv(
     "sqlite:///./wvw_analytics.db"
 )
 
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "15000"))
+
+
+def configure_sqlite(engine: Engine) -> None:
+    """
+    Per-connection SQLite setup for concurrent use.
+
+    WAL lets readers run while a write is in progress, synchronous=NORMAL is safe
+    with WAL and avoids an fsync per commit, and busy_timeout makes a second
+    writer wait for the lock instead of failing with "database is locked".
+    """
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.close()
+
+
 if DATABASE_URL.startswith("sqlite"):
     engine = create_engine(
         DATABASE_URL,
         connect_args={"check_same_thread": False},
         echo=False,
     )
+    configure_sqlite(engine)
 else:
     engine = create_engine(
         DATABASE_URL,
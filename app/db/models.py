@@ -1,12 +1,15 @@
 from datetime import datetime
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum as SQLEnum, BigInteger, Boolean
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, Enum as SQLEnum, BigInteger, Boolean, Index, LargeBinary, event
+from sqlalchemy.orm import deferred, relationship
 import enum
 
 from app.db.base import Base
 
+if TYPE_CHECKING:
+    from app.services.boon_states import StateSeries
+
 
 class FightContext(str, enum.Enum):
     """Fight context classification."""
@@ -27,10 +30,14 @@ class FightResult(str, enum.Enum):
 class Fight(Base):
     """Represents a single WvW fight/encounter."""
     __tablename__ = "fights"
+    __table_args__ = (
+        # META pages filter on context (newest first for time windows)
+        Index("ix_fights_context_upload_timestamp", "context", "upload_timestamp"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    evtc_filename = Column(String, nullable=False)
-    upload_timestamp = Column(DateTime, default=datetime.utcnow, nullable=False)
+    evtc_filename = Column(String, nullable=False, index=True)
+    upload_timestamp = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
     
     start_time = Column(DateTime, nullable=True)
     duration_ms = Column(Integer, nullable=True)
@@ -52,13 +59,19 @@ class Fight(Base):
 class PlayerStats(Base):
     """Per-player statistics for a fight."""
     __tablename__ = "player_stats"
+    __table_args__ = (
+        # Both lead with fight_id, so they also serve plain per-fight lookups
+        Index("ix_player_stats_fight_id_elite_spec", "fight_id", "elite_spec"),
+        Index("ix_player_stats_fight_id_detected_role", "fight_id", "detected_role"),
+        Index("ix_player_stats_elite_spec_detected_role", "elite_spec", "detected_role"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     fight_id = Column(Integer, ForeignKey("fights.id"), nullable=False)
     is_ally = Column(Boolean, default=True, nullable=False)
     
     character_name = Column(String, nullable=False)
-    account_name = Column(String, nullable=True)
+    account_name = Column(String, nullable=True, index=True)
     profession = Column(String, nullable=True)
     elite_spec = Column(String, nullable=True)
     spec_name = Column(String, nullable=True)
@@ -148,9 +161,32 @@ class PlayerStats(Base):
     presence_pct = Column(Float, default=0.0, nullable=False)
     
     detected_role = Column(String, nullable=True)
+
+    # Compressed boonGraph states of the surfaced boons (boon_states.encode_timelines);
+    # deferred so list/meta queries never load it
+    boon_timelines = deferred(Column(LargeBinary, nullable=True))
     
     fight = relationship("Fight", back_populates="player_stats")
 
+    @property
+    def boon_states(self) -> "dict[int, StateSeries]":
+        """
+        Boon state series (ms) by buff id; decoded from boon_timelines on first
+        access. Assigning boon_timelines drops the decoded copy.
+        """
+        states = self.__dict__.get("_boon_states")
+        if states is None:
+            # Imported here: the model layer does not depend on app.services
+            from app.services.boon_states import decode_timelines
+
+            states = decode_timelines(self.boon_timelines)
+            self.__dict__["_boon_states"] = states
+        return states
+
+    @boon_states.setter
+    def boon_states(self, states: "dict[int, StateSeries]") -> None:
+        self.__dict__["_boon_states"] = states
+
     @staticmethod
     def _ms_to_seconds(value: int | float | None) -> float:
         return float(value or 0) / 1000.0
@@ -198,3 +234,156 @@ class PlayerStats(Base):
     @property
     def might_out_stack_seconds(self) -> float:
         return float(self.might_out_stacks or 0) / 1000.0
+
+
+@event.listens_for(PlayerStats.boon_timelines, "set")
+def _drop_decoded_boon_states(target: PlayerStats, value, oldvalue, initiator) -> None:
+    target.__dict__.pop("_boon_states", None)
+
+
+class IngestLock(Base):
+    """Single-flight marker: one ingestion per log content hash, shared across workers."""
+    __tablename__ = "ingest_locks"
+
+    content_hash = Column(String(64), primary_key=True)
+    status = Column(String, default="running", nullable=False)  # running | done | failed
+    fight_id = Column(Integer, ForeignKey("fights.id", ondelete="SET NULL"), nullable=True)
+    owner = Column(String, nullable=True)
+    error = Column(String, nullable=True)
+    acquired_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class IngestJob(Base):
+    """Queued log ingestion (upload -> dps.report -> mapping -> DB), processed by background workers."""
+    __tablename__ = "ingest_jobs"
+
+    id = Column(String(32), primary_key=True)
+    session_id = Column(String(32), nullable=True, index=True)  # groups the files of one multi-file upload
+    filename = Column(String, nullable=False)
+    file_path = Column(String, nullable=False)
+    status = Column(String, default="queued", nullable=False, index=True)  # queued | running | done | failed
+    stage = Column(String, default="queued", nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    owner = Column(String, nullable=True)
+    fight_id = Column(Integer, ForeignKey("fights.id", ondelete="SET NULL"), nullable=True)
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    finished_at = Column(DateTime, nullable=True)
+
+
+class DataVersion(Base):
+    """Version token of a family of derived data, replaced whenever that data changes (cache invalidation)."""
+    __tablename__ = "data_versions"
+
+    name = Column(String, primary_key=True)
+    version = Column(String(32), nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class MetaDailyTotals(Base):
+    """Fights per (context, day): counts by result and total duration (maintained by meta_rollups)."""
+    __tablename__ = "meta_daily_totals"
+
+    context = Column(SQLEnum(FightContext), primary_key=True)
+    day = Column(Date, primary_key=True)  # date of start_time, else upload_timestamp
+    fights = Column(Integer, default=0, nullable=False)
+    wins = Column(Integer, default=0, nullable=False)
+    losses = Column(Integer, default=0, nullable=False)
+    draws = Column(Integer, default=0, nullable=False)
+    duration_ms = Column(BigInteger, default=0, nullable=False)
+
+
+class MetaDailySpecRole(Base):
+    """
+    Player appearances per (context, day, elite_spec, detected_role) (maintained by meta_rollups).
+
+    Missing specs/roles are stored as "". wins/losses/draws and duration_ms count
+    the appearance's fight; sum_* columns add up the PlayerStats column of the same name.
+    """
+    __tablename__ = "meta_daily_spec_roles"
+
+    context = Column(SQLEnum(FightContext), primary_key=True)
+    day = Column(Date, primary_key=True)
+    elite_spec = Column(String, primary_key=True)
+    detected_role = Column(String, primary_key=True)
+    players = Column(Integer, default=0, nullable=False)
+    wins = Column(Integer, default=0, nullable=False)
+    losses = Column(Integer, default=0, nullable=False)
+    draws = Column(Integer, default=0, nullable=False)
+    duration_ms = Column(BigInteger, default=0, nullable=False)
+
+    sum_total_damage = Column(BigInteger, default=0, nullable=False)
+    sum_dps = Column(Float, default=0.0, nullable=False)
+    sum_downs = Column(BigInteger, default=0, nullable=False)
+    sum_kills = Column(BigInteger, default=0, nullable=False)
+    sum_deaths = Column(BigInteger, default=0, nullable=False)
+    sum_damage_taken = Column(BigInteger, default=0, nullable=False)
+    sum_strips_out = Column(BigInteger, default=0, nullable=False)
+    sum_cleanses = Column(BigInteger, default=0, nullable=False)
+    sum_healing_out = Column(BigInteger, default=0, nullable=False)
+    sum_barrier_out = Column(BigInteger, default=0, nullable=False)
+    sum_stab_out_ms = Column(BigInteger, default=0, nullable=False)
+    sum_active_ms = Column(Float, default=0.0, nullable=False)
+
+
+class MetaDailySpecResult(Base):
+    """
+    Allied appearances per (context, day, elite_spec) and their fights' results (maintained by meta_rollups).
+
+    Enemy rows are left out: the fight result is our squad's. Missing specs are stored as "".
+    """
+    __tablename__ = "meta_daily_spec_results"
+
+    context = Column(SQLEnum(FightContext), primary_key=True)
+    day = Column(Date, primary_key=True)
+    elite_spec = Column(String, primary_key=True)
+    fights = Column(Integer, default=0, nullable=False)
+    wins = Column(Integer, default=0, nullable=False)
+    losses = Column(Integer, default=0, nullable=False)
+    draws = Column(Integer, default=0, nullable=False)
+
+
+class FightBoonUptime(Base):
+    """
+    Squad boon uptimes of a fight's allies, one row per subgroup (maintained by squad_boons).
+
+    subgroup 0 holds the squad average. Uptimes are percentages of the players'
+    summed active time, rounded to one decimal as the fight view shows them.
+    """
+    __tablename__ = "fight_boon_uptimes"
+
+    fight_id = Column(Integer, ForeignKey("fights.id"), primary_key=True)
+    subgroup = Column(Integer, primary_key=True)
+    player_count = Column(Integer, default=0, nullable=False)
+    active_ms = Column(Float, default=0.0, nullable=False)
+
+    might_uptime = Column(Float, default=0.0, nullable=False)
+    fury_uptime = Column(Float, default=0.0, nullable=False)
+    quickness_uptime = Column(Float, default=0.0, nullable=False)
+    alacrity_uptime = Column(Float, default=0.0, nullable=False)
+    protection_uptime = Column(Float, default=0.0, nullable=False)
+    regeneration_uptime = Column(Float, default=0.0, nullable=False)
+    vigor_uptime = Column(Float, default=0.0, nullable=False)
+    aegis_uptime = Column(Float, default=0.0, nullable=False)
+    stability_uptime = Column(Float, default=0.0, nullable=False)
+    swiftness_uptime = Column(Float, default=0.0, nullable=False)
+    resistance_uptime = Column(Float, default=0.0, nullable=False)
+    resolution_uptime = Column(Float, default=0.0, nullable=False)
+    superspeed_uptime = Column(Float, default=0.0, nullable=False)
+    stealth_uptime = Column(Float, default=0.0, nullable=False)
+
+
+class MetaDailyPlayer(Base):
+    """Characters seen per (context, day), for distinct player counts (maintained by meta_rollups)."""
+    __tablename__ = "meta_daily_players"
+    __table_args__ = (
+        # all-time distinct counts per context without visiting every day
+        Index("ix_meta_daily_players_context_character_name", "context", "character_name"),
+    )
+
+    context = Column(SQLEnum(FightContext), primary_key=True)
+    day = Column(Date, primary_key=True)
+    character_name = Column(String, primary_key=True)
+    appearances = Column(Integer, default=0, nullable=False)
@@ -0,0 +1,149 @@
+"""
+Single-writer commit queue.
+
+SQLite allows one writer at a time. With several ingestion threads each
+committing its own fight, writers queue up on the database lock and time out
+("database is locked"). Instead, writes are submitted to one writer thread per
+engine:
+
+- Each submitted item is a function `fn(session) -> result`.
+- The writer takes whatever is pending (up to `max_batch`, waiting at most
+  `batch_window_s` for more) and runs the items in one transaction, each in its
+  own SAVEPOINT. A failing item only rolls back its own changes.
+- One COMMIT per batch. Every caller then gets its result, or its exception,
+  through a Future.
+
+Only SQLite engines get a queue by default (DB_WRITE_QUEUE=auto). Server
+databases handle concurrent writers themselves.
+"""
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+WriteFn = Callable[[Session], Any]
+
+_STOP = object()
+
+
+class WriteQueue:
+    """Runs submitted write functions on one thread, batching their commits."""
+
+    def __init__(self, engine: Engine, max_batch: int = 32, batch_window_s: float = 0.01) -> None:
+        self.engine = engine
+        self.max_batch = max_batch
+        self.batch_window_s = batch_window_s
+        self.batches = 0
+        self.items = 0
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, fn: WriteFn) -> "Future[Any]":
+        future: "Future[Any]" = Future()
+        self._queue.put((fn, future))
+        return future
+
+    def run(self, fn: WriteFn) -> Any:
+        """Submit and wait for the commit."""
+        return self.submit(fn).result()
+
+    def stop(self, timeout_s: float = 5.0) -> None:
+        self._queue.put(_STOP)
+        self._thread.join(timeout_s)
+
+    def _next_batch(self) -> tuple[list[tuple[WriteFn, Future]], bool]:
+        first = self._queue.get()
+        if first is _STOP:
+            return [], True
+        batch = [first]
+        stopping = False
+        while len(batch) < self.max_batch:
+            try:
+                item = self._queue.get(timeout=self.batch_window_s)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                stopping = True
+                break
+            batch.append(item)
+        return batch, stopping
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch, stopping = self._next_batch()
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch: list[tuple[WriteFn, Future]]) -> None:
+        results: list[tuple[Future, bool, Any]] = []
+        try:
+            with Session(bind=self.engine) as session:
+                if self.engine.dialect.name == "sqlite":
+                    # pysqlite emits no BEGIN before a SAVEPOINT, so each RELEASE would
+                    # commit on its own; take the write lock for the whole batch instead
+                    session.execute(text("BEGIN IMMEDIATE"))
+                for fn, future in batch:
+                    savepoint = session.begin_nested()
+                    try:
+                        result = fn(session)
+                        savepoint.commit()
+                        results.append((future, True, result))
+                    except Exception as e:
+                        savepoint.rollback()
+                        results.append((future, False, e))
+                session.commit()
+        except Exception as e:
+            logger.exception("Write batch of %d items failed", len(batch))
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        self.batches += 1
+        self.items += len(batch)
+        for future, ok, value in results:
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+
+_queues: dict[int, WriteQueue] = {}
+_queues_lock = threading.Lock()
+
+
+def _enabled_for(engine: Engine) -> bool:
+    mode = settings.DB_WRITE_QUEUE
+    if mode == "auto":
+        return engine.dialect.name == "sqlite"
+    return mode in {"1", "true", "yes"}
+
+
+def for_engine(engine: Engine) -> Optional[WriteQueue]:
+    """The engine's shared write queue, or None when writes go straight to the DB."""
+    if not _enabled_for(engine):
+        return None
+    with _queues_lock:
+        writer = _queues.get(id(engine))
+        if writer is None:
+            writer = _queues[id(engine)] = WriteQueue(engine)
+        return writer
+
+
+def stop_all() -> None:
+    with _queues_lock:
+        writers = list(_queues.values())
+        _queues.clear()
+    for writer in writers:
+        writer.stop()
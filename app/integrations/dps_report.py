@@ -1,6 +1,10 @@
 from __future__ import annotations
 
-import json
+import logging
+import shutil
+import tempfile
+import time
+import zipfile
 from pathlib import Path
 from typing import Any, Dict, Tuple
 
@@ -8,6 +12,11 @@ import httpx
 
 from app.config import settings
 
+logger = logging.getLogger(__name__)
+
+ZIP_MAGIC = b"PK\x03\x04"
+_COPY_CHUNK = 1024 * 1024
+
 
 class DPSReportError(RuntimeError):
     """Raised when dps.report calls fail."""
@@ -18,20 +27,55 @@ def _cache_path(cache_dir: Path, permalink_or_id: str) -> Path:
     return cache_dir / f"{slug}.json"
 
 
+def compress_evtc(file_path: Path, dest_dir: Path) -> Path:
+    """
+    Stream a raw .evtc into a single-entry .zevtc (zip) container inside dest_dir.
+    """
+    dest = dest_dir / f"{file_path.stem}.zevtc"
+    with zipfile.ZipFile(dest, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=6) as zf:
+        with file_path.open("rb") as src, zf.open(file_path.name, "w", force_zip64=True) as entry:
+            shutil.copyfileobj(src, entry, _COPY_CHUNK)
+    return dest
+
+
+def _needs_compression(file_path: Path) -> bool:
+    if not settings.DPS_REPORT_COMPRESS_EVTC or file_path.suffix.lower() != ".evtc":
+        return False
+    with file_path.open("rb") as f:
+        # Some tools name zipped logs .evtc; those are sent as-is
+        return f.read(len(ZIP_MAGIC)) != ZIP_MAGIC
+
+
 def upload_log(file_path: Path) -> Dict[str, Any]:
     """
     Upload an EVTC/ZEVTC log to dps.report and return the API response.
+
+    Raw .evtc files are zipped into a .zevtc container first (DPS_REPORT_COMPRESS_EVTC).
+    The response carries an extra `upload_stats` dict with sizes, compression ratio
+    and the estimated upload time saved.
     """
     if not file_path.exists():
         raise DPSReportError(f"File not found: {file_path}")
 
     url = f"{settings.DPS_REPORT_BASE_URL}/uploadContent"
     params = {"json": 1}
-
-    with httpx.Client(timeout=60) as client:
-        with file_path.open("rb") as f:
-            files = {"file": (file_path.name, f, "application/octet-stream")}
-            resp = client.post(url, params=params, files=files)
+    raw_bytes = file_path.stat().st_size
+
+    with tempfile.TemporaryDirectory(prefix="wvw_upload_") as tmp_dir:
+        compress_s = 0.0
+        upload_path = file_path
+        if _needs_compression(file_path):
+            started = time.perf_counter()
+            upload_path = compress_evtc(file_path, Path(tmp_dir))
+            compress_s = time.perf_counter() - started
+        sent_bytes = upload_path.stat().st_size
+
+        started = time.perf_counter()
+        with httpx.Client(timeout=60) as client:
+            with upload_path.open("rb") as f:
+                files = {"file": (upload_path.name, f, "application/octet-stream")}
+                resp = client.post(url, params=params, files=files)
+        upload_s = time.perf_counter() - started
 
     if resp.status_code != 200:
         raise DPSReportError(f"Upload failed ({resp.status_code}): {resp.text}")
@@ -40,43 +84,85 @@ def upload_log(file_path: Path) -> Dict[str, Any]:
     if "permalink" not in data:
         raise DPSReportError(f"dps.report response missing permalink: {data}")
 
+    data["upload_stats"] = _upload_stats(raw_bytes, sent_bytes, compress_s, upload_s)
+    if upload_path is not file_path:
+        stats = data["upload_stats"]
+        logger.info(
+            "Compressed %s for upload: %d -> %d bytes (ratio %.2fx), est. %.2fs saved",
+            file_path.name,
+            raw_bytes,
+            sent_bytes,
+            stats["compression_ratio"],
+            stats["time_saved_s"],
+        )
+
     return data
 
 
+def _upload_stats(raw_bytes: int, sent_bytes: int, compress_s: float, upload_s: float) -> Dict[str, float]:
+    """
+    Estimate the time saved by compression from the observed upload throughput.
+    """
+    ratio = (raw_bytes / sent_bytes) if sent_bytes else 1.0
+    time_saved_s = 0.0
+    if sent_bytes and upload_s > 0 and raw_bytes > sent_bytes:
+        throughput = sent_bytes / upload_s
+        time_saved_s = (raw_bytes - sent_bytes) / throughput - compress_s
+    return {
+        "raw_bytes": raw_bytes,
+        "sent_bytes": sent_bytes,
+        "compression_ratio": round(ratio, 3),
+        "compress_s": round(compress_s, 4),
+        "upload_s": round(upload_s, 4),
+        "time_saved_s": round(time_saved_s, 4),
+    }
+
+
 def get_json(permalink_or_id: str) -> Dict[str, Any]:
     """
     Fetch EI-like JSON from dps.report getJson endpoint.
+
+    Ingestion uses `download_json` instead: the body goes to the cache file
+    undecoded and is parsed later (see app.services.cpu_pool.load_cached_json).
     """
     url = f"{settings.DPS_REPORT_BASE_URL}/getJson"
     params = {"permalink": permalink_or_id}
     with httpx.Client(timeout=60) as client:
         resp = client.get(url, params=params)
-
     if resp.status_code != 200:
         raise DPSReportError(f"getJson failed ({resp.status_code}): {resp.text}")
-
     return resp.json()
 
 
-def ensure_log_imported(file_path: Path, existing_permalink: str | None = None) -> Tuple[Dict[str, Any], str, Path]:
+def download_json(permalink_or_id: str, dest: Path) -> Path:
+    """
+    Stream the getJson response body straight to `dest` without decoding it.
+    """
+    url = f"{settings.DPS_REPORT_BASE_URL}/getJson"
+    params = {"permalink": permalink_or_id}
+    tmp_path = dest.with_name(f"{dest.name}.part")
+    with httpx.Client(timeout=60) as client:
+        with client.stream("GET", url, params=params) as resp:
+            if resp.status_code != 200:
+                resp.read()
+                raise DPSReportError(f"getJson failed ({resp.status_code}): {resp.text}")
+            with tmp_path.open("wb") as f:
+                for chunk in resp.iter_bytes():
+                    f.write(chunk)
+    tmp_path.replace(dest)
+    return dest
+
+
+def ensure_log_cached(file_path: Path, existing_permalink: str | None = None) -> Tuple[str, Path]:
     """
-    Ensure a log is uploaded and EI JSON is available (with caching).
+    Ensure a log is uploaded and its raw EI JSON is in the cache, without decoding it.
 
-    Returns (json_data, permalink, json_path)
+    Returns (permalink, json_path). Decoding is left to the caller, e.g. a worker
+    process (see app.services.cpu_pool).
     """
     cache_dir = settings.DPS_REPORT_CACHE_DIR
     cache_dir.mkdir(parents=True, exist_ok=True)
 
-    permalink: str
-    json_data: Dict[str, Any]
-
-    # If a permalink is provided and cached, use it
-    if existing_permalink:
-        cache_file = _cache_path(cache_dir, existing_permalink)
-        if cache_file.exists():
-            return json.loads(cache_file.read_text(encoding="utf-8")), existing_permalink, cache_file
-
-    # Upload if no permalink
     if existing_permalink:
         permalink = existing_permalink
     else:
@@ -86,16 +172,6 @@ def ensure_log_imported(file_path: Path, existing_permalink: str | None = None)
             raise DPSReportError("No permalink returned by dps.report upload")
 
     cache_file = _cache_path(cache_dir, permalink)
-
-    # Try cache first (may be warmed)
-    if cache_file.exists():
-        json_data = json.loads(cache_file.read_text(encoding="utf-8"))
-        return json_data, permalink, cache_file
-
-    json_data = get_json(permalink)
-    cache_file.write_text(json.dumps(json_data), encoding="utf-8")
-    return json_data, permalink, cache_file
-
-
-# Backward-compatible alias
-ensure_log_imported_sync = ensure_log_imported
+    if not cache_file.exists():
+        download_json(permalink, cache_file)
+    return permalink, cache_file
@@ -0,0 +1,130 @@
+"""
+Incremental extraction of the EI JSON subtrees used by the mapping layer.
+
+dps.report/Elite Insights documents for large WvW fights carry rotations, damage
+distributions and combat replay data that the mapper never reads. Building the
+whole document with `json.loads` can cost more than 1 GB per worker. Here the JSON
+is walked event by event (ijson) and only the subtrees listed in an extraction
+spec are materialized, so peak memory follows the size of the extracted data.
+
+Spec format (nested dicts):
+- `KEEP` keeps the whole subtree under a key.
+- A dict descends into a map or array. For arrays, integer keys select an index
+  and `"*"` matches any key or index that isn't listed.
+- Keys missing from the spec keep scalar values and drop containers.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Optional
+
+import ijson
+
+KEEP = True
+
+_PLAYER_SPEC: Dict[Any, Any] = {
+    "details": {"boonGraph": KEEP},
+    "dpsAll": KEEP,
+    "supportAll": KEEP,
+    "defenseAll": KEEP,
+    "statsAll": KEEP,
+    "support": KEEP,
+    "defenses": KEEP,
+    "buffUptimes": KEEP,
+    "buffUptimesActive": KEEP,
+    "buffGenerations": KEEP,
+    "buffGenerationsActive": KEEP,
+}
+
+_PHASE0_SPEC: Dict[Any, Any] = {
+    "dpsStats": KEEP,
+    "defStats": KEEP,
+    "supportStats": KEEP,
+    "gameplayStats": KEEP,
+}
+
+# Everything `map_dps_json_to_models` reads: top-level scalars, players/enemies,
+# phase 0 stat tables and the scalar fields (durations) of the other phases.
+EI_MAPPING_SPEC: Dict[Any, Any] = {
+    "players": {"*": _PLAYER_SPEC},
+    "enemyPlayers": {"*": _PLAYER_SPEC},
+    "phases": {0: _PHASE0_SPEC, "*": {}},
+}
+
+_SCALAR_EVENTS = {"null", "boolean", "integer", "double", "number", "string"}
+
+
+def _child_spec(spec: Any, key: Any) -> Optional[Any]:
+    if spec is KEEP:
+        return KEEP
+    if not isinstance(spec, dict):
+        return None
+    if key in spec:
+        return spec[key]
+    return spec.get("*")
+
+
+def extract_ei_json(fp: BinaryIO, spec: Dict[Any, Any] = EI_MAPPING_SPEC) -> Dict[str, Any]:
+    """
+    Stream-parse a JSON document from a binary file-like object, keeping only `spec`.
+    """
+    # Each frame: [container, spec, pending map key or next array index]
+    stack: list[list[Any]] = []
+    root: Any = None
+    skip_depth = 0
+
+    def _attach(value: Any) -> None:
+        nonlocal root
+        if not stack:
+            root = value
+            return
+        frame = stack[-1]
+        container = frame[0]
+        if isinstance(container, list):
+            container.append(value)
+            frame[2] += 1
+        else:
+            container[frame[2]] = value
+
+    for event, value in ijson.basic_parse(fp, use_float=True):
+        if skip_depth:
+            if event in ("start_map", "start_array"):
+                skip_depth += 1
+            elif event in ("end_map", "end_array"):
+                skip_depth -= 1
+                if skip_depth == 0 and stack and isinstance(stack[-1][0], list):
+                    stack[-1][2] += 1
+            continue
+
+        if event == "map_key":
+            stack[-1][2] = value
+            continue
+
+        if event in ("end_map", "end_array"):
+            container = stack.pop()[0]
+            _attach(container)
+            continue
+
+        if stack:
+            child = _child_spec(stack[-1][1], stack[-1][2])
+        else:
+            child = spec
+
+        if event in _SCALAR_EVENTS:
+            _attach(value)
+        elif child is None:
+            skip_depth = 1
+        elif event == "start_map":
+            stack.append([{}, child, None])
+        else:  # start_array
+            stack.append([[], child, 0])
+
+    return root if isinstance(root, dict) else {}
+
+
+def load_ei_json(path: Path, spec: Dict[Any, Any] = EI_MAPPING_SPEC) -> Dict[str, Any]:
+    """
+    Load the mapping-relevant parts of a cached EI JSON file without reading it whole.
+    """
+    with path.open("rb") as f:
+        return extract_ei_json(f, spec)
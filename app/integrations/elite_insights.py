@@ -1,7 +1,15 @@
+import hashlib
 import json
+import os
+import shlex
+import shutil
 import subprocess
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Iterable, Optional
 
 from app.config import settings
 
@@ -10,63 +18,189 @@ class EliteInsightsError(RuntimeError):
     """Raised when Elite Insights CLI fails."""
 
 
+@dataclass
+class EIJobResult:
+    """Outcome of one input log in an EI invocation (JSON is loaded on demand)."""
+    input_path: Path
+    json_path: Optional[Path] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.json_path is not None
+
+    def load(self) -> Dict:
+        if self.json_path is None:
+            raise EliteInsightsError(self.error or f"Elite Insights JSON not found for {self.input_path.stem}")
+        with self.json_path.open("r", encoding="utf-8") as f:
+            return json.load(f)
+
+
+def output_name(input_path: Path) -> str:
+    """<stem>.<first 16 hex digits of the log's SHA256>.json: unique per log content."""
+    digest = hashlib.sha256()
+    with input_path.open("rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return f"{input_path.stem}.{digest.hexdigest()[:16]}.json"
+
+
 class EliteInsightsClient:
     """
     Thin wrapper around the Elite Insights CLI.
 
     Assumptions (documented):
     - EI_CLI_PATH points to the executable (e.g. /opt/elite-insights/GW2EIParser.exe or dotnet /opt/elite-insights/GW2EIParser.dll).
-    - We call: <cli> -c <input> -o <output_dir> --json
+    - We call: <cli> -c <input> [<input> ...] -o <output_dir> --json
     - EI writes JSON to <output_dir>/<input_stem>.json
+
+    Each invocation writes into its own scratch directory so parallel runs never
+    see each other's files. Outputs are found by exact name and then moved to
+    output_dir as <input_stem>.<content hash>.json: logs with the same name from
+    different uploads never overwrite each other's JSON.
     """
 
-    def __init__(self, cli_path: str, output_dir: Path) -> None:
+    def __init__(self, cli_path: str, output_dir: Path, timeout_s: Optional[float] = None) -> None:
         self.cli_path = cli_path
         self.output_dir = output_dir
+        self.timeout_s = settings.EI_TIMEOUT_S if timeout_s is None else timeout_s
+        self._procs: set[subprocess.Popen] = set()
+        self._procs_lock = threading.Lock()
+        self._cancelled = threading.Event()
 
     def run(self, input_path: Path) -> tuple[Dict, Path]:
         """
         Run EI CLI synchronously and return parsed JSON.
         """
+        result = self.run_batch([input_path])[0]
+        if not result.ok:
+            raise EliteInsightsError(result.error or f"Elite Insights JSON not found for {input_path.stem}")
+        return result.load(), result.json_path
+
+    def run_batch(self, input_paths: list[Path]) -> list[EIJobResult]:
+        """
+        Run one EI invocation for all inputs, so .NET startup is paid once.
+
+        The timeout is EI_TIMEOUT_S per input. Inputs whose JSON is missing afterwards
+        get an error result; the others succeed even if EI exits non-zero.
+        """
         if not self.cli_path:
             raise EliteInsightsError("EI_CLI_PATH is not configured.")
-        if not input_path.exists():
-            raise EliteInsightsError(f"Input log not found: {input_path}")
+        results = {p: EIJobResult(p) for p in input_paths}
+        stems = [p.stem for p in input_paths]
+        if len(set(stems)) != len(stems):
+            raise EliteInsightsError("Inputs of one EI batch must have distinct file stems")
+
+        runnable = []
+        for p in input_paths:
+            if p.exists():
+                runnable.append(p)
+            else:
+                results[p].error = f"Input log not found: {p}"
+        if not runnable:
+            return list(results.values())
+        if self._cancelled.is_set():
+            for p in runnable:
+                results[p].error = "Elite Insights run cancelled"
+            return list(results.values())
 
         self.output_dir.mkdir(parents=True, exist_ok=True)
-        cmd = [
-            *self.cli_path.split(" "),
-            "-c",
-            str(input_path),
-            "-o",
-            str(self.output_dir),
-            "--json",
-        ]
-
-        result = subprocess.run(
-            cmd,
-            check=False,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-        )
-        if result.returncode != 0:
-            raise EliteInsightsError(
-                f"Elite Insights failed (code {result.returncode}): {result.stderr or result.stdout}"
+        scratch = Path(tempfile.mkdtemp(prefix=".ei_", dir=self.output_dir))
+        try:
+            cmd = [
+                *shlex.split(self.cli_path),
+                "-c",
+                *(str(p) for p in runnable),
+                "-o",
+                str(scratch),
+                "--json",
+            ]
+            failure = self._execute(cmd, self.timeout_s * len(runnable))
+
+            for p in runnable:
+                # EI outputs <stem>.json in the output directory
+                produced = scratch / f"{p.stem}.json"
+                if produced.exists():
+                    json_path = self.output_dir / output_name(p)
+                    os.replace(produced, json_path)
+                    results[p].json_path = json_path
+                else:
+                    results[p].error = failure or f"Elite Insights JSON not found for {p.stem}"
+        finally:
+            shutil.rmtree(scratch, ignore_errors=True)
+        return list(results.values())
+
+    def _execute(self, cmd: list[str], timeout_s: float) -> Optional[str]:
+        """Run one EI process; returns an error message or None."""
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        with self._procs_lock:
+            self._procs.add(proc)
+        try:
+            stdout, stderr = proc.communicate(timeout=timeout_s)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.communicate()
+            return f"Elite Insights timed out after {timeout_s:.0f}s"
+        finally:
+            with self._procs_lock:
+                self._procs.discard(proc)
+
+        if self._cancelled.is_set():
+            return "Elite Insights run cancelled"
+        if proc.returncode != 0:
+            return f"Elite Insights failed (code {proc.returncode}): {stderr or stdout}"
+        return None
+
+    def cancel(self) -> None:
+        """Kill running EI processes and refuse new invocations."""
+        self._cancelled.set()
+        with self._procs_lock:
+            procs = list(self._procs)
+        for proc in procs:
+            proc.kill()
+
+
+class EliteInsightsPool:
+    """
+    Run many logs through up to `workers` parallel EI processes, `batch_size` logs each.
+    """
+
+    def __init__(self, client: EliteInsightsClient, workers: Optional[int] = None, batch_size: Optional[int] = None) -> None:
+        self.client = client
+        self.workers = max(1, workers or settings.EI_WORKERS)
+        self.batch_size = max(1, batch_size or settings.EI_BATCH_SIZE)
+
+    def _batches(self, inputs: Iterable[Path]) -> list[list[Path]]:
+        batches: list[list[Path]] = []
+        for p in inputs:
+            # Keep stems unique inside a batch (EI names outputs by stem)
+            target = next(
+                (b for b in batches if len(b) < self.batch_size and all(q.stem != p.stem for q in b)),
+                None,
             )
+            if target is None:
+                batches.append([p])
+            else:
+                target.append(p)
+        return batches
 
-        # EI typically outputs <stem>.json in the output directory
-        json_path = self.output_dir / f"{input_path.stem}.json"
-        if not json_path.exists():
-            # If not found, try to locate the most recent JSON file in output_dir
-            candidates = sorted(self.output_dir.glob(f"{input_path.stem}*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
-            if not candidates:
-                raise EliteInsightsError(f"Elite Insights JSON not found for {input_path.stem}")
-            json_path = candidates[0]
+    def run(self, inputs: Iterable[Path]) -> list[EIJobResult]:
+        """Process all inputs; results are returned in input order."""
+        inputs = list(inputs)
+        by_input: dict[Path, EIJobResult] = {}
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ei") as executor:
+            for batch_results in executor.map(self.client.run_batch, self._batches(inputs)):
+                for result in batch_results:
+                    by_input[result.input_path] = result
+        return [by_input[p] for p in inputs]
 
-        with json_path.open("r", encoding="utf-8") as f:
-            return json.load(f), json_path
+    def cancel(self) -> None:
+        self.client.cancel()
 
 
 def get_ei_client() -> EliteInsightsClient:
     return EliteInsightsClient(settings.EI_CLI_PATH, settings.EI_OUTPUT_DIR)
+
+
+def get_ei_pool() -> EliteInsightsPool:
+    return EliteInsightsPool(get_ei_client())
@@ -4,8 +4,11 @@ from fastapi.templating import Jinja2Templates
 from fastapi.responses import HTMLResponse
 import logging
 
-from app.db.base import init_db
+from app.db import write_queue
+from app.db.base import SessionLocal, init_db
 from app.routers import home, analysis, meta
+from app.services import cpu_pool, meta_rollups
+from app.services.ingest_jobs import IngestWorkerPool
 
 logging.basicConfig(
     level=logging.INFO,
@@ -24,6 +27,8 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 
 templates = Jinja2Templates(directory="templates")
 
+ingest_pool = IngestWorkerPool(SessionLocal)
+
 app.include_router(home.router)
 app.include_router(analysis.router)
 app.include_router(meta.router)
@@ -34,13 +39,21 @@ async def startup_event() -> None:
     """Initialize database on startup."""
     logger.info("Initializing database...")
     init_db()
+    with SessionLocal() as db:
+        meta_rollups.ensure_built(db)
     logger.info("Database initialized successfully")
+    if ingest_pool.workers > 0:
+        ingest_pool.start()
+        logger.info(f"Started {ingest_pool.workers} ingest workers")
 
 
 @app.on_event("shutdown")
 async def shutdown_event() -> None:
     """Cleanup on shutdown."""
     logger.info("Shutting down WvW Analytics")
+    ingest_pool.stop()
+    cpu_pool.shutdown()
+    write_queue.stop_all()
 
 
 @app.exception_handler(404)
@@ -120,6 +120,17 @@ class FightSummary(BaseModel):
         from_attributes = True
 
 
+class SpecWinRate(BaseModel):
+    """Win rate of one elite spec (allied fights with a known result; percentages)."""
+    fights: int = 0
+    wins: int = 0
+    losses: int = 0
+    draws: int = 0
+    win_rate: float = 0.0
+    ci_low: float = 0.0
+    ci_high: float = 100.0
+
+
 class MetaStats(BaseModel):
     """META statistics for a context."""
     context: FightContext
@@ -130,7 +141,7 @@ class MetaStats(BaseModel):
     unique_players: int = 0
     
     top_specs: list[dict[str, int]] = Field(default_factory=list)
-    spec_winrates: dict[str, float] = Field(default_factory=dict)
+    spec_winrates: dict[str, SpecWinRate] = Field(default_factory=dict)
     role_distribution: dict[str, int] = Field(default_factory=dict)
 
 
@@ -1,34 +1,19 @@
 from collections import defaultdict
 
-from fastapi import APIRouter, Request, UploadFile, File, Depends, Query
-from fastapi.responses import HTMLResponse, RedirectResponse
+import anyio
+from fastapi import APIRouter, Request, UploadFile, File, Depends, Query, HTTPException
+from fastapi.responses import HTMLResponse, JSONResponse, Response
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 
+from app.config import settings
 from app.db.base import get_db
-from app.services import logs_service
-from app.services.dps_mapping import BOON_IDS
+from app.services import ingest_jobs, logs_service, squad_boons
+from app.services.squad_boons import BOON_COLUMNS
 
 router = APIRouter(prefix="/analyze", tags=["analysis"])
 templates = Jinja2Templates(directory="templates")
 
-BOON_COLUMNS = [
-    {"key": "might", "label": "Might", "uptime_attr": "might_uptime", "out_attr": "might_out_stacks"},
-    {"key": "fury", "label": "Fury", "uptime_attr": "fury_uptime", "out_attr": "fury_out_ms"},
-    {"key": "quickness", "label": "Quickness", "uptime_attr": "quickness_uptime", "out_attr": "quickness_out_ms"},
-    {"key": "alacrity", "label": "Alacrity", "uptime_attr": "alacrity_uptime", "out_attr": "alacrity_out_ms"},
-    {"key": "protection", "label": "Protection", "uptime_attr": "protection_uptime", "out_attr": "protection_out_ms"},
-    {"key": "regeneration", "label": "Regeneration", "uptime_attr": "regeneration_uptime", "out_attr": "regeneration_out_ms"},
-    {"key": "vigor", "label": "Vigor", "uptime_attr": "vigor_uptime", "out_attr": "vigor_out_ms"},
-    {"key": "aegis", "label": "Aegis", "uptime_attr": "aegis_uptime", "out_attr": "aegis_out_ms"},
-    {"key": "stability", "label": "Stability", "uptime_attr": "stability_uptime", "out_attr": "stab_out_ms"},
-    {"key": "swiftness", "label": "Swiftness", "uptime_attr": "swiftness_uptime", "out_attr": None},
-    {"key": "resistance", "label": "Resistance", "uptime_attr": "resistance_uptime", "out_attr": "resistance_out_ms"},
-    {"key": "resolution", "label": "Resolution", "uptime_attr": "resolution_uptime", "out_attr": None},
-    {"key": "superspeed", "label": "Superspeed", "uptime_attr": "superspeed_uptime", "out_attr": "superspeed_out_ms"},
-    {"key": "stealth", "label": "Stealth", "uptime_attr": "stealth_uptime", "out_attr": None},
-]
-
 SQUAD_DEFAULT_BOONS = [
     "might",
     "fury",
@@ -170,26 +155,20 @@ async def analyze_page(request: Request, db: Session = Depends(get_db)) -> HTMLR
     )
 
 
-@router.post("/upload", response_class=HTMLResponse)
+@router.post("/upload", response_class=HTMLResponse, status_code=202)
 async def upload_log(
     request: Request,
     file: UploadFile = File(...),
     db: Session = Depends(get_db)
 ) -> HTMLResponse:
-    """Upload and analyze a log file."""
+    """Store an uploaded log and queue it for background processing (202 + job id)."""
     import logging
     logger = logging.getLogger(__name__)
     
     try:
         logger.info(f"Uploading file: {file.filename}")
-        file_path = await logs_service.save_upload_file(file)
-        logger.info(f"File saved to: {file_path}")
-        
-        fight, error = await logs_service.process_log_file(file_path, db)
-        
+        stored, error = await logs_service.save_upload_file(file)
         if error:
-            logger.error(f"Processing error: {error}")
-            recent_fights = logs_service.get_recent_fights(db, limit=10)
             return templates.TemplateResponse(
                 "analyze.html",
                 {
@@ -197,14 +176,24 @@ async def upload_log(
                     "page": "analyze",
                     "upload_error": True,
                     "error_message": error,
-                    "recent_fights": recent_fights
+                    "recent_fights": logs_service.get_recent_fights(db, limit=10)
                 },
                 status_code=400
             )
+        logger.info(f"File saved to: {stored.path}")
         
-        return RedirectResponse(
-            url=f"/analyze/fight/{fight.id}",
-            status_code=303
+        job = ingest_jobs.enqueue(db, stored.path, stored.filename)
+        logger.info(f"Queued ingest job {job.id} for {file.filename}")
+        return templates.TemplateResponse(
+            "analyze.html",
+            {
+                "request": request,
+                "page": "analyze",
+                "job": job,
+                "recent_fights": logs_service.get_recent_fights(db, limit=10)
+            },
+            status_code=202,
+            headers={"Location": f"/analyze/jobs/{job.id}", "X-Job-Id": job.id}
         )
         
     except Exception as e:
@@ -229,6 +218,164 @@ async def upload_log(
         )
 
 
+@router.post("/upload/batch", response_class=HTMLResponse, status_code=202)
+async def upload_logs_batch(
+    request: Request,
+    files: list[UploadFile] = File(...),
+    db: Session = Depends(get_db)
+) -> HTMLResponse:
+    """
+    Store many logs (or .zip archives of logs) and queue them as one upload session.
+
+    Every file gets its own ingest job; the background workers bound how many run
+    at once. Logs are deduplicated by content (the stored sha256), whatever their
+    names, archive members included. Returns 202 with the session id, polled at
+    /analyze/sessions/{id}.
+    """
+    import logging
+    logger = logging.getLogger(__name__)
+
+    session_id = ingest_jobs.new_session_id()
+    max_files = settings.INGEST_BATCH_MAX_FILES
+    queued = 0
+    seen: set[str] = set()
+    try:
+        for upload in files:
+            name = upload.filename or "upload"
+            if queued >= max_files:
+                ingest_jobs.reject(db, name, f"Too many logs in one upload (max {max_files})", session_id)
+                continue
+
+            if name.lower().endswith(logs_service.ARCHIVE_EXTENSIONS):
+                archive, error = await logs_service.save_upload_file(
+                    upload,
+                    extensions=logs_service.ARCHIVE_EXTENSIONS,
+                    max_bytes=logs_service.MAX_ARCHIVE_BYTES,
+                    content_addressed=False,
+                )
+                if error:
+                    ingest_jobs.reject(db, name, error, session_id)
+                    continue
+                stored, rejected = await anyio.to_thread.run_sync(
+                    logs_service.expand_log_archive, archive.path, max_files - queued
+                )
+                for member_name, member_error in rejected:
+                    ingest_jobs.reject(db, member_name, member_error, session_id)
+            else:
+                upload_stored, error = await logs_service.save_upload_file(upload)
+                if error:
+                    ingest_jobs.reject(db, name, error, session_id)
+                    continue
+                stored = [upload_stored]
+
+            for item in stored:
+                # Same content: same stored file, which the first job already ingests
+                if item.sha256 in seen:
+                    ingest_jobs.reject(db, item.filename, "Duplicate file in this upload", session_id)
+                    continue
+                seen.add(item.sha256)
+                ingest_jobs.enqueue(db, item.path, item.filename, session_id=session_id, commit=False)
+                queued += 1
+        db.commit()
+        ingest_jobs.notify_workers()
+    except Exception as e:
+        logger.exception(f"Batch upload exception: {str(e)}")
+        db.rollback()
+        return templates.TemplateResponse(
+            "analyze.html",
+            {
+                "request": request,
+                "page": "analyze",
+                "upload_error": True,
+                "error_message": f"Upload failed: {str(e)}",
+                "recent_fights": logs_service.get_recent_fights(db, limit=10)
+            },
+            status_code=500
+        )
+
+    logger.info(f"Queued {queued} logs in upload session {session_id}")
+    jobs = ingest_jobs.get_session_jobs(db, session_id)
+    return templates.TemplateResponse(
+        "analyze.html",
+        {
+            "request": request,
+            "page": "analyze",
+            "upload_session": _session_summary(session_id, jobs),
+            "recent_fights": logs_service.get_recent_fights(db, limit=10)
+        },
+        status_code=202 if queued else 400,
+        headers={"Location": f"/analyze/sessions/{session_id}", "X-Session-Id": session_id}
+    )
+
+
+def _session_summary(session_id: str, jobs: list) -> dict:
+    counts = defaultdict(int)
+    for job in jobs:
+        counts[job.status] += 1
+    return {
+        "id": session_id,
+        "jobs": jobs,
+        "total": len(jobs),
+        "done": counts[ingest_jobs.STATUS_DONE],
+        "failed": counts[ingest_jobs.STATUS_FAILED],
+        "pending": counts[ingest_jobs.STATUS_QUEUED] + counts[ingest_jobs.STATUS_RUNNING],
+        "fight_ids": [job.fight_id for job in jobs if job.fight_id is not None],
+    }
+
+
+@router.get("/sessions/{session_id}", response_class=HTMLResponse)
+async def session_status(request: Request, session_id: str, db: Session = Depends(get_db)) -> Response:
+    """Per-file status of a multi-file upload (HTMX fragment, or JSON)."""
+    jobs = ingest_jobs.get_session_jobs(db, session_id)
+    if not jobs:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    summary = _session_summary(session_id, jobs)
+
+    if "application/json" in request.headers.get("accept", ""):
+        return JSONResponse(
+            {
+                **{k: summary[k] for k in ("id", "total", "done", "failed", "pending", "fight_ids")},
+                "files": [
+                    {
+                        "job_id": job.id,
+                        "filename": job.filename,
+                        "status": job.status,
+                        "stage": job.stage,
+                        "fight_id": job.fight_id,
+                        "error": job.error,
+                    }
+                    for job in jobs
+                ],
+            }
+        )
+    return templates.TemplateResponse("_upload_session.html", {"request": request, "upload_session": summary})
+
+
+@router.get("/jobs/{job_id}", response_class=HTMLResponse)
+async def job_status(request: Request, job_id: str, db: Session = Depends(get_db)) -> Response:
+    """Ingest job progress: HTML fragment polled by HTMX, or JSON for API clients."""
+    job = ingest_jobs.get_job(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    if "application/json" in request.headers.get("accept", ""):
+        return JSONResponse(
+            {
+                "id": job.id,
+                "filename": job.filename,
+                "status": job.status,
+                "stage": job.stage,
+                "fight_id": job.fight_id,
+                "error": job.error,
+            }
+        )
+
+    headers = {}
+    if job.status == ingest_jobs.STATUS_DONE and request.headers.get("HX-Request"):
+        headers["HX-Redirect"] = f"/analyze/fight/{job.fight_id}"
+    return templates.TemplateResponse("_ingest_job.html", {"request": request, "job": job}, headers=headers)
+
+
 @router.get("/fight/{fight_id}", response_class=HTMLResponse)
 async def view_fight(
     request: Request,
@@ -241,7 +388,9 @@ async def view_fight(
     db: Session = Depends(get_db)
 ) -> HTMLResponse:
     """View detailed fight analysis."""
-    fight = logs_service.get_fight_by_id(db, fight_id)
+    squad_boon_uptimes = squad_boons.load(db, fight_id)
+    # Boon timelines are only needed for fights stored before the uptime table existed
+    fight = logs_service.get_fight_by_id(db, fight_id, with_boon_timelines=squad_boon_uptimes is None)
     
     if not fight:
         return templates.TemplateResponse(
@@ -251,108 +400,12 @@ async def view_fight(
         )
     
     # Allies: explicit flag from EI mapping, exclude non-squad rows (subgroup <=0 or >=50)
-    allied_players = [
-        p for p in fight.player_stats
-        if getattr(p, "is_ally", True) and 0 < int(getattr(p, "subgroup", 0) or 0) < 50
-    ]
+    allied_players = [p for p in fight.player_stats if squad_boons.is_squad_member(p)]
     show_boon_columns = bool(show_boons)
 
-    fight_duration_ms = fight.duration_ms or 0
-
-    # Squad boon uptimes per subgroup (weighted by active duration)
-    def active_duration_ms(player) -> float:
-        """Active duration = phase duration - deadDuration - dcDuration (clamped to 0)."""
-        dead_ms = getattr(player, "dead_duration_ms", None)
-        dc_ms = getattr(player, "dc_duration_ms", None)
-        if dead_ms is None and dc_ms is None:
-            presence = getattr(player, "presence", None) or getattr(player, "presence_pct", None)
-            try:
-                presence_val = float(presence) if presence is not None else None
-            except (TypeError, ValueError):
-                presence_val = None
-            if presence_val is not None and presence_val > 0 and fight_duration_ms:
-                return fight_duration_ms * (presence_val / 100.0)
-            return float(fight_duration_ms or 0)
-        dead_val = float(dead_ms or 0)
-        dc_val = float(dc_ms or 0)
-        return max(0.0, float(fight_duration_ms or 0) - dead_val - dc_val)
-
-    group_totals: dict[int, dict] = defaultdict(lambda: {"active_ms": 0.0, "boon_ms": defaultdict(float)})
-    squad_total = {"active_ms": 0.0, "boon_ms": defaultdict(float)}
-
-    def buff_ms_from_states(player, buff_key: str, active_ms: float, phase_ms: float) -> float:
-        """Prefer raw states (boonGraph) to compute buff active ms; fallback to % uptime."""
-        buff_id = BOON_IDS.get(buff_key)
-        states_map = getattr(player, "boon_states", {}) or {}
-        states = states_map.get(buff_id) if buff_id is not None else None
-        if states:
-            states_sorted = sorted(states, key=lambda x: x[0])
-            active = 0.0
-            for (t, val), (t_next, _) in zip(states_sorted, states_sorted[1:]):
-                if val and val > 0:
-                    active += max(0.0, t_next - t)
-            # Clamp to active duration
-            if active_ms > 0:
-                active = min(active, active_ms)
-            return active
-        # Fallback: use stored percentage
-        value = getattr(player, f"{buff_key}_uptime", 0.0) or 0.0
-        normalized_percent = min(100.0, max(0.0, float(value)))
-        buff_ms = (normalized_percent / 100.0) * phase_ms
-        if active_ms > 0:
-            buff_ms = min(buff_ms, active_ms)
-        return buff_ms
-
-    for player in allied_players:
-        subgroup = player.subgroup or 0
-        group_entry = group_totals[subgroup]
-        phase_ms = float(fight_duration_ms or 0)
-        active_ms = active_duration_ms(player)
-        if active_ms <= 0 and phase_ms > 0:
-            active_ms = phase_ms
-        group_entry["active_ms"] += active_ms
-        # Exclude non-squad (subgroup 0) from "Squad Average" like EI
-        if subgroup and subgroup > 0:
-            squad_total["active_ms"] += active_ms
-
-        for column in BOON_COLUMNS:
-            buff_ms = buff_ms_from_states(player, column["key"], active_ms, phase_ms)
-            group_entry["boon_ms"][column["key"]] += buff_ms
-            if subgroup and subgroup > 0:
-                squad_total["boon_ms"][column["key"]] += buff_ms
-
-    def build_boon_row(label: str, data: dict, group_number: int | None = None) -> dict:
-        boons = {}
-        active_ms = data["active_ms"]
-        for column in BOON_COLUMNS:
-            if active_ms > 0:
-                uptime_pct = (data["boon_ms"][column["key"]] / active_ms) * 100.0
-                boons[column["key"]] = round(min(100.0, max(0.0, uptime_pct)), 1)
-            else:
-                boons[column["key"]] = 0.0
-        # Count actual players contributing to this group
-        player_count = len([p for p in allied_players if (p.subgroup or 0) == group_number]) if group_number is not None else 0
-        return {
-            "label": label,
-            "group": group_number,
-            "player_count": player_count,
-            "boons": boons,
-        }
-
-    squad_boon_uptimes = []
-    if squad_total["active_ms"] > 0:
-        squad_boon_uptimes.append(build_boon_row("Squad Average", squad_total, None))
-    else:
-        # Ensure Squad Average always shows total player count even if active_ms=0
-        squad_boon_uptimes.append({
-            "label": "Squad Average",
-            "group": None,
-            "player_count": len(allied_players),
-            "boons": {col["key"]: 0.0 for col in BOON_COLUMNS},
-        })
-    for group in sorted(group_totals.keys()):
-        label = f"Group {group}" if group else "Group ?"
-        squad_boon_uptimes.append(build_boon_row(label, group_totals[group], group))
+    # Squad boon uptimes per subgroup (weighted by active duration), computed at ingestion
+    if squad_boon_uptimes is None:
+        squad_boon_uptimes = squad_boons.table_rows(squad_boons.summary_rows(fight.duration_ms, allied_players))
 
     allied_sort_key = (allied_sort or DEFAULT_ALLIED_SORT).lower()
     if allied_sort_key not in ALLIED_SORT_COLUMNS:
@@ -1,4 +1,6 @@
-from fastapi import APIRouter, Request, Depends
+from typing import Optional
+
+from fastapi import APIRouter, Request, Depends, HTTPException
 from fastapi.responses import HTMLResponse
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
@@ -6,54 +8,47 @@ from sqlalchemy.orm import Session
 from app.db.base import get_db
 from app.db.models import FightContext
 from app.services import meta_service
+from app.services.meta_windows import available_windows, resolve_window
 
 router = APIRouter(prefix="/meta", tags=["meta"])
 templates = Jinja2Templates(directory="templates")
 
 
-@router.get("/zerg", response_class=HTMLResponse)
-async def meta_zerg(request: Request, db: Session = Depends(get_db)) -> HTMLResponse:
-    """META statistics for Zerg context."""
-    stats = meta_service.get_meta_stats(db, FightContext.ZERG)
+def _render_meta(
+    request: Request, db: Session, context: FightContext, context_name: str, window_key: Optional[str]
+) -> HTMLResponse:
+    """META page for one context over the selected time window (?window=all|7d|30d|90d|patch-...)."""
+    window = resolve_window(window_key)
+    if window is None:
+        raise HTTPException(status_code=400, detail=f"Unknown window: {window_key}")
+    stats = meta_service.get_meta_stats_cached(db, context, window.since, window.until)
     return templates.TemplateResponse(
         "meta.html",
         {
             "request": request,
             "page": "meta",
-            "context": FightContext.ZERG,
-            "context_name": "Zerg",
-            "stats": stats
+            "context": context,
+            "context_name": context_name,
+            "stats": stats,
+            "window": window,
+            "windows": available_windows(),
         }
     )
 
 
+@router.get("/zerg", response_class=HTMLResponse)
+async def meta_zerg(request: Request, window: Optional[str] = None, db: Session = Depends(get_db)) -> HTMLResponse:
+    """META statistics for Zerg context."""
+    return _render_meta(request, db, FightContext.ZERG, "Zerg", window)
+
+
 @router.get("/guild_raid", response_class=HTMLResponse)
-async def meta_guild_raid(request: Request, db: Session = Depends(get_db)) -> HTMLResponse:
+async def meta_guild_raid(request: Request, window: Optional[str] = None, db: Session = Depends(get_db)) -> HTMLResponse:
     """META statistics for Guild Raid context."""
-    stats = meta_service.get_meta_stats(db, FightContext.GUILD_RAID)
-    return templates.TemplateResponse(
-        "meta.html",
-        {
-            "request": request,
-            "page": "meta",
-            "context": FightContext.GUILD_RAID,
-            "context_name": "Guild Raid",
-            "stats": stats
-        }
-    )
+    return _render_meta(request, db, FightContext.GUILD_RAID, "Guild Raid", window)
 
 
 @router.get("/roam", response_class=HTMLResponse)
-async def meta_roam(request: Request, db: Session = Depends(get_db)) -> HTMLResponse:
+async def meta_roam(request: Request, window: Optional[str] = None, db: Session = Depends(get_db)) -> HTMLResponse:
     """META statistics for Roam context."""
-    stats = meta_service.get_meta_stats(db, FightContext.ROAM)
-    return templates.TemplateResponse(
-        "meta.html",
-        {
-            "request": request,
-            "page": "meta",
-            "context": FightContext.ROAM,
-            "context_name": "Roam",
-            "stats": stats
-        }
-    )
+    return _render_meta(request, db, FightContext.ROAM, "Roam", window)
@@ -0,0 +1,37 @@
+"""
+Store the squad boon uptime table of fights imported before it was kept at ingestion.
+
+New fights get theirs when they are stored; the fight view computes the table on
+every request for fights that have none. Safe to re-run: only fights without
+rows are processed.
+
+Usage:
+    python -m app.scripts.backfill_squad_boons
+"""
+
+import time
+
+from app.db.base import SessionLocal
+from app.services import squad_boons
+
+
+def main():
+    """Main entry point."""
+    print("=" * 80)
+    print("🚀 WvW Analytics - Backfill Squad Boon Uptimes")
+    print("=" * 80)
+    print()
+
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        filled = squad_boons.backfill(db)
+    finally:
+        db.close()
+
+    print(f"✅ Squad boon uptimes stored for {filled} fights")
+    print(f"⏱️  Elapsed: {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
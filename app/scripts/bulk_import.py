@@ -12,7 +12,6 @@ import sys
 import os
 from pathlib import Path
 from typing import Optional
-import hashlib
 
 from sqlalchemy.orm import Session
 
@@ -21,15 +20,6 @@ from app.db.models import Base, Fight
 from app.services.logs_service import process_log_file_sync
 
 
-def compute_file_hash(file_path: Path) -> str:
-    """Compute SHA256 hash of file to detect duplicates."""
-    sha256_hash = hashlib.sha256()
-    with open(file_path, "rb") as f:
-        for byte_block in iter(lambda: f.read(4096), b""):
-            sha256_hash.update(byte_block)
-    return sha256_hash.hexdigest()
-
-
 def is_already_imported(db: Session, filename: str) -> bool:
     """Check if a file with this name was already imported."""
     return db.query(Fight).filter(Fight.evtc_filename == filename).first() is not None
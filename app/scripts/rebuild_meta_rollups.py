@@ -0,0 +1,39 @@
+"""
+Rebuild the daily META rollup tables from fights/player_stats.
+
+Ingestion keeps the rollups current on its own; run this after editing fights
+or player rows by hand, or to check that the rollups match the raw tables.
+
+Usage:
+    python -m app.scripts.rebuild_meta_rollups
+"""
+
+import time
+
+from app.db.base import SessionLocal
+from app.services import meta_rollups
+
+
+def main():
+    """Main entry point."""
+    print("=" * 80)
+    print("🚀 WvW Analytics - Rebuild META Rollups")
+    print("=" * 80)
+    print()
+
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        counts = meta_rollups.rebuild(db)
+        db.commit()
+    finally:
+        db.close()
+
+    print("✅ Rollups rebuilt")
+    for table, count in counts.items():
+        print(f"   {table:24s}: {count:8d} rows")
+    print(f"⏱️  Elapsed: {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,7 @@ Usage:
 
 from app.db.base import SessionLocal
 from app.db.models import PlayerStats
+from app.services import meta_rollups
 from app.services.roles_service import detect_player_role
 
 
@@ -47,6 +48,9 @@ def recalculate_all_roles():
             
             player_stat.detected_role = new_role
         
+        # Role counts in the META rollups changed too
+        meta_rollups.rebuild(db)
+
         # Commit all changes
         db.commit()
         
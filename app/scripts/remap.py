@@ -0,0 +1,95 @@
+"""
+Re-map stored fights from their cached EI JSON (no uploads, no network).
+
+Run this after changing the mapping layer: every fight with a dps_json_path is
+re-mapped in a process pool and only the columns that changed are written.
+Progress is checkpointed after each chunk; rerunning resumes after the last
+committed fight unless --restart is given.
+
+Usage:
+    python -m app.scripts.remap [--workers N] [--chunk-size 200] [--limit N] [--dry-run] [--restart]
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+from sqlalchemy.orm import Session
+
+from app.db.base import engine
+from app.services import meta_rollups
+from app.services.remap_service import remap_all
+
+DEFAULT_CHECKPOINT = Path("data/remap_checkpoint.json")
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Re-map fights from cached EI JSON")
+    parser.add_argument("--workers", type=int, default=None, help="Mapping processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=200, help="Fights per commit/checkpoint")
+    parser.add_argument("--limit", type=int, default=None, help="Stop after N fights")
+    parser.add_argument("--checkpoint", type=Path, default=DEFAULT_CHECKPOINT)
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and start from the first fight")
+    parser.add_argument("--dry-run", action="store_true", help="Compute the diff but write nothing")
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("🚀 WvW Analytics - Re-map Fights From Cached JSON")
+    print("=" * 80)
+    print()
+
+    if args.restart and args.checkpoint.exists():
+        args.checkpoint.unlink()
+
+    started = time.perf_counter()
+
+    def progress(stats, total):
+        elapsed = time.perf_counter() - started
+        rate = stats.fights / elapsed if elapsed > 0 else 0.0
+        print(f"  {stats.fights}/{total} fights (last #{stats.last_fight_id}) - {rate:.0f} fights/s")
+
+    stats = remap_all(
+        engine,
+        checkpoint=args.checkpoint,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        limit=args.limit,
+        dry_run=args.dry_run,
+        progress=progress,
+    )
+
+    if stats.fights_changed and not args.dry_run:
+        print("🔄 Rebuilding META rollups...")
+        with Session(engine) as db:
+            meta_rollups.rebuild(db)
+            db.commit()
+
+    print()
+    print("=" * 80)
+    print("📊 Re-map Summary" + (" (dry run, nothing written)" if args.dry_run else ""))
+    print("=" * 80)
+    print(f"Fights processed:     {stats.fights}")
+    print(f"Fights changed:       {stats.fights_changed}")
+    print(f"Player rows updated:  {stats.players_updated}")
+    print(f"Player rows replaced: {stats.players_replaced}")
+    print(f"❌ Errors:            {len(stats.errors)}")
+    print(f"⏱️  Elapsed:           {time.perf_counter() - started:.1f}s")
+    print()
+
+    if stats.columns_changed:
+        print("Changed columns:")
+        for col, count in sorted(stats.columns_changed.items(), key=lambda x: x[1], reverse=True):
+            print(f"   {col:28s}: {count:8d}")
+        print()
+
+    if stats.errors:
+        print("Error details:")
+        for fight_id, error in stats.errors[:10]:
+            print(f"  - Fight #{fight_id}: {error}")
+        if len(stats.errors) > 10:
+            print(f"  ... and {len(stats.errors) - 10} more errors")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+Boon state series (EI boonGraph / buffData `states`) as NumPy arrays.
+
+EI reports a buff as a step function: a list of `[time, value]` samples where each
+value holds until the next sample (value = 1/0 for duration boons, the stack count for
+might). The mapper and the fight view both need "how long was it active", sometimes
+clipped to a window. Here the samples are converted to arrays once and every
+aggregate is a vectorized diff/where.
+
+Series are persisted per player (player_stats.boon_timelines) as zlib-compressed,
+delta-encoded int32 arrays: see encode_timelines/decode_timelines.
+"""
+from __future__ import annotations
+
+import struct
+import zlib
+from typing import Any, Dict, Iterable, Mapping, Optional, Union
+
+import numpy as np
+
+
+class StateSeries:
+    """Sorted step-function samples: `times` (ms) and `values`, both float64 arrays."""
+
+    __slots__ = ("times", "values")
+
+    def __init__(self, times: np.ndarray, values: np.ndarray) -> None:
+        self.times = times
+        self.values = values
+
+    def __len__(self) -> int:
+        return int(self.times.size)
+
+    def __iter__(self):
+        # Behaves like the legacy [[t, v], ...] lists for callers that iterate
+        return iter(zip(self.times.tolist(), self.values.tolist()))
+
+    def __repr__(self) -> str:
+        return f"StateSeries(n={len(self)})"
+
+
+StatesLike = Union[StateSeries, Iterable[Any], None]
+
+EMPTY = StateSeries(np.empty(0), np.empty(0))
+
+
+def _pairs_slow(states: Iterable[Any]) -> np.ndarray:
+    rows = []
+    for entry in states:
+        try:
+            t, v = entry
+            rows.append((float(t), float(v or 0)))
+        except Exception:
+            continue
+    return np.array(rows, dtype=np.float64).reshape(-1, 2)
+
+
+def to_series(states: StatesLike, time_scale: float = 1.0) -> StateSeries:
+    """
+    Convert `[[time, value], ...]` into a StateSeries sorted by time (stable).
+
+    `time_scale` converts the source unit to ms (1000.0 for boonGraph seconds).
+    Malformed samples are skipped.
+    """
+    if isinstance(states, StateSeries):
+        return states
+    if not states:
+        return EMPTY
+    try:
+        arr = np.asarray(states, dtype=np.float64)
+        if arr.ndim != 2 or arr.shape[1] != 2:
+            raise ValueError("not a list of pairs")
+    except (TypeError, ValueError):
+        arr = _pairs_slow(states)
+    if arr.size == 0:
+        return EMPTY
+    if np.isnan(arr).any():
+        arr = np.nan_to_num(arr, nan=0.0)
+    order = np.argsort(arr[:, 0], kind="stable")
+    times = arr[order, 0]
+    if time_scale != 1.0:
+        times = times * time_scale
+    return StateSeries(times, arr[order, 1])
+
+
+def concat(series: Iterable[StatesLike], time_scale: float = 1.0) -> StateSeries:
+    """Merge several sample lists (e.g. statesPerSource) into one sorted series."""
+    parts = [to_series(s, time_scale) for s in series]
+    parts = [p for p in parts if len(p)]
+    if not parts:
+        return EMPTY
+    times = np.concatenate([p.times for p in parts])
+    values = np.concatenate([p.values for p in parts])
+    order = np.argsort(times, kind="stable")
+    return StateSeries(times[order], values[order])
+
+
+def _intervals(series: StateSeries, start: Optional[float], end: Optional[float]) -> tuple[np.ndarray, np.ndarray]:
+    t0 = series.times[:-1]
+    t1 = series.times[1:]
+    if start is not None or end is not None:
+        lo = -np.inf if start is None else start
+        hi = np.inf if end is None else end
+        t0 = np.clip(t0, lo, hi)
+        t1 = np.clip(t1, lo, hi)
+    return t0, t1
+
+
+def active_ms(states: StatesLike, start: Optional[float] = None, end: Optional[float] = None) -> float:
+    """
+    Total time (ms) with value > 0, optionally clipped to [start, end].
+
+    The last sample opens no interval (its duration is unknown).
+    """
+    series = to_series(states)
+    if len(series) < 2:
+        return 0.0
+    t0, t1 = _intervals(series, start, end)
+    return float(np.where(series.values[:-1] > 0, t1 - t0, 0.0).sum())
+
+
+def active_ms_many(
+    states_list: Iterable[StatesLike], start: Optional[float] = None, end: Optional[float] = None
+) -> np.ndarray:
+    """
+    `active_ms` of every series, computed in one vectorized pass over all of them.
+
+    For many short series (a fight's players x boons) the per-call overhead of
+    `active_ms` outweighs the arithmetic.
+    """
+    series = [to_series(states) for states in states_list]
+    result = np.zeros(len(series))
+    used = [i for i, s in enumerate(series) if len(s) >= 2]
+    if not used:
+        return result
+    t0, t1 = _intervals(
+        StateSeries(
+            np.concatenate([series[i].times for i in used]),
+            np.concatenate([series[i].values for i in used]),
+        ),
+        start,
+        end,
+    )
+    values = np.concatenate([series[i].values[:-1] for i in used])
+    # The concatenated pairs include one interval across each boundary: drop them
+    lengths = np.array([len(series[i]) for i in used])
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    inside = np.ones(t0.size, dtype=bool)
+    inside[(starts + lengths - 1)[:-1]] = False
+    durations = np.where(values > 0, (t1 - t0)[inside], 0.0)
+    result[used] = np.add.reduceat(durations, starts - np.arange(len(used)))
+    return result
+
+
+def stack_weighted_average(
+    states: StatesLike, start: Optional[float] = None, end: Optional[float] = None
+) -> float:
+    """
+    Time-weighted average value (e.g. average might stacks) over [start, end].
+
+    Without an explicit window, the span from the first to the last sample is used.
+    """
+    series = to_series(states)
+    if len(series) < 2:
+        return 0.0
+    t0, t1 = _intervals(series, start, end)
+    lo = series.times[0] if start is None else start
+    hi = series.times[-1] if end is None else end
+    span = float(hi - lo)
+    if span <= 0:
+        return 0.0
+    return float((series.values[:-1] * (t1 - t0)).sum() / span)
+
+
+def uptime_pct(states: StatesLike, duration_ms: float, start: Optional[float] = None, end: Optional[float] = None) -> float:
+    """Active time as a percentage of duration_ms (capped at 100)."""
+    if not duration_ms or duration_ms <= 0:
+        return 0.0
+    return min(100.0, active_ms(states, start, end) / duration_ms * 100.0)
+
+
+# Blob layout: version, buff count, (buff_id, sample count) per buff, then one zlib
+# stream holding each buff's int32 time deltas followed by its value deltas
+_BLOB_HEADER = struct.Struct("<BH")
+_BLOB_ENTRY = struct.Struct("<II")
+_BLOB_VERSION = 1
+
+
+def encode_timelines(timelines: Mapping[int, StatesLike]) -> bytes:
+    """
+    Pack {buff_id: series} into one compact blob.
+
+    Times are rounded to whole ms and values to integers (boon presence / stack counts).
+    Both are stored as deltas from the previous sample, which are mostly tiny and repeat
+    often, so zlib shrinks them well.
+    """
+    entries = []
+    chunks = []
+    for buff_id, states in timelines.items():
+        series = to_series(states)
+        samples = np.rint(np.stack((series.times, series.values))).astype(np.int64)
+        deltas = samples.copy()
+        deltas[:, 1:] -= samples[:, :-1]
+        entries.append(_BLOB_ENTRY.pack(int(buff_id), len(series)))
+        chunks.append(deltas.astype("<i4").tobytes())
+    header = _BLOB_HEADER.pack(_BLOB_VERSION, len(entries)) + b"".join(entries)
+    return header + zlib.compress(b"".join(chunks), 6)
+
+
+def decode_timelines(blob: Optional[bytes]) -> Dict[int, StateSeries]:
+    """Inverse of encode_timelines (None/empty -> {})."""
+    if not blob:
+        return {}
+    version, n_buffs = _BLOB_HEADER.unpack_from(blob)
+    if version != _BLOB_VERSION:
+        raise ValueError(f"Unsupported boon timeline version: {version}")
+    offset = _BLOB_HEADER.size
+    entries = []
+    for _ in range(n_buffs):
+        entries.append(_BLOB_ENTRY.unpack_from(blob, offset))
+        offset += _BLOB_ENTRY.size
+    deltas = np.frombuffer(zlib.decompress(blob[offset:]), dtype="<i4")
+    if deltas.size != 2 * sum(count for _, count in entries):
+        raise ValueError("Corrupt boon timeline blob")
+
+    out: Dict[int, StateSeries] = {}
+    pos = 0
+    for buff_id, count in entries:
+        samples = np.cumsum(deltas[pos:pos + 2 * count].reshape(2, count), axis=1, dtype=np.int64)
+        out[buff_id] = StateSeries(samples[0].astype(np.float64), samples[1].astype(np.float64))
+        pos += 2 * count
+    return out
@@ -0,0 +1,105 @@
+"""
+Process pool for the CPU-bound ingestion stages.
+
+Decoding the EI JSON, mapping it and detecting roles is pure Python and holds
+the GIL, so running it on a thread slows every other request in the same
+uvicorn worker. With CPU_POOL_WORKERS > 0 these stages run in worker processes
+instead, and the calling thread only does I/O (dps.report, the DB write).
+
+Only compact, picklable values cross the process boundary: a file path goes in,
+and plain column dicts come back (see `map_ei_file`), never ORM objects.
+CPU_POOL_WORKERS=0 runs everything inline in the calling thread.
+"""
+from __future__ import annotations
+
+import json
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from app.config import settings
+
+T = TypeVar("T")
+
+# With DPS_REPORT_STREAM_JSON off (the default), only cached JSONs above this size
+# are streamed. Measured with ijson's yajl2_c backend: json.load of a 9 MB EI JSON
+# takes 0.51 s and peaks at 60 MB, streaming 1.31 s and 36 MB; at 61 MB it is
+# 2.15 s / 332 MB against 5.86 s / 105 MB. Streaming every log costs ~2.7x the
+# decode time, so it is kept for the files whose json.load would not fit a worker.
+STREAM_ABOVE_BYTES = 64 * 1024 * 1024
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def load_cached_json(path: Path) -> Dict[str, Any]:
+    """
+    Decode a cached EI JSON file.
+
+    Files above STREAM_ABOVE_BYTES, and every file with DPS_REPORT_STREAM_JSON,
+    are streamed: only the subtrees used by the mapper are materialized
+    (ei_json_stream), which bounds each worker's memory. Smaller files are
+    json.load-ed, which is faster.
+    """
+    if settings.DPS_REPORT_STREAM_JSON or path.stat().st_size > STREAM_ABOVE_BYTES:
+        from app.integrations.ei_json_stream import load_ei_json
+
+        return load_ei_json(path)
+    with path.open("r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def map_ei_file(json_path: str) -> Dict[str, Any]:
+    """
+    Worker: decode, map and detect roles for one cached EI JSON.
+
+    Returns {"fight": {column: value}, "players": [{column: value}, ...],
+    "boon_uptimes": squad_boons.summary_rows}; the uptime table is built here,
+    while the boon states are still decoded.
+    """
+    from app.services.dps_mapping import map_dps_json_to_models
+    from app.services.fight_store import fight_row, player_rows
+    from app.services.roles_service_v2 import detect_player_role
+    from app.services.squad_boons import summary_rows
+
+    mapped = map_dps_json_to_models(load_cached_json(Path(json_path)))
+    for ps in mapped.player_stats:
+        ps.detected_role, _ = detect_player_role(ps)
+    return {
+        "fight": fight_row(mapped.fight),
+        "players": player_rows(mapped.player_stats),
+        "boon_uptimes": summary_rows(mapped.fight.duration_ms, mapped.player_stats),
+    }
+
+
+def get_executor() -> Optional[ProcessPoolExecutor]:
+    """Shared pool for this process (created on first use), or None when disabled."""
+    global _executor
+    if settings.CPU_POOL_WORKERS <= 0:
+        return None
+    with _executor_lock:
+        if _executor is None:
+            # spawn: forking a process that already runs threads is not safe
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.CPU_POOL_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def run_cpu(fn: Callable[..., T], *args: Any) -> T:
+    """Run fn(*args) in the process pool and wait for it (inline when the pool is disabled)."""
+    executor = get_executor()
+    if executor is None:
+        return fn(*args)
+    return executor.submit(fn, *args).result()
+
+
+def shutdown() -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(cancel_futures=True)
+            _executor = None
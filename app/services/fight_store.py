@@ -0,0 +1,107 @@
+"""
+Bulk persistence of mapped fights (Core statements, no ORM unit of work).
+
+A mapped fight with 100+ players saved through the ORM sends one INSERT per
+PlayerStats row, keeps every instance in the identity map and reloads them all
+on refresh. `insert_mapped_fight` writes the same rows with:
+
+- one `INSERT ... RETURNING id` for the fight;
+- one executemany INSERT for all player rows, role labels included;
+- the META rollup upserts for the fight (see meta_rollups);
+- one executemany INSERT for the fight's squad boon uptime table (see squad_boons).
+
+All of them run in the caller's session transaction, so the caller still decides when
+to commit. On Postgres, SQLAlchemy's insertmanyvalues turns the executemany into
+batched multi-row VALUES statements.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.db.models import Fight, PlayerStats
+from app.services import meta_rollups, squad_boons
+from app.services.mapping_core import MappedFight
+
+_fights = Fight.__table__
+_players = PlayerStats.__table__
+FIGHT_INSERT_COLS = [c for c in _fights.columns if c.name != "id"]
+PLAYER_INSERT_COLS = [c for c in _players.columns if c.name not in {"id", "fight_id"}]
+
+
+def column_value(obj: Any, column) -> Any:
+    """Attribute value of a transient model, with the column's scalar default for None."""
+    value = getattr(obj, column.name)
+    if value is None and column.default is not None and column.default.is_scalar:
+        return column.default.arg
+    return value
+
+
+def row_values(obj: Any, columns: Iterable) -> Dict[str, Any]:
+    return {col.name: column_value(obj, col) for col in columns}
+
+
+def fight_row(fight: Fight) -> Dict[str, Any]:
+    """Column values of a transient Fight, leaving unset callable defaults (upload_timestamp) to the INSERT."""
+    return {
+        col.name: value
+        for col in FIGHT_INSERT_COLS
+        if (value := column_value(fight, col)) is not None or col.default is None
+    }
+
+
+def player_rows(player_stats: Iterable[PlayerStats]) -> list[Dict[str, Any]]:
+    return [row_values(ps, PLAYER_INSERT_COLS) for ps in player_stats]
+
+
+def insert_fight_rows(
+    db: Session,
+    fight: Dict[str, Any],
+    players: list[Dict[str, Any]],
+    boon_uptimes: list[Dict[str, Any]],
+) -> int:
+    """
+    Insert one fight row and its player rows in the current transaction, update
+    the META rollups, store the squad boon uptimes and return the fight id.
+
+    Rows are plain column dicts (as built by `fight_row`/`player_rows`), so they
+    can come back from a worker process. `boon_uptimes` are the
+    squad_boons.summary_rows of the fight, computed by the caller from the
+    players' in-memory boon states (decoding the stored timelines here would
+    run inside the writer's transaction).
+    """
+    stored = db.execute(
+        insert(_fights)
+        .values(fight)
+        .returning(
+            _fights.c.id,
+            _fights.c.context,
+            _fights.c.result,
+            _fights.c.duration_ms,
+            _fights.c.start_time,
+            _fights.c.upload_timestamp,
+        )
+    ).one()
+    if players:
+        db.execute(insert(_players), [{**row, "fight_id": stored.id} for row in players])
+    meta_rollups.add_fight(db, stored, players)
+    squad_boons.store(db, stored.id, boon_uptimes)
+    return stored.id
+
+
+def insert_mapped_fight(db: Session, mapped: MappedFight) -> int:
+    """
+    Insert `mapped.fight` and its players in the current transaction; return the fight id.
+
+    Fight attributes set by the caller (filename, permalink, ...) and each
+    player's `detected_role` are written as they are. The ORM instances stay
+    transient: load the fight by id when an attached object is needed.
+    """
+    return insert_fight_rows(
+        db,
+        fight_row(mapped.fight),
+        player_rows(mapped.player_stats),
+        squad_boons.summary_rows(mapped.fight.duration_ms, mapped.player_stats),
+    )
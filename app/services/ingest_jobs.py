@@ -0,0 +1,269 @@
+"""
+Background ingestion queue.
+
+An upload only stores the file and enqueues a row in `ingest_jobs`, then the
+request returns 202 with the job id. A bounded pool of worker threads per
+process claims queued jobs and runs the usual pipeline (dps.report, mapping,
+DB writes) through `process_log_file_sync`, recording the current stage on the
+job row so the analyze page can poll it.
+
+The table is the queue, so it is shared by uvicorn worker processes and
+survives restarts:
+
+- Claiming is a compare-and-swap on (id, status="queued"), so each job runs once.
+- Running jobs refresh `updated_at` at every stage. A job whose heartbeat is
+  older than INGEST_JOB_STALE_S (its worker died) is put back in the queue, or
+  failed after INGEST_JOB_MAX_ATTEMPTS claims.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.config import settings
+from app.db.models import IngestJob
+
+logger = logging.getLogger(__name__)
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+_OWNER = f"{socket.gethostname()}:{os.getpid()}"
+
+# (file_path, original filename, db, progress) -> (fight_id, error)
+Processor = Callable[[Path, str, Session, Callable[[str], None]], tuple[Optional[int], Optional[str]]]
+
+# Set on enqueue so idle local workers pick the job up without waiting for a poll
+_wakeup = threading.Event()
+
+
+def new_session_id() -> str:
+    """Id grouping the jobs (and resulting fights) of one multi-file upload."""
+    return uuid.uuid4().hex
+
+
+def enqueue(
+    db: Session,
+    file_path: Path,
+    filename: Optional[str] = None,
+    session_id: Optional[str] = None,
+    commit: bool = True,
+) -> IngestJob:
+    """Add a queued job for an already saved upload (committed unless commit=False)."""
+    now = datetime.utcnow()
+    job = IngestJob(
+        id=uuid.uuid4().hex,
+        session_id=session_id,
+        filename=filename or file_path.name,
+        file_path=str(file_path),
+        status=STATUS_QUEUED,
+        stage=STATUS_QUEUED,
+        created_at=now,
+        updated_at=now,
+    )
+    db.add(job)
+    if commit:
+        db.commit()
+        _wakeup.set()
+    return job
+
+
+def reject(db: Session, filename: str, error: str, session_id: Optional[str] = None) -> IngestJob:
+    """Record a file refused before queueing, so it shows up in the session's per-file status."""
+    now = datetime.utcnow()
+    job = IngestJob(
+        id=uuid.uuid4().hex,
+        session_id=session_id,
+        filename=filename,
+        file_path="",
+        status=STATUS_FAILED,
+        stage=STATUS_FAILED,
+        error=error,
+        created_at=now,
+        updated_at=now,
+        finished_at=now,
+    )
+    db.add(job)
+    return job
+
+
+def notify_workers() -> None:
+    """Wake idle local workers after committing jobs added with commit=False."""
+    _wakeup.set()
+
+
+def get_job(db: Session, job_id: str) -> Optional[IngestJob]:
+    return db.get(IngestJob, job_id)
+
+
+def get_session_jobs(db: Session, session_id: str) -> list[IngestJob]:
+    """Jobs of one multi-file upload, in upload order."""
+    return list(
+        db.execute(
+            select(IngestJob).where(IngestJob.session_id == session_id).order_by(IngestJob.created_at, IngestJob.filename)
+        ).scalars()
+    )
+
+
+def requeue_stale(db: Session, stale_after_s: Optional[float] = None, max_attempts: Optional[int] = None) -> int:
+    """Requeue (or fail) running jobs whose worker stopped heartbeating. Returns the count."""
+    stale_after_s = settings.INGEST_JOB_STALE_S if stale_after_s is None else stale_after_s
+    max_attempts = settings.INGEST_JOB_MAX_ATTEMPTS if max_attempts is None else max_attempts
+    now = datetime.utcnow()
+    stale = (IngestJob.status == STATUS_RUNNING) & (IngestJob.updated_at < now - timedelta(seconds=stale_after_s))
+    failed = db.execute(
+        update(IngestJob)
+        .where(stale, IngestJob.attempts >= max_attempts)
+        .values(
+            status=STATUS_FAILED,
+            stage=STATUS_FAILED,
+            error=f"Worker stopped responding ({max_attempts} attempts)",
+            updated_at=now,
+            finished_at=now,
+        )
+    ).rowcount
+    requeued = db.execute(
+        update(IngestJob).where(stale).values(status=STATUS_QUEUED, stage=STATUS_QUEUED, owner=None, updated_at=now)
+    ).rowcount
+    db.commit()
+    return failed + requeued
+
+
+def claim_next(db: Session) -> Optional[IngestJob]:
+    """Take the oldest queued job for this process, or None when the queue is empty."""
+    while True:
+        job_id = db.execute(
+            select(IngestJob.id).where(IngestJob.status == STATUS_QUEUED).order_by(IngestJob.created_at).limit(1)
+        ).scalar()
+        if job_id is None:
+            return None
+        now = datetime.utcnow()
+        result = db.execute(
+            update(IngestJob)
+            .where(IngestJob.id == job_id, IngestJob.status == STATUS_QUEUED)
+            .values(
+                status=STATUS_RUNNING,
+                stage="starting",
+                owner=_OWNER,
+                attempts=IngestJob.attempts + 1,
+                updated_at=now,
+            )
+        )
+        db.commit()
+        if result.rowcount == 1:
+            return db.get(IngestJob, job_id)
+        # Another worker won the race; try the next one
+
+
+def _set_stage(session_factory: sessionmaker, job_id: str, stage: str) -> None:
+    with session_factory() as db:
+        db.execute(
+            update(IngestJob)
+            .where(IngestJob.id == job_id, IngestJob.owner == _OWNER)
+            .values(stage=stage, updated_at=datetime.utcnow())
+        )
+        db.commit()
+
+
+def _finish(db: Session, job_id: str, fight_id: Optional[int], error: Optional[str]) -> None:
+    now = datetime.utcnow()
+    status = STATUS_DONE if fight_id is not None else STATUS_FAILED
+    db.execute(
+        update(IngestJob)
+        .where(IngestJob.id == job_id, IngestJob.owner == _OWNER)
+        .values(status=status, stage=status, fight_id=fight_id, error=error, updated_at=now, finished_at=now)
+    )
+    db.commit()
+
+
+def process_upload(
+    file_path: Path, filename: str, db: Session, progress: Callable[[str], None]
+) -> tuple[Optional[int], Optional[str]]:
+    """Default processor: the synchronous ingestion pipeline."""
+    from app.services.logs_service import process_log_file_sync
+
+    fight, error = process_log_file_sync(file_path, db, progress=progress, original_name=filename)
+    return (fight.id if fight is not None else None), error
+
+
+def run_job(session_factory: sessionmaker, job: IngestJob, processor: Processor = process_upload) -> None:
+    """Process one claimed job in its own session and record the outcome."""
+    job_id = job.id
+    fight_id: Optional[int] = None
+    error: Optional[str] = None
+    with session_factory() as db:
+        try:
+            fight_id, error = processor(
+                Path(job.file_path), job.filename, db, lambda stage: _set_stage(session_factory, job_id, stage)
+            )
+        except Exception as e:
+            logger.exception("Ingest job %s failed", job_id)
+            db.rollback()
+            error = f"Failed to process log file: {e}"
+        if fight_id is None and error is None:
+            error = "Processing produced no fight"
+        _finish(db, job_id, fight_id, error)
+
+
+class IngestWorkerPool:
+    """Fixed number of worker threads draining the ingest_jobs queue."""
+
+    def __init__(
+        self,
+        session_factory: sessionmaker,
+        workers: Optional[int] = None,
+        processor: Processor = process_upload,
+        poll_interval_s: Optional[float] = None,
+    ) -> None:
+        self.session_factory = session_factory
+        self.workers = settings.INGEST_WORKERS if workers is None else workers
+        self.processor = processor
+        self.poll_interval_s = settings.INGEST_JOB_POLL_S if poll_interval_s is None else poll_interval_s
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._stop.clear()
+        with self.session_factory() as db:
+            requeued = requeue_stale(db)
+        if requeued:
+            logger.info("Requeued %d stale ingest jobs", requeued)
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._loop, name=f"ingest-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout_s: float = 5.0) -> None:
+        self._stop.set()
+        _wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout_s)
+        self._threads = []
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                with self.session_factory() as db:
+                    job = claim_next(db)
+                    if job is None:
+                        requeue_stale(db)
+                if job is not None:
+                    run_job(self.session_factory, job, self.processor)
+                    continue
+            except Exception:
+                logger.exception("Ingest worker error")
+            _wakeup.wait(self.poll_interval_s)
+            _wakeup.clear()
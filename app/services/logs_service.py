@@ -1,36 +1,203 @@
+import hashlib
 import os
-import shutil
+import uuid
+import zipfile
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
 from datetime import datetime
 
 import anyio
 from fastapi import UploadFile
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 
 from app.config import settings
-from app.db.models import Fight, FightContext, FightResult, PlayerStats
+from app.db import write_queue
+from app.db.base import SessionLocal
+from app.db.models import Fight, PlayerStats
 from app.integrations.dps_report import (
     DPSReportError,
-    ensure_log_imported,
+    ensure_log_cached,
 )
-from app.services.dps_mapping import map_dps_json_to_models
+from app.services import cpu_pool, squad_boons
+from app.services.fight_store import fight_row, insert_fight_rows, player_rows
+from app.services.mapping_sources import LOCAL_PARSER, map_fight
+from app.services.single_flight import SingleFlightTimeout, compute_content_hash, run_single_flight
 
 
 UPLOAD_DIR = Path("uploads")
 UPLOAD_DIR.mkdir(exist_ok=True)
+# Partial uploads live here until renamed into the store (same filesystem)
+UPLOAD_TMP_DIR = UPLOAD_DIR / ".tmp"
+UPLOAD_TMP_DIR.mkdir(exist_ok=True)
 
+LOG_EXTENSIONS = (".evtc", ".zevtc")
+ARCHIVE_EXTENSIONS = (".zip",)
+MAX_LOG_BYTES = 100 * 1024 * 1024
+MAX_ARCHIVE_BYTES = 1024 * 1024 * 1024
+UPLOAD_CHUNK_BYTES = 1024 * 1024
 
-async def save_upload_file(upload_file: UploadFile) -> Path:
-    """Save uploaded file to disk."""
-    timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-    filename = f"{timestamp}_{upload_file.filename}"
-    file_path = UPLOAD_DIR / filename
-    
-    with file_path.open("wb") as buffer:
-        shutil.copyfileobj(upload_file.file, buffer)
-    
-    return file_path
+EVTC_MAGIC = b"EVTC"
+ZIP_MAGIC = b"PK\x03\x04"
+# arcdps writes raw EVTC (.evtc) or a zip container (.zevtc); accept either for logs
+_MAGIC_BY_EXTENSION = {
+    ".evtc": (EVTC_MAGIC, ZIP_MAGIC),
+    ".zevtc": (ZIP_MAGIC, EVTC_MAGIC),
+    ".zip": (ZIP_MAGIC,),
+}
+_MAGIC_LEN = 4
+
+
+def _no_progress(stage: str) -> None:
+    pass
+
+
+class UploadRejected(ValueError):
+    """Raised while streaming an upload that breaks the extension/size/format rules."""
+
+
+@dataclass
+class StoredUpload:
+    path: Path
+    filename: str
+    sha256: str
+    size: int
+
+
+def _extension(filename: str) -> str:
+    return Path(filename).suffix.lower()
+
+
+def store_path(sha256: str, extension: str) -> Path:
+    """Content-addressed location of an upload: uploads/<2 hex>/<sha256><ext>."""
+    return UPLOAD_DIR / sha256[:2] / f"{sha256}{extension}"
+
+
+def stored_content_hash(file_path: Path) -> Optional[str]:
+    """SHA-256 encoded in a content-addressed store path, or None for other paths."""
+    stem = file_path.stem
+    if len(stem) == 64 and file_path.parent.name == stem[:2] and all(c in "0123456789abcdef" for c in stem):
+        return stem
+    return None
+
+
+class _UploadWriter:
+    """
+    Checks and hashes one incoming file chunk by chunk.
+
+    The extension is checked up front, the magic bytes as soon as the first bytes
+    arrive and the size limit on every chunk, so bad uploads stop early. Data goes
+    to a temp file that `commit` atomically renames into the store.
+    """
+
+    def __init__(self, filename: str, extensions: tuple[str, ...], max_bytes: int) -> None:
+        self.filename = filename
+        self.extension = _extension(filename)
+        if self.extension not in extensions:
+            raise UploadRejected(f"Invalid file extension. Must be {', '.join(extensions)}")
+        self.max_bytes = max_bytes
+        self.tmp_path = UPLOAD_TMP_DIR / f"{uuid.uuid4().hex}.part"
+        self.hasher = hashlib.sha256()
+        self.size = 0
+        self.head = b""
+
+    def check(self, chunk: bytes) -> None:
+        """Validate and hash the next chunk (call before writing it)."""
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise UploadRejected(f"File too large (max {self.max_bytes // (1024 * 1024)}MB)")
+        if len(self.head) < _MAGIC_LEN:
+            self.head += chunk[: _MAGIC_LEN - len(self.head)]
+            if len(self.head) == _MAGIC_LEN and not self.head.startswith(_MAGIC_BY_EXTENSION[self.extension]):
+                raise UploadRejected(f"Not a valid {self.extension} file (unrecognized header)")
+        self.hasher.update(chunk)
+
+    def finish(self) -> None:
+        if self.size == 0:
+            raise UploadRejected("File is empty")
+        if len(self.head) < _MAGIC_LEN:
+            raise UploadRejected(f"Not a valid {self.extension} file (too short)")
+
+    def commit(self, content_addressed: bool = True) -> StoredUpload:
+        sha256 = self.hasher.hexdigest()
+        path = self.tmp_path
+        if content_addressed:
+            path = store_path(sha256, self.extension)
+            path.parent.mkdir(exist_ok=True)
+            # Identical content may already be stored; replacing it is harmless
+            os.replace(self.tmp_path, path)
+        return StoredUpload(path=path, filename=self.filename, sha256=sha256, size=self.size)
+
+    def discard(self) -> None:
+        self.tmp_path.unlink(missing_ok=True)
+
+
+async def save_upload_file(
+    upload_file: UploadFile,
+    extensions: tuple[str, ...] = LOG_EXTENSIONS,
+    max_bytes: int = MAX_LOG_BYTES,
+    content_addressed: bool = True,
+) -> tuple[Optional[StoredUpload], Optional[str]]:
+    """
+    Stream an upload to disk without blocking the event loop.
+
+    Returns (stored_upload, None), or (None, error) as soon as the file breaks a
+    rule. With content_addressed=False the file stays at its temp path (the
+    caller deletes it, e.g. an archive about to be expanded).
+    """
+    try:
+        writer = _UploadWriter(Path(upload_file.filename or "upload").name, extensions, max_bytes)
+    except UploadRejected as e:
+        return None, str(e)
+    try:
+        async with await anyio.open_file(writer.tmp_path, "wb") as out:
+            while chunk := await upload_file.read(UPLOAD_CHUNK_BYTES):
+                writer.check(chunk)
+                await out.write(chunk)
+        writer.finish()
+        return writer.commit(content_addressed), None
+    except UploadRejected as e:
+        writer.discard()
+        return None, str(e)
+    except BaseException:
+        writer.discard()
+        raise
+
+
+def expand_log_archive(zip_path: Path, max_files: int) -> tuple[list[StoredUpload], list[tuple[str, str]]]:
+    """
+    Store the .evtc/.zevtc members of an uploaded .zip, then delete the zip.
+
+    Members go through the same streaming checks as direct uploads (the sizes in
+    the zip directory are not trusted). Returns (stored, [(member_name, error)]).
+    """
+    stored: list[StoredUpload] = []
+    rejected: list[tuple[str, str]] = []
+    try:
+        with zipfile.ZipFile(zip_path) as archive:
+            for info in archive.infolist():
+                name = Path(info.filename).name
+                if info.is_dir() or _extension(name) not in LOG_EXTENSIONS:
+                    continue
+                if len(stored) >= max_files:
+                    rejected.append((name, f"Too many logs in one upload (max {max_files})"))
+                    continue
+                writer = _UploadWriter(name, LOG_EXTENSIONS, MAX_LOG_BYTES)
+                try:
+                    with archive.open(info) as src, writer.tmp_path.open("wb") as out:
+                        while chunk := src.read(UPLOAD_CHUNK_BYTES):
+                            writer.check(chunk)
+                            out.write(chunk)
+                    writer.finish()
+                    stored.append(writer.commit())
+                except (UploadRejected, zipfile.BadZipFile) as e:
+                    writer.discard()
+                    rejected.append((name, str(e)))
+    except zipfile.BadZipFile:
+        rejected.append((zip_path.name, "Invalid zip archive"))
+    finally:
+        zip_path.unlink(missing_ok=True)
+    return stored, rejected
 
 
 def validate_evtc_file(file_path: Path) -> tuple[bool, Optional[str]]:
@@ -79,12 +246,69 @@ def is_wvw_log(file_path: Path) -> tuple[bool, Optional[str]]:
         return False, f"Failed to parse EVTC file: {str(e)}"
 
 
+def _import_via_dps_report(
+    file_path: Path,
+    db: Session,
+    progress: Callable[[str], None] = _no_progress,
+    original_name: Optional[str] = None,
+) -> tuple[Optional[int], Optional[str]]:
+    """
+    Upload/fetch EI JSON via dps.report, map it and persist the fight (returns its id).
+
+    This thread only does the network I/O and the DB write; decoding, mapping
+    and role detection run in the CPU pool and come back as column dicts.
+    """
+    try:
+        progress("uploading")
+        permalink, json_path = ensure_log_cached(file_path)
+        progress("mapping")
+        rows = cpu_pool.run_cpu(cpu_pool.map_ei_file, str(json_path))
+        fight = {
+            **rows["fight"],
+            "evtc_filename": original_name or file_path.name,
+            "upload_timestamp": datetime.utcnow(),
+            "dps_permalink": permalink,
+            "dps_json_path": str(json_path),
+        }
+
+        progress("saving")
+        return _save_fight(db, fight, rows["players"], rows["boon_uptimes"]), None
+    except DPSReportError as e:
+        db.rollback()
+        return None, f"dps.report error: {str(e)}"
+    except Exception as e:
+        db.rollback()
+        return None, f"Failed to process log via dps.report: {str(e)}"
+
+
+def _save_fight(db: Session, fight: dict, players: list[dict], boon_uptimes: list[dict]) -> int:
+    """
+    Insert a fight, its players and its squad boon uptimes and commit; returns the fight id.
+
+    On SQLite the write goes through the engine's single-writer queue (batched
+    with other ingestions' writes); otherwise it is committed on `db`.
+    """
+    writer = write_queue.for_engine(db.get_bind())
+    if writer is None:
+        fight_id = insert_fight_rows(db, fight, players, boon_uptimes)
+        db.commit()
+        return fight_id
+    return writer.run(lambda session: insert_fight_rows(session, fight, players, boon_uptimes))
+
+
 def process_log_file_sync(
     file_path: Path,
-    db: Session
+    db: Session,
+    progress: Callable[[str], None] = _no_progress,
+    original_name: Optional[str] = None,
 ) -> tuple[Optional[Fight], Optional[str]]:
     """
     Process uploaded log file and extract metrics (dps.report first).
+
+    Concurrent uploads of the same content are collapsed: the first one imports,
+    the others wait and get the same Fight back. `progress` receives the current
+    stage name (validating, uploading, mapping, saving, ...). `original_name` is
+    the name the log was uploaded under (store paths are content hashes).
     
     Returns:
         (fight_record, error_message)
@@ -92,6 +316,7 @@ def process_log_file_sync(
     from app.parser.evtc_parser import EVTCParseError  # legacy fallback only
     from app.services.roles_service_v2 import detect_player_role
 
+    progress("validating")
     is_valid, error = validate_evtc_file(file_path)
     if not is_valid:
         return None, error
@@ -99,168 +324,47 @@ def process_log_file_sync(
     # dps.report path (canonical)
     if settings.DPS_REPORT_ENABLED:
         try:
-            json_data, permalink, json_path = ensure_log_imported(file_path)
-            mapped = map_dps_json_to_models(json_data)
-            fight = mapped.fight
-            fight.evtc_filename = file_path.name
-            fight.upload_timestamp = datetime.utcnow()
-            fight.dps_permalink = permalink
-            fight.dps_json_path = str(json_path)
-
-            db.add(fight)
-            db.flush()  # get fight.id
-
-            for ps in mapped.player_stats:
-                ps.fight_id = fight.id
-                db.add(ps)
-                primary_role, role_tags = detect_player_role(ps)
-                ps.detected_role = primary_role
-
-            db.commit()
-            db.refresh(fight)
-            return fight, None
-        except DPSReportError as e:
-            return None, f"dps.report error: {str(e)}"
-        except Exception as e:
-            return None, f"Failed to process log via dps.report: {str(e)}"
+            content_hash = stored_content_hash(file_path) or compute_content_hash(file_path)
+            fight_id, error, _ = run_single_flight(
+                db.get_bind(), content_hash, lambda: _import_via_dps_report(file_path, db, progress, original_name)
+            )
+        except SingleFlightTimeout as e:
+            return None, str(e)
+        if error:
+            return None, error
+        return get_fight_by_id(db, fight_id), None
 
     # Legacy fallback (deprecated) using EVTCParser only if explicitly enabled
     try:
         from app.parser.evtc_parser import EVTCParser
 
+        progress("parsing")
         parser = EVTCParser(file_path)
         parser.parse()
         
         if not parser.is_wvw_log():
             return None, "Not a WvW log (npcid != 1). PvE/PvP logs are not supported."
         
-        start_time = parser.get_combat_start_time()
-        end_time = parser.get_combat_end_time()
-        duration_ms = None
-        if start_time is not None and end_time is not None:
-            duration_ms = end_time - start_time
-        
-        map_id = parser.get_map_id()
-        
-        player_count = sum(1 for agent in parser.agents if agent.is_player)
-        
-        fight = Fight(
-            evtc_filename=file_path.name,
-            upload_timestamp=datetime.utcnow(),
-            duration_ms=duration_ms,
-            context=FightContext.UNKNOWN,
-            result=FightResult.UNKNOWN,
-            ally_count=player_count,
-            enemy_count=0,
-            map_id=map_id,
+        progress("mapping")
+        # Same mapping engine as the dps.report path, fed by the local parser adapter
+        mapped = map_fight(parser, LOCAL_PARSER)
+        fight = mapped.fight
+        fight.evtc_filename = original_name or file_path.name
+        fight.upload_timestamp = datetime.utcnow()
+
+        for ps in mapped.player_stats:
+            primary_role, role_tags = detect_player_role(ps)
+            ps.detected_role = primary_role
+
+        progress("saving")
+        fight_id = _save_fight(
+            db,
+            fight_row(fight),
+            player_rows(mapped.player_stats),
+            squad_boons.summary_rows(fight.duration_ms, mapped.player_stats),
         )
         
-        db.add(fight)
-        db.commit()
-        db.refresh(fight)
-        
-        # Extract and save player stats
-        player_stats_data = parser.extract_player_stats()
-        
-        # Count allies and enemies
-        ally_count = sum(1 for stats in player_stats_data.values() if stats.is_ally)
-        enemy_count = sum(1 for stats in player_stats_data.values() if not stats.is_ally)
-        
-        # Update fight counts
-        fight.ally_count = ally_count
-        fight.enemy_count = enemy_count
-        
-        for addr, stats in player_stats_data.items():
-            # Calculate DPS
-            dps = 0.0
-            if duration_ms and duration_ms > 0:
-                dps = (stats.total_damage / duration_ms) * 1000  # Convert to per-second
-            
-            # Calculate boon uptimes as percentages
-            stability_uptime = 0.0
-            quickness_uptime = 0.0
-            aegis_uptime = 0.0
-            protection_uptime = 0.0
-            fury_uptime = 0.0
-            resistance_uptime = 0.0
-            alacrity_uptime = 0.0
-            vigor_uptime = 0.0
-            superspeed_uptime = 0.0
-            regeneration_uptime = 0.0
-            swiftness_uptime = 0.0
-            stealth_uptime = 0.0
-            might_avg = 0.0
-            
-            if duration_ms and duration_ms > 0:
-                stability_uptime = min(100.0, (stats.stability_uptime_ms / duration_ms) * 100)
-                quickness_uptime = min(100.0, (stats.quickness_uptime_ms / duration_ms) * 100)
-                aegis_uptime = min(100.0, (stats.aegis_uptime_ms / duration_ms) * 100)
-                protection_uptime = min(100.0, (stats.protection_uptime_ms / duration_ms) * 100)
-                fury_uptime = min(100.0, (stats.fury_uptime_ms / duration_ms) * 100)
-                resistance_uptime = min(100.0, (stats.resistance_uptime_ms / duration_ms) * 100)
-                alacrity_uptime = min(100.0, (stats.alacrity_uptime_ms / duration_ms) * 100)
-                vigor_uptime = min(100.0, (stats.vigor_uptime_ms / duration_ms) * 100)
-                superspeed_uptime = min(100.0, (stats.superspeed_uptime_ms / duration_ms) * 100)
-                regeneration_uptime = min(100.0, (stats.regeneration_uptime_ms / duration_ms) * 100)
-                swiftness_uptime = min(100.0, (stats.swiftness_uptime_ms / duration_ms) * 100)
-                stealth_uptime = min(100.0, (stats.stealth_uptime_ms / duration_ms) * 100)
-                
-                # Might: average stacks (time-weighted)
-                if stats.might_sample_count > 0 and duration_ms > 0:
-                    might_avg = min(25.0, stats.might_total_stacks / duration_ms)
-            
-            player_stat = PlayerStats(
-                fight_id=fight.id,
-                character_name=stats.character_name,
-                account_name=stats.account_name,
-                profession=str(stats.profession),
-                elite_spec=str(stats.elite_spec),
-                spec_name=stats.spec_name,
-                subgroup=stats.subgroup,
-                total_damage=stats.total_damage,
-                dps=dps,
-                downs=stats.downs,
-                kills=stats.kills,
-                deaths=stats.deaths,
-                damage_taken=stats.damage_taken,
-                stability_uptime=stability_uptime,
-                quickness_uptime=quickness_uptime,
-                aegis_uptime=aegis_uptime,
-                protection_uptime=protection_uptime,
-                fury_uptime=fury_uptime,
-                resistance_uptime=resistance_uptime,
-                alacrity_uptime=alacrity_uptime,
-                vigor_uptime=vigor_uptime,
-                superspeed_uptime=superspeed_uptime,
-                regeneration_uptime=regeneration_uptime,
-                swiftness_uptime=swiftness_uptime,
-                stealth_uptime=stealth_uptime,
-                might_uptime=might_avg,
-                strips_out=stats.strips,
-                cleanses=stats.cleanses,
-                cc_total=stats.cc_total,
-                healing_out=stats.healing_out,
-                barrier_out=stats.barrier_out,
-                stab_out_ms=stats.stab_out_ms,
-                aegis_out_ms=stats.aegis_out_ms,
-                protection_out_ms=stats.protection_out_ms,
-                quickness_out_ms=stats.quickness_out_ms,
-                alacrity_out_ms=stats.alacrity_out_ms,
-                resistance_out_ms=stats.resistance_out_ms,
-                might_out_stacks=stats.might_out_stacks,
-                fury_out_ms=stats.fury_out_ms,
-                regeneration_out_ms=stats.regeneration_out_ms,
-                vigor_out_ms=stats.vigor_out_ms,
-                superspeed_out_ms=stats.superspeed_out_ms,
-            )
-            db.add(player_stat)
-            
-            primary_role, role_tags = detect_player_role(player_stat)
-            player_stat.detected_role = primary_role
-        
-        db.commit()
-        
-        return fight, None
+        return get_fight_by_id(db, fight_id), None
         
     except EVTCParseError as e:
         return None, f"EVTC parse error: {str(e)}"
@@ -270,21 +374,31 @@ def process_log_file_sync(
 
 async def process_log_file(
     file_path: Path,
-    db: Session
-) -> tuple[Optional[Fight], Optional[str]]:
+    original_name: Optional[str] = None,
+) -> tuple[Optional[int], Optional[str]]:
     """
-    Process uploaded log file and extract metrics (async, dps.report-first).
+    Process uploaded log file in a worker thread (async, dps.report-first).
+
+    The worker opens its own session: a request-scoped Session must not be used
+    from another thread.
     
     Returns:
-        (fight_record, error_message)
+        (fight_id, error_message)
     """
-    # For async callers, run the sync pipeline in a worker to avoid await on sync functions
-    return await anyio.to_thread.run_sync(process_log_file_sync, file_path, db)
+    def _run() -> tuple[Optional[int], Optional[str]]:
+        with SessionLocal() as db:
+            fight, error = process_log_file_sync(file_path, db, original_name=original_name)
+            return (fight.id if fight is not None else None), error
+
+    return await anyio.to_thread.run_sync(_run)
 
 
-def get_fight_by_id(db: Session, fight_id: int) -> Optional[Fight]:
-    """Get fight by ID."""
-    return db.query(Fight).filter(Fight.id == fight_id).first()
+def get_fight_by_id(db: Session, fight_id: int, with_boon_timelines: bool = False) -> Optional[Fight]:
+    """Get fight by ID (optionally with players and their deferred boon timelines preloaded)."""
+    query = db.query(Fight).filter(Fight.id == fight_id)
+    if with_boon_timelines:
+        query = query.options(selectinload(Fight.player_stats).undefer(PlayerStats.boon_timelines))
+    return query.first()
 
 
 def get_recent_fights(db: Session, limit: int = 20) -> list[Fight]:
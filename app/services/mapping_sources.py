@@ -0,0 +1,140 @@
+"""
+Source adapters for the mapping engine (mapping_core.map_ei_json).
+
+Each ingestion path produces a different raw input. An adapter normalizes it into
+the EI JSON shape the engine reads, so the engine's lookups, fallbacks and
+optimizations apply the same way to every path:
+
+- DPS_REPORT: dps.report getJson (already EI JSON).
+- EI_CLI: JSON written by a local Elite Insights CLI run.
+- LOCAL_PARSER: the legacy in-process EVTCParser, converted to the EI layout.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Dict
+
+from app.services.mapping_core import BOON_IDS, MappedFight, map_ei_json
+
+if TYPE_CHECKING:
+    from app.parser.evtc_parser import EVTCParser, PlayerStatsData
+
+
+class MappingSource:
+    """Normalizes one kind of raw input into EI JSON."""
+
+    name = "ei_json"
+
+    def to_ei_json(self, raw: Any) -> Dict[str, Any]:
+        return raw
+
+    def finish(self, mapped: MappedFight) -> MappedFight:
+        """Source-specific column adjustments after the engine ran."""
+        return mapped
+
+
+class DpsReportSource(MappingSource):
+    name = "dps_report"
+
+
+class EICliSource(MappingSource):
+    name = "ei_cli"
+
+    def to_ei_json(self, raw: Dict[str, Any]) -> Dict[str, Any]:
+        # Older CLI builds report the duration as an integer `fightDuration` (ms)
+        if "durationMS" not in raw and isinstance(raw.get("fightDuration"), (int, float)):
+            return {**raw, "durationMS": raw["fightDuration"]}
+        return raw
+
+
+# PlayerStatsData attribute prefixes for the boons the parser tracks
+_PARSER_UPTIME_BOONS = (
+    "stability", "quickness", "aegis", "protection", "fury", "resistance", "alacrity",
+    "resolution", "regeneration", "vigor", "superspeed", "swiftness", "stealth",
+)
+_PARSER_OUT_FIELDS = {
+    "stability": "stab_out_ms",
+    "aegis": "aegis_out_ms",
+    "protection": "protection_out_ms",
+    "quickness": "quickness_out_ms",
+    "alacrity": "alacrity_out_ms",
+    "resistance": "resistance_out_ms",
+    "fury": "fury_out_ms",
+    "regeneration": "regeneration_out_ms",
+    "vigor": "vigor_out_ms",
+    "superspeed": "superspeed_out_ms",
+    "might": "might_out_stacks",
+}
+
+
+class LocalParserSource(MappingSource):
+    """Takes a parsed EVTCParser (parse() already called)."""
+
+    name = "local_parser"
+
+    @staticmethod
+    def _player(stats: "PlayerStatsData", duration_ms: int) -> Dict[str, Any]:
+        uptimes = []
+        if duration_ms > 0:
+            for boon in _PARSER_UPTIME_BOONS:
+                active_ms = getattr(stats, f"{boon}_uptime_ms", 0)
+                if active_ms > 0:
+                    uptimes.append({"id": BOON_IDS[boon], "buffData": [{"uptime": active_ms / duration_ms * 100.0}]})
+            if stats.might_sample_count > 0 and stats.might_total_stacks > 0:
+                might_avg = min(25.0, stats.might_total_stacks / duration_ms)
+                uptimes.append({"id": BOON_IDS["might"], "buffData": [{"uptime": might_avg}]})
+        generations = [
+            # EI reports generation in seconds (stack-seconds for might)
+            {"id": BOON_IDS[boon], "buffData": [{"generation": getattr(stats, field) / 1000.0}]}
+            for boon, field in _PARSER_OUT_FIELDS.items()
+            if getattr(stats, field, 0)
+        ]
+        return {
+            "name": stats.character_name or "Unknown",
+            "account": stats.account_name or None,
+            "group": stats.subgroup,
+            "profession": stats.profession_name or str(stats.profession),
+            "eliteSpec": stats.elite_spec_name or None,
+            "dpsAll": [{"damage": stats.total_damage}],
+            "statsAll": [{"downed": stats.downs, "killed": stats.kills}],
+            "defenses": [{"damageTaken": stats.damage_taken, "deadCount": stats.deaths, "breakbarDamage": stats.cc_total}],
+            "support": [
+                {
+                    "condiCleanse": stats.cleanses,
+                    "boonStrips": stats.strips,
+                    "healing": stats.healing_out,
+                    "barrier": stats.barrier_out,
+                }
+            ],
+            "buffUptimes": uptimes,
+            "buffGenerations": generations,
+        }
+
+    def finish(self, mapped: MappedFight) -> MappedFight:
+        # Parser-ingested fights have always stored damage per second in `dps`
+        # (the EI paths keep the total damage there)
+        duration_ms = mapped.fight.duration_ms or 0
+        for ps in mapped.player_stats:
+            ps.dps = ps.total_damage / duration_ms * 1000.0 if duration_ms > 0 else 0.0
+        return mapped
+
+    def to_ei_json(self, parser: "EVTCParser") -> Dict[str, Any]:
+        start, end = parser.get_combat_start_time(), parser.get_combat_end_time()
+        duration_ms = (end - start) if start is not None and end is not None else 0
+        players = list(parser.extract_player_stats().values())
+        return {
+            "durationMS": duration_ms,
+            "mapID": parser.get_map_id(),
+            "players": [self._player(p, duration_ms) for p in players if p.is_ally],
+            "enemyPlayers": [self._player(p, duration_ms) for p in players if not p.is_ally],
+        }
+
+
+DPS_REPORT = DpsReportSource()
+EI_CLI = EICliSource()
+LOCAL_PARSER = LocalParserSource()
+SOURCES: Dict[str, MappingSource] = {s.name: s for s in (DPS_REPORT, EI_CLI, LOCAL_PARSER)}
+
+
+def map_fight(raw: Any, source: MappingSource) -> MappedFight:
+    """Normalize `raw` with the source adapter and run the shared engine."""
+    return source.finish(map_ei_json(source.to_ei_json(raw)))
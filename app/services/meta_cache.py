@@ -0,0 +1,253 @@
+"""
+META result cache, shared by all uvicorn workers through a small SQLite file.
+
+META results only change when fights are ingested or the rollups are rebuilt,
+and both replace a global data version (the "meta" row of `data_versions`, a
+random token) in the same transaction. Ingestion only marks the session
+(`bump_data_version_on_commit`): the token is written once when it commits,
+so a write-queue batch of fights costs one version write. Each cached result
+is stored with the version it was computed at:
+
+- current version: served as is, from process memory or else the cache file;
+- older version: still served (stale-while-revalidate) while one background
+  refresh recomputes it. A lease in the cache file keeps the other workers from
+  recomputing the same key at the same time;
+- no entry yet: computed inline and stored.
+
+So a request costs one data-version lookup plus a dict or primary-key read.
+Values must be JSON-serialisable; callers get the decoded JSON back and must
+not mutate it.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from sqlalchemy import Column, Float, MetaData, String, Table, Text, create_engine, event, insert, or_, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.db.base import configure_sqlite
+from app.db.models import DataVersion
+
+logger = logging.getLogger(__name__)
+
+META_DATA_VERSION = "meta"
+
+Compute = Callable[[Session], Any]
+
+
+def data_version(db: Session, name: str = META_DATA_VERSION) -> str:
+    """Current version token ("" until the data first changes)."""
+    return db.execute(select(DataVersion.version).where(DataVersion.name == name)).scalar() or ""
+
+
+def bump_data_version(db: Session, name: str = META_DATA_VERSION) -> str:
+    """Replace the version token in the current transaction; return the new one."""
+    version = uuid.uuid4().hex
+    now = datetime.utcnow()
+    updated = db.execute(
+        update(DataVersion).where(DataVersion.name == name).values(version=version, updated_at=now)
+    ).rowcount
+    if not updated:
+        db.execute(insert(DataVersion).values(name=name, version=version, updated_at=now))
+    return version
+
+
+# Session.info key: names of the data versions to replace when the session commits
+_PENDING_BUMPS = "pending_data_version_bumps"
+
+
+def bump_data_version_on_commit(db: Session, name: str = META_DATA_VERSION) -> None:
+    """Replace the version token once, when the session's current transaction commits."""
+    db.info.setdefault(_PENDING_BUMPS, set()).add(name)
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_pending_versions(session: Session) -> None:
+    # Also fires for SAVEPOINT commits (write-queue items): wait for the real one
+    if session.in_nested_transaction():
+        return
+    for name in sorted(session.info.pop(_PENDING_BUMPS, ())):
+        bump_data_version(session, name)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _drop_pending_versions(session: Session, transaction) -> None:
+    # Rolled back: nothing changed
+    if transaction.parent is None:
+        session.info.pop(_PENDING_BUMPS, None)
+
+
+_store_metadata = MetaData()
+_entries = Table(
+    "meta_cache",
+    _store_metadata,
+    Column("key", String, primary_key=True),
+    Column("version", String, nullable=False),
+    Column("value", Text, nullable=False),
+    Column("computed_at", Float, nullable=False),
+    Column("refreshing_until", Float, nullable=True),
+)
+
+
+@dataclass
+class CacheEntry:
+    version: str
+    value: Any
+
+
+class ResultCache:
+    """Version-checked result cache: process memory in front of a shared SQLite file."""
+
+    def __init__(self, path: Path, refresh_lease_s: float = 60.0) -> None:
+        self.path = path
+        self.refresh_lease_s = refresh_lease_s
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self._memory: dict[str, CacheEntry] = {}
+        self._refreshing: set[str] = set()
+        self._lock = threading.Lock()
+        self._store: Optional[Engine] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="meta-cache")
+
+    def get(self, db: Session, key: str, compute: Compute) -> Any:
+        """Cached `compute(db)` for the current data version (possibly one version behind while refreshing)."""
+        version = data_version(db)
+        entry = self._memory.get(key)
+        if entry is None or entry.version != version:
+            # Another worker may have refreshed it already
+            entry = self._load(key) or entry
+        if entry is None:
+            self.misses += 1
+            return self._save(key, version, compute(db))
+        if entry.version == version:
+            self.hits += 1
+        else:
+            self.stale_hits += 1
+            self._schedule_refresh(db.get_bind(), key, compute)
+        return entry.value
+
+    def join(self) -> None:
+        """Wait for the background refreshes scheduled so far."""
+        self._executor.submit(lambda: None).result()
+
+    def clear(self) -> None:
+        """Drop every entry, in memory and in the cache file."""
+        self._memory.clear()
+        with self._engine().begin() as conn:
+            conn.execute(_entries.delete())
+
+    def _engine(self) -> Engine:
+        with self._lock:
+            if self._store is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                store = create_engine(f"sqlite:///{self.path}", connect_args={"check_same_thread": False})
+                configure_sqlite(store)
+                _store_metadata.create_all(store)
+                self._store = store
+            return self._store
+
+    def _load(self, key: str) -> Optional[CacheEntry]:
+        try:
+            with self._engine().connect() as conn:
+                row = conn.execute(select(_entries.c.version, _entries.c.value).where(_entries.c.key == key)).first()
+        except SQLAlchemyError:
+            logger.warning("META cache read failed for %s", key, exc_info=True)
+            return None
+        if row is None:
+            return None
+        entry = self._memory[key] = CacheEntry(row.version, json.loads(row.value))
+        return entry
+
+    def _save(self, key: str, version: str, value: Any) -> Any:
+        encoded = json.dumps(value)
+        entry = self._memory[key] = CacheEntry(version, json.loads(encoded))
+        stmt = sqlite_insert(_entries).values(
+            key=key, version=version, value=encoded, computed_at=time.time(), refreshing_until=None
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["key"],
+            set_={
+                "version": stmt.excluded.version,
+                "value": stmt.excluded.value,
+                "computed_at": stmt.excluded.computed_at,
+                "refreshing_until": None,
+            },
+        )
+        try:
+            with self._engine().begin() as conn:
+                conn.execute(stmt)
+        except SQLAlchemyError:
+            logger.warning("META cache write failed for %s", key, exc_info=True)
+        return entry.value
+
+    def _claim_refresh(self, key: str) -> bool:
+        """Take the cross-worker refresh lease for key; False if another worker holds it."""
+        now = time.time()
+        with self._engine().begin() as conn:
+            return (
+                conn.execute(
+                    update(_entries)
+                    .where(
+                        _entries.c.key == key,
+                        or_(_entries.c.refreshing_until.is_(None), _entries.c.refreshing_until < now),
+                    )
+                    .values(refreshing_until=now + self.refresh_lease_s)
+                ).rowcount
+                == 1
+            )
+
+    def _schedule_refresh(self, bind: Engine, key: str, compute: Compute) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        self._executor.submit(self._refresh, bind, key, compute)
+
+    def _refresh(self, bind: Engine, key: str, compute: Compute) -> None:
+        try:
+            if not self._claim_refresh(key):
+                return
+            with Session(bind=bind) as db:
+                # Read the version first: a fight ingested meanwhile leaves the entry stale
+                version = data_version(db)
+                value = compute(db)
+            self._save(key, version, value)
+        except Exception:
+            logger.exception("META cache refresh failed for %s", key)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+
+_cache: Optional[ResultCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> ResultCache:
+    """The process-wide cache on META_CACHE_PATH (created on first use)."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResultCache(settings.META_CACHE_PATH, settings.META_CACHE_REFRESH_LEASE_S)
+        return _cache
+
+
+def cached(db: Session, key: str, compute: Compute) -> Any:
+    """`compute(db)` through the shared cache (called directly when META_CACHE_ENABLED is off)."""
+    if not settings.META_CACHE_ENABLED:
+        return compute(db)
+    return get_cache().get(db, key, compute)
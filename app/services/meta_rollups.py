@@ -0,0 +1,268 @@
+"""
+Daily META rollups, maintained at ingest.
+
+The META pages only need per-context totals and (spec, role) breakdowns, so
+instead of aggregating player_stats on every request they read three small
+tables, one row per (context, day, key):
+
+- meta_daily_totals: fights, wins/losses/draws and duration;
+- meta_daily_spec_roles: player appearances per (elite_spec, detected_role),
+  with the result and duration of their fights and summed key stats;
+- meta_daily_spec_results: allied appearances per elite_spec and their fights'
+  results, for spec win rates (spec_winrates);
+- meta_daily_players: characters seen, for distinct player counts.
+
+The day is the date of the fight's start_time, else of its upload_timestamp.
+
+`add_fight` upserts a new fight's rows in the caller's transaction.
+`insert_fight_rows` calls it, so a fight and its rollup rows commit together.
+Anything that rewrites stored rows in place (remap, role recalculation) calls
+`rebuild` afterwards, which recomputes every table with INSERT ... SELECT.
+Both also replace the META data version, which invalidates meta_cache
+(`add_fight` once per commit, however many fights it holds).
+"""
+from __future__ import annotations
+
+import logging
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, Optional
+
+from sqlalchemy import case, delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.db.models import (
+    Fight,
+    FightResult,
+    MetaDailyPlayer,
+    MetaDailySpecResult,
+    MetaDailySpecRole,
+    MetaDailyTotals,
+    PlayerStats,
+)
+from app.services.meta_cache import bump_data_version, bump_data_version_on_commit
+
+logger = logging.getLogger(__name__)
+
+# PlayerStats columns summed into meta_daily_spec_roles.sum_<column>
+SPEC_ROLE_SUMS = (
+    "total_damage",
+    "dps",
+    "downs",
+    "kills",
+    "deaths",
+    "damage_taken",
+    "strips_out",
+    "cleanses",
+    "healing_out",
+    "barrier_out",
+    "stab_out_ms",
+    "active_ms",
+)
+
+# Key value stored for a missing elite_spec/detected_role
+NO_VALUE = ""
+
+ROLLUP_MODELS = (MetaDailyTotals, MetaDailySpecRole, MetaDailySpecResult, MetaDailyPlayer)
+
+
+def fight_day(start_time: Optional[datetime], upload_timestamp: Optional[datetime]) -> date:
+    """Rollup day of a fight."""
+    moment = start_time or upload_timestamp or datetime.utcnow()
+    return moment.date()
+
+
+def _outcome(result: Optional[FightResult]) -> Dict[str, int]:
+    return {
+        "wins": int(result == FightResult.VICTORY),
+        "losses": int(result == FightResult.DEFEAT),
+        "draws": int(result == FightResult.DRAW),
+    }
+
+
+def add_fight(db: Session, fight: Any, players: Iterable[Dict[str, Any]]) -> None:
+    """
+    Add one newly inserted fight to the rollups, in the current transaction.
+
+    `fight` is the stored fights row (anything with context, result, duration_ms,
+    start_time and upload_timestamp attributes); `players` are its player column dicts.
+    """
+    context = fight.context
+    day = fight_day(fight.start_time, fight.upload_timestamp)
+    duration_ms = fight.duration_ms or 0
+    outcome = _outcome(fight.result)
+
+    spec_roles: Dict[tuple, Dict[str, Any]] = {}
+    spec_results: Dict[str, Dict[str, Any]] = {}
+    appearances: Dict[str, int] = defaultdict(int)
+    for player in players:
+        key = (player.get("elite_spec") or NO_VALUE, player.get("detected_role") or NO_VALUE)
+        row = spec_roles.get(key)
+        if row is None:
+            row = spec_roles[key] = {
+                "context": context,
+                "day": day,
+                "elite_spec": key[0],
+                "detected_role": key[1],
+                "players": 0,
+                "wins": 0,
+                "losses": 0,
+                "draws": 0,
+                "duration_ms": 0,
+                **{f"sum_{col}": 0 for col in SPEC_ROLE_SUMS},
+            }
+        row["players"] += 1
+        for name, value in outcome.items():
+            row[name] += value
+        row["duration_ms"] += duration_ms
+        for col in SPEC_ROLE_SUMS:
+            row[f"sum_{col}"] += player.get(col) or 0
+        appearances[player["character_name"]] += 1
+        if player.get("is_ally", True):
+            result = spec_results.setdefault(
+                key[0],
+                {"context": context, "day": day, "elite_spec": key[0], "fights": 0, "wins": 0, "losses": 0, "draws": 0},
+            )
+            result["fights"] += 1
+            for name, value in outcome.items():
+                result[name] += value
+
+    _upsert(db, MetaDailyTotals, [{"context": context, "day": day, "fights": 1, "duration_ms": duration_ms, **outcome}])
+    _upsert(db, MetaDailySpecRole, list(spec_roles.values()))
+    _upsert(db, MetaDailySpecResult, list(spec_results.values()))
+    _upsert(
+        db,
+        MetaDailyPlayer,
+        [
+            {"context": context, "day": day, "character_name": name, "appearances": count}
+            for name, count in appearances.items()
+        ],
+    )
+    bump_data_version_on_commit(db)
+
+
+# (dialect, table name) -> INSERT ... ON CONFLICT DO UPDATE statement, built once
+_upsert_statements: Dict[tuple, Any] = {}
+
+
+def _upsert_statement(dialect: str, table):
+    stmt = _upsert_statements.get((dialect, table.name))
+    if stmt is None:
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        keys = [c.name for c in table.primary_key.columns]
+        stmt = dialect_insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=keys,
+            set_={c.name: c + stmt.excluded[c.name] for c in table.columns if c.name not in keys},
+        )
+        _upsert_statements[(dialect, table.name)] = stmt
+    return stmt
+
+
+def _upsert(db: Session, model, rows: list[Dict[str, Any]]) -> None:
+    """Insert rows, adding their counters to any existing row with the same key."""
+    if not rows:
+        return
+    table = model.__table__
+    dialect = db.get_bind().dialect.name
+    if dialect in {"sqlite", "postgresql"}:
+        db.execute(_upsert_statement(dialect, table), rows)
+        return
+    keys = [c.name for c in table.primary_key.columns]
+    counters = [c.name for c in table.columns if c.name not in keys]
+    for row in rows:
+        updated = db.execute(
+            update(table)
+            .where(*(table.c[key] == row[key] for key in keys))
+            .values({col: table.c[col] + row[col] for col in counters})
+        ).rowcount
+        if not updated:
+            db.execute(insert(table), row)
+
+
+def _count_if(condition):
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+def rebuild(db: Session) -> Dict[str, int]:
+    """
+    Recompute every rollup table from fights/player_stats (not committed).
+
+    Returns the number of rows written per table.
+    """
+    day = func.date(func.coalesce(Fight.start_time, Fight.upload_timestamp))
+    wins = _count_if(Fight.result == FightResult.VICTORY)
+    losses = _count_if(Fight.result == FightResult.DEFEAT)
+    draws = _count_if(Fight.result == FightResult.DRAW)
+    duration = func.coalesce(func.sum(Fight.duration_ms), 0)
+    spec = func.coalesce(PlayerStats.elite_spec, NO_VALUE)
+    role = func.coalesce(PlayerStats.detected_role, NO_VALUE)
+
+    for model in ROLLUP_MODELS:
+        db.execute(delete(model))
+
+    db.execute(
+        insert(MetaDailyTotals).from_select(
+            ["context", "day", "fights", "wins", "losses", "draws", "duration_ms"],
+            select(Fight.context, day, func.count(Fight.id), wins, losses, draws, duration).group_by(
+                Fight.context, day
+            ),
+        )
+    )
+    db.execute(
+        insert(MetaDailySpecRole).from_select(
+            ["context", "day", "elite_spec", "detected_role", "players", "wins", "losses", "draws", "duration_ms"]
+            + [f"sum_{col}" for col in SPEC_ROLE_SUMS],
+            select(
+                Fight.context,
+                day,
+                spec,
+                role,
+                func.count(PlayerStats.id),
+                wins,
+                losses,
+                draws,
+                duration,
+                *(func.coalesce(func.sum(getattr(PlayerStats, col)), 0) for col in SPEC_ROLE_SUMS),
+            )
+            .join(Fight, Fight.id == PlayerStats.fight_id)
+            .group_by(Fight.context, day, spec, role),
+        )
+    )
+    db.execute(
+        insert(MetaDailySpecResult).from_select(
+            ["context", "day", "elite_spec", "fights", "wins", "losses", "draws"],
+            select(Fight.context, day, spec, func.count(PlayerStats.id), wins, losses, draws)
+            .join(Fight, Fight.id == PlayerStats.fight_id)
+            .where(PlayerStats.is_ally.is_(True))
+            .group_by(Fight.context, day, spec),
+        )
+    )
+    db.execute(
+        insert(MetaDailyPlayer).from_select(
+            ["context", "day", "character_name", "appearances"],
+            select(Fight.context, day, PlayerStats.character_name, func.count(PlayerStats.id))
+            .join(Fight, Fight.id == PlayerStats.fight_id)
+            .group_by(Fight.context, day, PlayerStats.character_name),
+        )
+    )
+    bump_data_version(db)
+    return {
+        model.__tablename__: db.execute(select(func.count()).select_from(model)).scalar_one()
+        for model in ROLLUP_MODELS
+    }
+
+
+def ensure_built(db: Session) -> bool:
+    """Rebuild and commit when there are fights but an empty rollup table (new tables). Returns True if rebuilt."""
+    if all(db.execute(select(model.day).limit(1)).first() is not None for model in ROLLUP_MODELS):
+        return False
+    if db.execute(select(Fight.id).limit(1)).first() is None:
+        return False
+    logger.info("Building META rollups from existing fights")
+    rebuild(db)
+    db.commit()
+    return True
@@ -1,73 +1,81 @@
+from collections import defaultdict
+from datetime import date
 from typing import Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, select
 
-from app.db.models import Fight, PlayerStats, FightContext, FightResult
+from app.db.models import FightContext, MetaDailyPlayer, MetaDailySpecRole, MetaDailyTotals
+from app.services import meta_cache
+from app.services.meta_rollups import NO_VALUE
+from app.services.spec_winrates import get_spec_winrates
 
 
-def get_meta_stats(db: Session, context: FightContext) -> dict:
+def _in_days(model, since: Optional[date], until: Optional[date]) -> list:
+    conditions = []
+    if since is not None:
+        conditions.append(model.day >= since)
+    if until is not None:
+        conditions.append(model.day <= until)
+    return conditions
+
+
+def get_meta_stats(
+    db: Session, context: FightContext, since: Optional[date] = None, until: Optional[date] = None
+) -> dict:
     """
     Get META statistics for a specific context.
     
-    Returns aggregated stats for fights in the given context.
+    Returns aggregated stats for fights in the given context, read from the
+    daily rollup tables (meta_rollups) rather than from fights/player_stats, so
+    the cost depends on the number of days and specs, not on the archive size.
+    `since`/`until` restrict it to fights on those days (inclusive).
     """
-    fights = db.query(Fight).filter(Fight.context == context).all()
-    
-    total_fights = len(fights)
-    total_wins = sum(1 for f in fights if f.result == FightResult.VICTORY)
-    total_losses = sum(1 for f in fights if f.result == FightResult.DEFEAT)
-    total_draws = sum(1 for f in fights if f.result == FightResult.DRAW)
-    
-    total_duration_ms = sum(f.duration_ms for f in fights if f.duration_ms)
-    
-    fight_ids = [f.id for f in fights]
-    
-    unique_players = 0
-    if fight_ids:
-        unique_players = (
-            db.query(func.count(func.distinct(PlayerStats.character_name)))
-            .filter(PlayerStats.fight_id.in_(fight_ids))
-            .scalar()
-        ) or 0
+    totals = db.execute(
+        select(
+            func.coalesce(func.sum(MetaDailyTotals.fights), 0),
+            func.coalesce(func.sum(MetaDailyTotals.wins), 0),
+            func.coalesce(func.sum(MetaDailyTotals.losses), 0),
+            func.coalesce(func.sum(MetaDailyTotals.draws), 0),
+            func.coalesce(func.sum(MetaDailyTotals.duration_ms), 0),
+        ).where(MetaDailyTotals.context == context, *_in_days(MetaDailyTotals, since, until))
+    ).one()
+    total_fights, total_wins, total_losses, total_draws, total_duration_ms = totals
+    unique_players = db.execute(
+        select(func.count(func.distinct(MetaDailyPlayer.character_name))).where(
+            MetaDailyPlayer.context == context, *_in_days(MetaDailyPlayer, since, until)
+        )
+    ).scalar()
     
     top_specs = []
     spec_winrates = {}
     role_distribution = {}
     
-    if fight_ids:
-        spec_counts = (
-            db.query(
-                PlayerStats.elite_spec,
-                func.count(PlayerStats.id).label('count')
-            )
-            .filter(PlayerStats.fight_id.in_(fight_ids))
-            .filter(PlayerStats.elite_spec.isnot(None))
-            .group_by(PlayerStats.elite_spec)
-            .order_by(func.count(PlayerStats.id).desc())
-            .limit(10)
-            .all()
-        )
+    if total_fights:
+        pair_counts = db.execute(
+            select(MetaDailySpecRole.elite_spec, MetaDailySpecRole.detected_role, func.sum(MetaDailySpecRole.players))
+            .where(MetaDailySpecRole.context == context, *_in_days(MetaDailySpecRole, since, until))
+            .group_by(MetaDailySpecRole.elite_spec, MetaDailySpecRole.detected_role)
+        ).all()
+        
+        spec_counts: dict[str, int] = defaultdict(int)
+        role_counts: dict[str, int] = defaultdict(int)
+        for spec, role, count in pair_counts:
+            if spec != NO_VALUE:
+                spec_counts[spec] += count
+            if role != NO_VALUE:
+                role_counts[role] += count
         
         top_specs = [
             {"spec": spec, "count": count}
-            for spec, count in spec_counts
+            for spec, count in sorted(spec_counts.items(), key=lambda item: (-item[1], item[0]))[:10]
         ]
         
-        role_counts = (
-            db.query(
-                PlayerStats.detected_role,
-                func.count(PlayerStats.id).label('count')
-            )
-            .filter(PlayerStats.fight_id.in_(fight_ids))
-            .filter(PlayerStats.detected_role.isnot(None))
-            .group_by(PlayerStats.detected_role)
-            .all()
-        )
-        
         role_distribution = {
-            role: count
-            for role, count in role_counts
+            role: role_counts[role]
+            for role in sorted(role_counts)
         }
+        
+        spec_winrates = get_spec_winrates(db, [context], since, until).get(context, {})
     
     return {
         "context": context,
@@ -75,7 +83,7 @@ def get_meta_stats(db: Session, context: FightContext) -> dict:
         "total_wins": total_wins,
         "total_losses": total_losses,
         "total_draws": total_draws,
-        "unique_players": unique_players,
+        "unique_players": unique_players or 0,
         "total_duration_ms": total_duration_ms,
         "top_specs": top_specs,
         "spec_winrates": spec_winrates,
@@ -84,16 +92,42 @@ def get_meta_stats(db: Session, context: FightContext) -> dict:
 
 
 def get_all_contexts_summary(db: Session) -> dict:
-    """Get summary stats for all contexts."""
+    """Get summary stats for all contexts (one grouped query over the daily totals)."""
     contexts = [FightContext.ZERG, FightContext.GUILD_RAID, FightContext.ROAM]
     
+    rows = db.execute(
+        select(
+            MetaDailyTotals.context,
+            func.sum(MetaDailyTotals.fights),
+            func.sum(MetaDailyTotals.wins),
+            func.sum(MetaDailyTotals.losses),
+        )
+        .where(MetaDailyTotals.context.in_(contexts))
+        .group_by(MetaDailyTotals.context)
+    ).all()
+    counts = {context: (fights, wins, losses) for context, fights, wins, losses in rows}
+    
     summary = {}
     for context in contexts:
-        stats = get_meta_stats(db, context)
+        fights, wins, losses = counts.get(context, (0, 0, 0))
         summary[context.value] = {
-            "fights": stats["total_fights"],
-            "wins": stats["total_wins"],
-            "losses": stats["total_losses"],
+            "fights": fights,
+            "wins": wins,
+            "losses": losses,
         }
     
     return summary
+
+
+def get_meta_stats_cached(
+    db: Session, context: FightContext, since: Optional[date] = None, until: Optional[date] = None
+) -> dict:
+    """`get_meta_stats` through the shared META cache (see meta_cache)."""
+    key = f"meta_stats:{context.value}:{since or ''}:{until or ''}"
+    stats = meta_cache.cached(db, key, lambda session: get_meta_stats(session, context, since, until))
+    return {**stats, "context": context}
+
+
+def get_all_contexts_summary_cached(db: Session) -> dict:
+    """`get_all_contexts_summary` through the shared META cache."""
+    return meta_cache.cached(db, "contexts_summary", get_all_contexts_summary)
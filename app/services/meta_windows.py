@@ -0,0 +1,90 @@
+"""
+Time windows for the META pages.
+
+The rollups are bucketed per day, so a window is only a day range: any of them
+is answered by summing the bucket rows in that range.
+
+- "all": everything;
+- "7d", "30d", "90d": the last N days, today included (UTC, like the buckets);
+- "patch-<slug>": from a balance patch's start day to the day before the next
+  one. Patches are read from META_PATCHES_FILE, a JSON list of
+  {"name": "...", "start": "YYYY-MM-DD"}; without that file there are none.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import re
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+ALL_TIME = "all"
+RECENT_DAYS = (7, 30, 90)
+
+_patches_cache: dict[Path, tuple[float, list[tuple[str, date]]]] = {}
+
+
+@dataclass(frozen=True)
+class MetaWindow:
+    key: str
+    label: str
+    since: Optional[date] = None
+    until: Optional[date] = None
+
+
+def _slug(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")
+
+
+def load_patches(path: Optional[Path] = None) -> list[tuple[str, date]]:
+    """(name, start day) of each configured patch, oldest first; re-read when the file changes."""
+    path = path or settings.META_PATCHES_FILE
+    try:
+        mtime = path.stat().st_mtime
+    except OSError:
+        return []
+    cached = _patches_cache.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    try:
+        entries = json.loads(path.read_text(encoding="utf-8"))
+        patches = sorted(
+            ((str(e["name"]), date.fromisoformat(e["start"])) for e in entries), key=lambda patch: patch[1]
+        )
+    except (OSError, ValueError, KeyError, TypeError):
+        logger.warning("Ignoring unreadable patch list %s", path, exc_info=True)
+        patches = []
+    _patches_cache[path] = (mtime, patches)
+    return patches
+
+
+def available_windows(today: Optional[date] = None, patches_file: Optional[Path] = None) -> list[MetaWindow]:
+    """Every selectable window: all time, recent days, then patches (newest first)."""
+    today = today or datetime.utcnow().date()
+    windows = [MetaWindow(ALL_TIME, "All time")]
+    windows += [
+        MetaWindow(f"{days}d", f"Last {days} days", since=today - timedelta(days=days - 1)) for days in RECENT_DAYS
+    ]
+    patches = load_patches(patches_file)
+    patch_windows = []
+    for i, (name, start) in enumerate(patches):
+        until = patches[i + 1][1] - timedelta(days=1) if i + 1 < len(patches) else None
+        patch_windows.append(MetaWindow(f"patch-{_slug(name)}", name, since=start, until=until))
+    return windows + patch_windows[::-1]
+
+
+def resolve_window(
+    key: Optional[str], today: Optional[date] = None, patches_file: Optional[Path] = None
+) -> Optional[MetaWindow]:
+    """The window for a query value (None/"" means all time), or None if unknown."""
+    key = key or ALL_TIME
+    for window in available_windows(today, patches_file):
+        if window.key == key:
+            return window
+    return None
@@ -0,0 +1,186 @@
+"""
+Declarative PlayerStats field extraction for EI / dps.report JSON.
+
+Each column lists its JSON sources in priority order plus a converter:
+
+    "damage_taken": (_to_int, "defStats[0]", "defense.damageTaken"),
+
+- `<phaseTable>[<col>]` reads column <col> of the player's row in phases[0].<phaseTable>
+  (dpsStats, defStats, supportStats, gameplayStats).
+- `<section>.<key>` reads <key> from the player's chosen stats entry
+  (dps, support, defense, combat, gameplay; see map_dps_json_to_models).
+
+The first source that is present wins (even when its value is 0). If none is present,
+the field gets `converter(None)`. The spec is compiled once at import: sources become
+slot/column getters, so no lookups are parsed or repeated for each player.
+"""
+from __future__ import annotations
+
+import re
+from typing import Any, Callable, Dict, Mapping, Optional, Sequence
+
+from app.db.models import PlayerStats
+
+PHASE_TABLES = ("dpsStats", "defStats", "supportStats", "gameplayStats")
+STATS_SECTIONS = ("dps", "support", "defense", "combat", "gameplay")
+SLOTS = {name: i for i, name in enumerate(PHASE_TABLES + STATS_SECTIONS)}
+
+_PHASE_SOURCE = re.compile(r"^(\w+)\[(\d+)\]$")
+_SECTION_SOURCE = re.compile(r"^(\w+)\.(\w+)$")
+_MISSING = object()
+
+
+def _to_number(val, default=0):
+    if isinstance(val, (int, float)):
+        return val
+    if isinstance(val, str):
+        m = re.search(r"[-+]?\d*\.?\d+", val)
+        if m:
+            try:
+                return float(m.group(0))
+            except Exception:
+                return default
+    return default
+
+
+def _to_int(val, default=0) -> int:
+    try:
+        if val is None:
+            return default
+        return int(val)
+    except (TypeError, ValueError):
+        try:
+            return int(float(val))
+        except Exception:
+            return default
+
+
+def _to_float(val, default=0.0) -> float:
+    try:
+        if val is None:
+            return default
+        return float(val)
+    except (TypeError, ValueError):
+        return default
+
+
+def _to_count(val) -> int:
+    """Integer from numbers or numeric text ("3 downs")."""
+    return _to_int(_to_number(val, 0))
+
+
+Converter = Callable[[Any], Any]
+
+PLAYER_FIELDS: Dict[str, tuple] = {
+    # Offense
+    "total_damage": (_to_int, "dpsStats[0]", "dps.damage"),
+    "cc_total": (_to_int, "dpsStats[3]", "defense.breakbarDamage"),
+    "downs": (_to_int, "combat.downed"),
+    "kills": (_to_int, "combat.killed"),
+    "deaths": (_to_int, "defense.deadCount", "defense.dead"),
+    # Defense (defStats)
+    "damage_taken": (_to_int, "defStats[0]", "defense.damageTaken"),
+    "barrier_absorbed": (_to_int, "defStats[1]", "defense.damageBarrier"),
+    "missed_count": (_to_int, "defStats[2]", "defense.missedCount", "combat.missed"),
+    "interrupted_count": (_to_int, "defStats[3]", "defense.interruptedCount", "combat.interrupts"),
+    "evaded_count": (_to_int, "defStats[6]", "defense.evadedCount", "combat.evaded"),
+    "blocked_count": (_to_int, "defStats[7]", "defense.blockedCount", "combat.blocked"),
+    "dodged_count": (_to_int, "defStats[8]", "defense.dodgeCount", "combat.dodgeCount"),
+    "downs_count": (_to_count, "defStats[13]", "defense.downCount", "combat.downed"),
+    "downed_damage_taken": (_to_int, "defStats[14]", "defense.downedDamageTaken"),
+    # defStats[15] contains text like "100% Alive", use the defense dict instead
+    "dead_count": (_to_int, "defense.deadCount", "defense.dead"),
+    "dead_duration_ms": (_to_float, "defStats[16]", "defense.deadDuration"),
+    "dc_duration_ms": (_to_float, "defStats[18]", "defense.dcDuration"),
+    # Support (supportStats)
+    "cleanses": (_to_int, "support.condiCleanse", "defense.condiCleanse"),
+    "cleanses_other": (_to_int, "supportStats[0]", "support.condiCleanse"),
+    "cleanses_time_other": (_to_float, "supportStats[1]", "support.condiCleanseTime", "defense.conditionCleansesTime"),
+    "cleanses_self": (_to_int, "supportStats[2]", "support.condiCleanseSelf"),
+    "cleanses_time_self": (_to_float, "supportStats[3]", "support.condiCleanseTimeSelf"),
+    "strips_out": (_to_int, "supportStats[4]", "support.boonStrips", "defense.boonStrips"),
+    "strips_time": (_to_float, "supportStats[5]", "support.boonStripsTime", "defense.boonStripsTime"),
+    "resurrects": (_to_int, "supportStats[6]", "support.resurrects"),
+    "resurrect_time": (_to_float, "supportStats[7]", "support.resurrectTime"),
+    "stun_breaks": (_to_int, "supportStats[8]", "support.stunBreak"),
+    "stun_break_time": (_to_float, "supportStats[9]", "support.removedStunDuration"),
+    "healing_out": (_to_int, "support.healing"),
+    "barrier_out": (_to_int, "support.barrier"),
+    # Gameplay (gameplayStats)
+    "time_wasted": (_to_float, "gameplayStats[0]", "gameplay.timeWasted", "gameplay.wasted"),
+    "time_saved": (_to_float, "gameplayStats[2]", "gameplay.timeSaved", "gameplay.saved"),
+    "weapon_swaps": (_to_int, "gameplayStats[4]", "gameplay.swapCount"),
+    "stack_dist": (_to_float, "gameplayStats[5]", "gameplay.stackDist"),
+    "dist_to_com": (_to_float, "gameplayStats[6]", "gameplay.distToCom"),
+    "anim_percent": (_to_float, "gameplayStats[7]", "gameplay.skillCastUptime"),
+    "anim_no_auto_percent": (_to_float, "gameplayStats[8]", "gameplay.skillCastUptimeNoAA"),
+}
+
+
+def _compile_source(source: str) -> Callable[[Sequence[Any]], Any]:
+    m = _PHASE_SOURCE.match(source)
+    if m and m.group(1) in PHASE_TABLES:
+        slot, col = SLOTS[m.group(1)], int(m.group(2))
+
+        def get_col(ctx: Sequence[Any]) -> Any:
+            row = ctx[slot]
+            return row[col] if row is not None and len(row) > col else _MISSING
+
+        return get_col
+    m = _SECTION_SOURCE.match(source)
+    if m and m.group(1) in STATS_SECTIONS:
+        slot, key = SLOTS[m.group(1)], m.group(2)
+
+        def get_key(ctx: Sequence[Any]) -> Any:
+            return ctx[slot].get(key, _MISSING)
+
+        return get_key
+    raise ValueError(f"Unknown field source: {source!r}")
+
+
+def compile_fields(spec: Mapping[str, tuple], model: Optional[type] = PlayerStats) -> Callable[[Sequence[Any]], Dict[str, Any]]:
+    """
+    Compile a field spec into `extract(ctx) -> {column: value}`.
+
+    `ctx` is the sequence built by build_context. Unknown sources, and columns that
+    `model` does not have, raise ValueError here instead of failing during ingestion.
+    """
+    columns = set(model.__table__.columns.keys()) if model is not None else None
+    compiled = []
+    for name, (convert, *sources) in spec.items():
+        if columns is not None and name not in columns:
+            raise ValueError(f"{model.__name__} has no column {name!r}")
+        getters = tuple(_compile_source(s) for s in sources)
+        compiled.append((name, getters, convert, convert(None)))
+
+    def extract(ctx: Sequence[Any]) -> Dict[str, Any]:
+        out = {}
+        for name, getters, convert, default in compiled:
+            for get in getters:
+                value = get(ctx)
+                if value is not _MISSING:
+                    out[name] = convert(value)
+                    break
+            else:
+                out[name] = default
+        return out
+
+    return extract
+
+
+def _phase_row(table: Any, idx: int) -> Optional[Sequence[Any]]:
+    try:
+        row = table[idx]
+    except (IndexError, KeyError, TypeError):
+        return None
+    return row if isinstance(row, (list, tuple)) else None
+
+
+def build_context(phase0: Mapping[str, Any], idx: int, sections: Mapping[str, Mapping[str, Any]]) -> list:
+    """Slot list for one player: their phase rows, then their stats sections."""
+    ctx = [_phase_row(phase0.get(name) or [], idx) for name in PHASE_TABLES]
+    ctx.extend(sections.get(name) or {} for name in STATS_SECTIONS)
+    return ctx
+
+
+extract_player_fields = compile_fields(PLAYER_FIELDS)
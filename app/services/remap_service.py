@@ -0,0 +1,259 @@
+"""
+Offline re-mapping: rebuild Fight/PlayerStats columns from the cached EI JSON files.
+
+After a change to dps_mapping (new columns, fixes) the stored rows can be refreshed
+without re-uploading anything:
+
+- Fights with a `dps_json_path` are processed in id order, in chunks.
+- Each JSON is mapped in a process pool (cpu_pool.map_ei_file: mapping + role detection).
+  Workers return plain column dicts, never ORM objects.
+- Results are diffed against the stored rows. Only changed columns are written,
+  with one executemany UPDATE per set of changed columns; changed fights also get
+  their squad boon uptime table (squad_boons) replaced.
+- After each chunk is committed, the last fight id is written to a checkpoint file
+  so an interrupted run resumes where it stopped.
+
+Only local files are read: nothing here talks to dps.report.
+"""
+from __future__ import annotations
+
+import json
+import math
+import os
+from collections import defaultdict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from sqlalchemy import bindparam, delete, insert, select, update
+from sqlalchemy.engine import Connection, Engine
+
+from app.db.models import Fight, PlayerStats
+from app.services import squad_boons
+from app.services.cpu_pool import map_ei_file
+from app.services.fight_store import PLAYER_INSERT_COLS
+
+# Fight columns owned by the mapper (the rest come from the upload itself)
+FIGHT_COLUMNS = ("duration_ms", "result", "ally_count", "enemy_count", "map_id")
+PLAYER_COLUMNS = tuple(c.name for c in PLAYER_INSERT_COLS)
+
+_fights = Fight.__table__
+_players = PlayerStats.__table__
+
+
+@dataclass
+class RemapStats:
+    fights: int = 0
+    fights_changed: int = 0
+    players_updated: int = 0
+    players_replaced: int = 0
+    columns_changed: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    errors: list[tuple[int, str]] = field(default_factory=list)
+    last_fight_id: int = 0
+
+
+def remap_fight(fight_id: int, json_path: str) -> tuple[int, Optional[dict], Optional[str]]:
+    """
+    Worker: map one cached JSON into {"fight": {...}, "players": [{...}, ...], "boon_uptimes": [...]}.
+
+    Runs in a pool process, so it takes and returns plain picklable values.
+    """
+    path = Path(json_path)
+    if not path.exists():
+        return fight_id, None, f"Cached JSON not found: {path}"
+    try:
+        rows = map_ei_file(json_path)
+    except Exception as e:
+        return fight_id, None, f"Mapping failed: {e}"
+    fight = {name: rows["fight"].get(name) for name in FIGHT_COLUMNS}
+    return fight_id, {"fight": fight, "players": rows["players"], "boon_uptimes": rows["boon_uptimes"]}, None
+
+
+def _same(old: Any, new: Any) -> bool:
+    if isinstance(old, float) or isinstance(new, float):
+        if old is None or new is None:
+            return old is new
+        return math.isclose(old, new, rel_tol=1e-9, abs_tol=1e-9)
+    return old == new
+
+
+def _changed(stored: Dict[str, Any], fresh: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in fresh.items() if not _same(stored.get(k), v)}
+
+
+class _UpdateBatch:
+    """Pending UPDATEs grouped by the exact set of changed columns."""
+
+    def __init__(self, table) -> None:
+        self.table = table
+        self.groups: dict[tuple[str, ...], list[dict]] = defaultdict(list)
+
+    def add(self, row_id: int, changes: Dict[str, Any]) -> None:
+        if changes:
+            cols = tuple(sorted(changes))
+            self.groups[cols].append({"_id": row_id, **{f"_{c}": changes[c] for c in cols}})
+
+    def flush(self, conn: Connection) -> None:
+        for cols, rows in self.groups.items():
+            stmt = (
+                update(self.table)
+                .where(self.table.c.id == bindparam("_id"))
+                .values({c: bindparam(f"_{c}") for c in cols})
+            )
+            conn.execute(stmt, rows)
+        self.groups.clear()
+
+
+def _apply_chunk(conn: Connection, results: list[tuple[int, Optional[dict], Optional[str]]], stats: RemapStats) -> None:
+    ok = {fid: data for fid, data, error in results if data is not None}
+    for fid, _, error in results:
+        if error:
+            stats.errors.append((fid, error))
+    if not ok:
+        return
+
+    stored_fights = {
+        row["id"]: row
+        for row in conn.execute(select(_fights).where(_fights.c.id.in_(ok))).mappings()
+    }
+    stored_players: dict[int, list] = defaultdict(list)
+    for row in conn.execute(
+        select(_players).where(_players.c.fight_id.in_(ok)).order_by(_players.c.fight_id, _players.c.id)
+    ).mappings():
+        stored_players[row["fight_id"]].append(row)
+
+    fight_updates = _UpdateBatch(_fights)
+    player_updates = _UpdateBatch(_players)
+    replaced: list[int] = []
+    inserts: list[dict] = []
+    boon_uptimes: dict[int, list] = {}
+
+    for fid, data in ok.items():
+        if fid not in stored_fights:
+            continue
+        fight_changes = _changed(stored_fights[fid], data["fight"])
+        fight_updates.add(fid, fight_changes)
+        changed = bool(fight_changes)
+
+        old_rows = stored_players.get(fid, [])
+        new_rows = data["players"]
+        # Rows were inserted in mapping order: match by position when the roster agrees
+        same_roster = len(old_rows) == len(new_rows) and all(
+            (o["character_name"], o["is_ally"]) == (n["character_name"], n["is_ally"])
+            for o, n in zip(old_rows, new_rows)
+        )
+        if same_roster:
+            for old, new in zip(old_rows, new_rows):
+                changes = _changed(old, new)
+                if changes:
+                    player_updates.add(old["id"], changes)
+                    stats.players_updated += 1
+                    for col in changes:
+                        stats.columns_changed[col] += 1
+                    changed = True
+        else:
+            replaced.append(fid)
+            inserts.extend({"fight_id": fid, **row} for row in new_rows)
+            stats.players_replaced += len(new_rows)
+            changed = True
+        if changed:
+            boon_uptimes[fid] = data["boon_uptimes"]
+        stats.fights_changed += int(changed)
+
+    fight_updates.flush(conn)
+    player_updates.flush(conn)
+    if replaced:
+        conn.execute(delete(_players).where(_players.c.fight_id.in_(replaced)))
+        conn.execute(insert(_players), inserts)
+    squad_boons.replace(conn, boon_uptimes)
+
+
+def read_checkpoint(path: Path) -> int:
+    try:
+        return int(json.loads(path.read_text(encoding="utf-8")).get("last_fight_id", 0))
+    except (OSError, ValueError):
+        return 0
+
+
+def write_checkpoint(path: Path, stats: RemapStats) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    payload = {
+        "last_fight_id": stats.last_fight_id,
+        "fights": stats.fights,
+        "fights_changed": stats.fights_changed,
+        "players_updated": stats.players_updated,
+        "players_replaced": stats.players_replaced,
+        "errors": len(stats.errors),
+    }
+    tmp.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _pending_fights(engine: Engine, after_id: int, limit: Optional[int]) -> Iterator[tuple[int, str]]:
+    stmt = (
+        select(_fights.c.id, _fights.c.dps_json_path)
+        .where(_fights.c.dps_json_path.is_not(None), _fights.c.id > after_id)
+        .order_by(_fights.c.id)
+    )
+    if limit:
+        stmt = stmt.limit(limit)
+    with engine.connect() as conn:
+        yield from [tuple(row) for row in conn.execute(stmt)]
+
+
+def _chunks(items: Iterable, size: int) -> Iterator[list]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def remap_all(
+    engine: Engine,
+    checkpoint: Optional[Path] = None,
+    workers: Optional[int] = None,
+    chunk_size: int = 200,
+    limit: Optional[int] = None,
+    dry_run: bool = False,
+    executor: Optional[Executor] = None,
+    progress=None,
+) -> RemapStats:
+    """
+    Re-map every fight with a cached JSON (after the checkpoint, if any).
+
+    `executor` defaults to a ProcessPoolExecutor with `workers` processes. With
+    `dry_run` the diff is computed and counted but rolled back.
+    """
+    start_after = read_checkpoint(checkpoint) if checkpoint else 0
+    stats = RemapStats(last_fight_id=start_after)
+    pending = list(_pending_fights(engine, start_after, limit))
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1)
+    try:
+        for chunk in _chunks(pending, chunk_size):
+            ids, paths = zip(*chunk)
+            results = list(executor.map(remap_fight, ids, paths, chunksize=max(1, len(chunk) // 32)))
+            with engine.connect() as conn:
+                trans = conn.begin()
+                _apply_chunk(conn, results, stats)
+                if dry_run:
+                    trans.rollback()
+                else:
+                    trans.commit()
+            stats.fights += len(chunk)
+            stats.last_fight_id = ids[-1]
+            if checkpoint and not dry_run:
+                write_checkpoint(checkpoint, stats)
+            if progress:
+                progress(stats, len(pending))
+    finally:
+        if own_executor:
+            executor.shutdown(cancel_futures=True)
+    return stats
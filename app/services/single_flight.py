@@ -0,0 +1,199 @@
+"""
+Single-flight coordination for log ingestion.
+
+After a raid, several squad members upload the same log within seconds. The first
+request for a given content hash ("leader") runs the import. Concurrent requests for
+the same content ("followers") wait for its result and reuse the resulting fight id.
+
+The `ingest_locks` table is the source of truth, so this also works across uvicorn
+worker processes. Inside one process, followers are woken through a threading.Event
+instead of waiting for the next DB poll.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Optional
+
+from sqlalchemy import update
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.db.models import Fight, IngestLock
+
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+POLL_INTERVAL_S = 0.25
+
+_OWNER = f"{socket.gethostname()}:{os.getpid()}"
+_local_events: dict[str, threading.Event] = {}
+_local_events_lock = threading.Lock()
+
+
+class SingleFlightTimeout(RuntimeError):
+    """Raised when a follower gives up waiting for the leader."""
+
+
+def compute_content_hash(file_path: Path) -> str:
+    """Compute the SHA256 of a log file (content identity for dedupe)."""
+    sha256_hash = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for byte_block in iter(lambda: f.read(1024 * 1024), b""):
+            sha256_hash.update(byte_block)
+    return sha256_hash.hexdigest()
+
+
+def _local_event(content_hash: str) -> threading.Event:
+    with _local_events_lock:
+        event = _local_events.get(content_hash)
+        if event is None:
+            event = _local_events[content_hash] = threading.Event()
+        return event
+
+
+def _release_local_event(content_hash: str) -> None:
+    with _local_events_lock:
+        event = _local_events.pop(content_hash, None)
+    if event is not None:
+        event.set()
+
+
+def _try_acquire(session: Session, content_hash: str, stale_after_s: float) -> tuple[bool, Optional[IngestLock]]:
+    """
+    Try to become the leader for content_hash.
+
+    Returns (is_leader, existing_lock_row_if_follower).
+    """
+    now = datetime.utcnow()
+    session.add(IngestLock(content_hash=content_hash, status=STATUS_RUNNING, owner=_OWNER, acquired_at=now, updated_at=now))
+    try:
+        session.commit()
+        return True, None
+    except IntegrityError:
+        session.rollback()
+
+    lock = session.get(IngestLock, content_hash)
+    if lock is None:
+        # Row vanished between INSERT and SELECT; retry from scratch
+        return _try_acquire(session, content_hash, stale_after_s)
+
+    takeover = False
+    if lock.status == STATUS_FAILED:
+        takeover = True
+    elif lock.status == STATUS_RUNNING and lock.updated_at < now - timedelta(seconds=stale_after_s):
+        takeover = True
+    elif lock.status == STATUS_DONE and (lock.fight_id is None or session.get(Fight, lock.fight_id) is None):
+        # The fight was deleted since; import again
+        takeover = True
+
+    if not takeover:
+        return False, lock
+
+    # Compare-and-swap so only one contender wins the takeover
+    result = session.execute(
+        update(IngestLock)
+        .where(IngestLock.content_hash == content_hash)
+        .where(IngestLock.status == lock.status)
+        .where(IngestLock.updated_at == lock.updated_at)
+        .values(status=STATUS_RUNNING, owner=_OWNER, error=None, fight_id=None, acquired_at=now, updated_at=now)
+    )
+    session.commit()
+    if result.rowcount == 1:
+        return True, None
+    session.expire_all()
+    return False, session.get(IngestLock, content_hash)
+
+
+def _finish(session: Session, content_hash: str, fight_id: Optional[int], error: Optional[str]) -> None:
+    session.execute(
+        update(IngestLock)
+        .where(IngestLock.content_hash == content_hash)
+        .where(IngestLock.owner == _OWNER)
+        .values(
+            status=STATUS_DONE if fight_id is not None else STATUS_FAILED,
+            fight_id=fight_id,
+            error=error,
+            updated_at=datetime.utcnow(),
+        )
+    )
+    session.commit()
+
+
+def _wait_for_leader(
+    session: Session, content_hash: str, timeout_s: float, stale_after_s: float
+) -> tuple[Optional[int], Optional[str], bool]:
+    """
+    Wait for the leader to finish. Returns (fight_id, error, became_leader).
+    """
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        with _local_events_lock:
+            event = _local_events.get(content_hash)
+        if event is not None:
+            event.wait(POLL_INTERVAL_S)
+        else:
+            time.sleep(POLL_INTERVAL_S)
+        session.expire_all()
+        lock = session.get(IngestLock, content_hash)
+        if lock is None:
+            is_leader, lock = _try_acquire(session, content_hash, stale_after_s)
+            if is_leader:
+                return None, None, True
+        if lock.status == STATUS_DONE and lock.fight_id is not None:
+            return lock.fight_id, None, False
+        if lock.status == STATUS_FAILED:
+            return None, lock.error or "Concurrent import of this log failed", False
+        if lock.updated_at < datetime.utcnow() - timedelta(seconds=stale_after_s):
+            # Leader died mid-import; try to take over
+            is_leader, _ = _try_acquire(session, content_hash, stale_after_s)
+            if is_leader:
+                return None, None, True
+    raise SingleFlightTimeout(f"Timed out waiting for concurrent import of {content_hash[:12]}")
+
+
+def run_single_flight(
+    engine: Engine,
+    content_hash: str,
+    work: Callable[[], tuple[Optional[int], Optional[str]]],
+    timeout_s: Optional[float] = None,
+    stale_after_s: Optional[float] = None,
+) -> tuple[Optional[int], Optional[str], bool]:
+    """
+    Run `work` at most once per content hash across threads and processes.
+
+    `work` returns (fight_id, error). Returns (fight_id, error, is_leader);
+    followers get the leader's fight id (or error) without running `work`.
+    """
+    timeout_s = settings.INGEST_SINGLE_FLIGHT_TIMEOUT_S if timeout_s is None else timeout_s
+    stale_after_s = settings.INGEST_SINGLE_FLIGHT_STALE_S if stale_after_s is None else stale_after_s
+
+    with Session(bind=engine) as session:
+        is_leader, lock = _try_acquire(session, content_hash, stale_after_s)
+        if not is_leader:
+            if lock is not None and lock.status == STATUS_DONE:
+                return lock.fight_id, None, False
+            fight_id, error, is_leader = _wait_for_leader(session, content_hash, timeout_s, stale_after_s)
+            if not is_leader:
+                return fight_id, error, False
+
+        _local_event(content_hash)
+        fight_id: Optional[int] = None
+        error: Optional[str] = None
+        try:
+            fight_id, error = work()
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            _finish(session, content_hash, fight_id, error)
+            _release_local_event(content_hash)
+        return fight_id, error, True
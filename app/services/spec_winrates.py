@@ -0,0 +1,90 @@
+"""
+Spec win rates per context, from the daily rollups.
+
+For each (context, elite_spec): allied fights played with a known result, wins,
+losses, draws, win rate, and its Wilson score interval. One grouped query over
+meta_daily_spec_results answers any context set and day range, so the cost
+does not grow with the number of player_stats rows.
+
+A fight counts once per allied player of the spec (two Firebrands in one
+fight count twice), and a draw counts as a fight that was not won.
+"""
+from __future__ import annotations
+
+import math
+from collections import defaultdict
+from datetime import date
+from typing import Iterable, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.db.models import FightContext, MetaDailySpecResult
+from app.services.meta_rollups import NO_VALUE
+
+# 95% two-sided
+WILSON_Z = 1.96
+
+
+def wilson_interval(wins: int, fights: int, z: float = WILSON_Z) -> tuple[float, float]:
+    """Wilson score interval of a win rate, as fractions (0.0, 1.0) for no fights."""
+    if fights <= 0:
+        return 0.0, 1.0
+    p = wins / fights
+    z2 = z * z
+    center = (p + z2 / (2 * fights)) / (1 + z2 / fights)
+    margin = z * math.sqrt(p * (1 - p) / fights + z2 / (4 * fights * fights)) / (1 + z2 / fights)
+    return max(0.0, center - margin), min(1.0, center + margin)
+
+
+def spec_winrate_row(fights: int, wins: int, losses: int, draws: int) -> dict:
+    """Counts plus win rate and interval, in percent."""
+    low, high = wilson_interval(wins, fights)
+    return {
+        "fights": fights,
+        "wins": wins,
+        "losses": losses,
+        "draws": draws,
+        "win_rate": 100.0 * wins / fights,
+        "ci_low": 100.0 * low,
+        "ci_high": 100.0 * high,
+    }
+
+
+def get_spec_winrates(
+    db: Session,
+    contexts: Optional[Iterable[FightContext]] = None,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+) -> dict[FightContext, dict[str, dict]]:
+    """
+    Win rates by context, then by elite spec (most played first).
+
+    `since`/`until` bound the fight day (inclusive); None means unbounded.
+    Specs without a fight with a known result are left out.
+    """
+    decided = MetaDailySpecResult.wins + MetaDailySpecResult.losses + MetaDailySpecResult.draws
+    stmt = select(
+        MetaDailySpecResult.context,
+        MetaDailySpecResult.elite_spec,
+        func.sum(decided),
+        func.sum(MetaDailySpecResult.wins),
+        func.sum(MetaDailySpecResult.losses),
+        func.sum(MetaDailySpecResult.draws),
+    ).where(MetaDailySpecResult.elite_spec != NO_VALUE)
+    if contexts is not None:
+        stmt = stmt.where(MetaDailySpecResult.context.in_(list(contexts)))
+    if since is not None:
+        stmt = stmt.where(MetaDailySpecResult.day >= since)
+    if until is not None:
+        stmt = stmt.where(MetaDailySpecResult.day <= until)
+    rows = db.execute(stmt.group_by(MetaDailySpecResult.context, MetaDailySpecResult.elite_spec)).all()
+
+    by_context: dict[FightContext, list] = defaultdict(list)
+    for context, spec, fights, wins, losses, draws in rows:
+        if fights:
+            by_context[context].append((spec, spec_winrate_row(fights, wins, losses, draws)))
+    return {
+        context: dict(sorted(specs, key=lambda item: (-item[1]["fights"], item[0])))
+        for context, specs in by_context.items()
+    }
@@ -0,0 +1,203 @@
+"""
+Squad boon uptime table of the fight view.
+
+For the allied squad and for each of its subgroups, the fight page shows the
+uptime of every surfaced boon, weighted by the players' active time (fight
+duration minus dead and disconnected time). Building it walks every ally's boon
+timelines, so it is computed once per fight when the fight is mapped, stored
+with it (fight_store.insert_fight_rows) and kept in fight_boon_uptimes: one row per
+subgroup, plus the squad average under subgroup 0 (squad members are always in
+subgroups 1-49).
+
+Fights stored before that table existed have no rows. The fight view then builds
+the table from the players on every request, and `backfill` stores it once.
+"""
+from __future__ import annotations
+
+import logging
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Optional
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session, undefer
+
+from app.db.models import Fight, FightBoonUptime, PlayerStats
+from app.services import boon_states
+from app.services.mapping_core import BOON_IDS
+
+logger = logging.getLogger(__name__)
+
+BOON_COLUMNS = [
+    {"key": "might", "label": "Might", "uptime_attr": "might_uptime", "out_attr": "might_out_stacks"},
+    {"key": "fury", "label": "Fury", "uptime_attr": "fury_uptime", "out_attr": "fury_out_ms"},
+    {"key": "quickness", "label": "Quickness", "uptime_attr": "quickness_uptime", "out_attr": "quickness_out_ms"},
+    {"key": "alacrity", "label": "Alacrity", "uptime_attr": "alacrity_uptime", "out_attr": "alacrity_out_ms"},
+    {"key": "protection", "label": "Protection", "uptime_attr": "protection_uptime", "out_attr": "protection_out_ms"},
+    {"key": "regeneration", "label": "Regeneration", "uptime_attr": "regeneration_uptime", "out_attr": "regeneration_out_ms"},
+    {"key": "vigor", "label": "Vigor", "uptime_attr": "vigor_uptime", "out_attr": "vigor_out_ms"},
+    {"key": "aegis", "label": "Aegis", "uptime_attr": "aegis_uptime", "out_attr": "aegis_out_ms"},
+    {"key": "stability", "label": "Stability", "uptime_attr": "stability_uptime", "out_attr": "stab_out_ms"},
+    {"key": "swiftness", "label": "Swiftness", "uptime_attr": "swiftness_uptime", "out_attr": None},
+    {"key": "resistance", "label": "Resistance", "uptime_attr": "resistance_uptime", "out_attr": "resistance_out_ms"},
+    {"key": "resolution", "label": "Resolution", "uptime_attr": "resolution_uptime", "out_attr": None},
+    {"key": "superspeed", "label": "Superspeed", "uptime_attr": "superspeed_uptime", "out_attr": "superspeed_out_ms"},
+    {"key": "stealth", "label": "Stealth", "uptime_attr": "stealth_uptime", "out_attr": None},
+]
+
+SQUAD_ROW = 0
+
+_uptimes = FightBoonUptime.__table__
+
+
+def is_squad_member(player: Any) -> bool:
+    """Allies only: EI's is_ally flag, minus non-squad rows (subgroup <= 0 or >= 50)."""
+    return bool(getattr(player, "is_ally", True)) and 0 < int(getattr(player, "subgroup", 0) or 0) < 50
+
+
+def active_duration_ms(player: Any, fight_duration_ms: float) -> float:
+    """Active duration = phase duration - deadDuration - dcDuration (clamped to 0)."""
+    dead_ms = getattr(player, "dead_duration_ms", None)
+    dc_ms = getattr(player, "dc_duration_ms", None)
+    if dead_ms is None and dc_ms is None:
+        presence = getattr(player, "presence", None) or getattr(player, "presence_pct", None)
+        try:
+            presence_val = float(presence) if presence is not None else None
+        except (TypeError, ValueError):
+            presence_val = None
+        if presence_val is not None and presence_val > 0 and fight_duration_ms:
+            return fight_duration_ms * (presence_val / 100.0)
+        return float(fight_duration_ms or 0)
+    dead_val = float(dead_ms or 0)
+    dc_val = float(dc_ms or 0)
+    return max(0.0, float(fight_duration_ms or 0) - dead_val - dc_val)
+
+
+def uptime_fallback_ms(player: Any, buff_key: str, active_ms: float, phase_ms: float) -> float:
+    """Buff active ms from the stored % uptime, for players without boonGraph states of that buff."""
+    value = getattr(player, f"{buff_key}_uptime", 0.0) or 0.0
+    normalized_percent = min(100.0, max(0.0, float(value)))
+    buff = (normalized_percent / 100.0) * phase_ms
+    if active_ms > 0:
+        buff = min(buff, active_ms)
+    return buff
+
+
+def _uptime_row(subgroup: int, totals: Dict[str, Any]) -> Dict[str, Any]:
+    row = {"subgroup": subgroup, "player_count": totals["player_count"], "active_ms": totals["active_ms"]}
+    for column in BOON_COLUMNS:
+        uptime = 0.0
+        if totals["active_ms"] > 0:
+            uptime_pct = (totals["boon_ms"][column["key"]] / totals["active_ms"]) * 100.0
+            uptime = round(min(100.0, max(0.0, uptime_pct)), 1)
+        row[column["uptime_attr"]] = uptime
+    return row
+
+
+def summary_rows(fight_duration_ms: Optional[int], players: Iterable[Any]) -> list[Dict[str, Any]]:
+    """
+    fight_boon_uptimes rows (without fight_id) for a fight's players: the squad
+    average first, then one row per subgroup in subgroup order.
+
+    Players are PlayerStats instances or anything with the same attributes,
+    `boon_states` included.
+    """
+    phase_ms = float(fight_duration_ms or 0)
+    squad = {"player_count": 0, "active_ms": 0.0, "boon_ms": defaultdict(float)}
+    groups: dict[int, dict] = defaultdict(lambda: {"player_count": 0, "active_ms": 0.0, "boon_ms": defaultdict(float)})
+    # Buffs with boonGraph states, measured together below: (states, key, player's active ms, group totals)
+    pending = []
+    for player in players:
+        if not is_squad_member(player):
+            continue
+        group = groups[int(player.subgroup)]
+        active_ms = active_duration_ms(player, phase_ms)
+        if active_ms <= 0 and phase_ms > 0:
+            active_ms = phase_ms
+        for totals in (squad, group):
+            totals["player_count"] += 1
+            totals["active_ms"] += active_ms
+        states_map = getattr(player, "boon_states", {}) or {}
+        for column in BOON_COLUMNS:
+            buff_id = BOON_IDS.get(column["key"])
+            states = states_map.get(buff_id) if buff_id is not None else None
+            if states is not None and len(states):
+                pending.append((states, column["key"], active_ms, group))
+                continue
+            ms = uptime_fallback_ms(player, column["key"], active_ms, phase_ms)
+            squad["boon_ms"][column["key"]] += ms
+            group["boon_ms"][column["key"]] += ms
+
+    # Clip to the phase window, then clamp to active duration
+    measured = boon_states.active_ms_many([entry[0] for entry in pending], 0.0, phase_ms if phase_ms > 0 else None)
+    for (_, key, active_ms, group), ms in zip(pending, measured.tolist()):
+        if active_ms > 0:
+            ms = min(ms, active_ms)
+        squad["boon_ms"][key] += ms
+        group["boon_ms"][key] += ms
+    return [_uptime_row(SQUAD_ROW, squad)] + [_uptime_row(subgroup, groups[subgroup]) for subgroup in sorted(groups)]
+
+
+def table_rows(rows: Iterable[Any]) -> list[Dict[str, Any]]:
+    """Summary rows (dicts or fight_boon_uptimes mappings) as the fight template's squad_boon_uptimes."""
+    return [
+        {
+            "label": "Squad Average" if row["subgroup"] == SQUAD_ROW else f"Group {row['subgroup']}",
+            "group": None if row["subgroup"] == SQUAD_ROW else row["subgroup"],
+            "player_count": row["player_count"],
+            "boons": {column["key"]: row[column["uptime_attr"]] for column in BOON_COLUMNS},
+        }
+        for row in rows
+    ]
+
+
+def store(db: Session, fight_id: int, rows: list[Dict[str, Any]]) -> None:
+    """Insert a fight's summary rows in the current transaction."""
+    if not rows:
+        return
+    db.execute(insert(_uptimes), [{**row, "fight_id": fight_id} for row in rows])
+
+
+def replace(db: Session | Connection, tables: Dict[int, list[Dict[str, Any]]]) -> None:
+    """Swap the stored rows of each fight id in `tables` for its new rows (after re-mapping)."""
+    if not tables:
+        return
+    db.execute(delete(_uptimes).where(_uptimes.c.fight_id.in_(list(tables))))
+    db.execute(insert(_uptimes), [{**row, "fight_id": fid} for fid, rows in tables.items() for row in rows])
+
+
+def load(db: Session, fight_id: int) -> Optional[list[Dict[str, Any]]]:
+    """The stored table of a fight as squad_boon_uptimes, or None if it was never computed."""
+    rows = db.execute(
+        select(_uptimes).where(_uptimes.c.fight_id == fight_id).order_by(_uptimes.c.subgroup)
+    ).mappings().all()
+    return table_rows(rows) if rows else None
+
+
+def backfill(db: Session, batch_size: int = 200) -> int:
+    """Compute and store the table of every fight that has none; returns the number of fights filled."""
+    done = 0
+    last_id = 0
+    while True:
+        fights = db.execute(
+            select(Fight.id, Fight.duration_ms)
+            .where(Fight.id > last_id, ~select(_uptimes.c.fight_id).where(_uptimes.c.fight_id == Fight.id).exists())
+            .order_by(Fight.id)
+            .limit(batch_size)
+        ).all()
+        if not fights:
+            return done
+        players: dict[int, list] = defaultdict(list)
+        for player in (
+            db.query(PlayerStats)
+            .filter(PlayerStats.fight_id.in_([f.id for f in fights]))
+            .options(undefer(PlayerStats.boon_timelines))
+        ):
+            players[player.fight_id].append(player)
+        for fight in fights:
+            store(db, fight.id, summary_rows(fight.duration_ms, players[fight.id]))
+        db.commit()
+        db.expunge_all()
+        done += len(fights)
+        last_id = fights[-1].id
+        logger.info("Squad boon uptimes stored for %d fights", done)
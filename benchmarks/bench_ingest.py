@@ -0,0 +1,192 @@
+"""
+End-to-end ingest benchmark against the local dps.report stand-in.
+
+Starts the stand-in and the app (uvicorn, in-process threads) on free ports, with a
+throw-away SQLite DB and dps.report cache. Then it drives `POST /analyze/upload`
+with N concurrent clients and/or `bulk_import`, and reports p50/p95/p99 ingest
+latency and logs/minute. Uploads are queued (202 + X-Job-Id): each one is timed
+from the POST until its job, polled at /analyze/jobs/<id>, is done; failed jobs
+count as errors.
+
+Usage:
+    python -m benchmarks.bench_ingest [--mode upload|bulk|both] [--logs DIR] [--count 30]
+        [--concurrency 4] [--latency-ms 200] [--throughput-kbps 0] [--rate-429 0] [--failure-rate 0]
+
+Without --logs, small synthetic .zevtc files are generated (unique content, so
+single-flight dedupe doesn't collapse them).
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _serve(app, port: int):
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread
+
+
+def _make_logs(directory: Path, count: int, prefix: str) -> list[Path]:
+    directory.mkdir(parents=True, exist_ok=True)
+    logs = []
+    for i in range(count):
+        path = directory / f"{prefix}_{i:04d}.zevtc"
+        with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr(f"{prefix}_{i:04d}.evtc", b"EVTC20240101" + os.urandom(64 * 1024))
+        logs.append(path)
+    return logs
+
+
+def summarize(label: str, latencies_s: list[float], errors: int, wall_s: float) -> dict:
+    """Print and return p50/p95/p99 latency and throughput for one run."""
+    ok = len(latencies_s)
+    result = {"label": label, "ok": ok, "errors": errors, "wall_s": wall_s}
+    if ok >= 2:
+        q = statistics.quantiles(latencies_s, n=100, method="inclusive")
+        result.update(p50_ms=q[49] * 1000, p95_ms=q[94] * 1000, p99_ms=q[98] * 1000)
+    elif ok == 1:
+        result.update(p50_ms=latencies_s[0] * 1000, p95_ms=latencies_s[0] * 1000, p99_ms=latencies_s[0] * 1000)
+    result["logs_per_min"] = (ok / wall_s * 60.0) if wall_s > 0 else 0.0
+
+    print(f"📊 {label}")
+    print(f"   Ingested:    {ok} ok, {errors} errors in {wall_s:.2f}s")
+    if ok:
+        print(f"   Latency:     p50 {result['p50_ms']:.0f} ms | p95 {result['p95_ms']:.0f} ms | p99 {result['p99_ms']:.0f} ms")
+    print(f"   Throughput:  {result['logs_per_min']:.1f} logs/min")
+    print()
+    return result
+
+
+POLL_INTERVAL_S = 0.1
+JOB_TIMEOUT_S = 300.0
+
+
+def bench_upload(app_url: str, logs: list[Path], concurrency: int) -> dict:
+    import httpx
+
+    from app.services.ingest_jobs import STATUS_DONE, STATUS_FAILED
+
+    def _one(path: Path) -> tuple[bool, float]:
+        started = time.perf_counter()
+        with httpx.Client(timeout=300) as client:
+            with path.open("rb") as f:
+                resp = client.post(f"{app_url}/analyze/upload", files={"file": (path.name, f, "application/octet-stream")})
+            job_id = resp.headers.get("X-Job-Id")
+            if resp.status_code != 202 or not job_id:
+                return False, time.perf_counter() - started
+            while time.perf_counter() - started < JOB_TIMEOUT_S:
+                job = client.get(f"{app_url}/analyze/jobs/{job_id}", headers={"Accept": "application/json"}).json()
+                if job["status"] in (STATUS_DONE, STATUS_FAILED):
+                    return job["status"] == STATUS_DONE, time.perf_counter() - started
+                time.sleep(POLL_INTERVAL_S)
+        return False, time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(_one, logs))
+    wall_s = time.perf_counter() - started
+    latencies = [elapsed for ok, elapsed in results if ok]
+    return summarize(f"POST /analyze/upload (concurrency={concurrency})", latencies, len(results) - len(latencies), wall_s)
+
+
+def bench_bulk(logs_dir: Path) -> dict:
+    from app.db.base import SessionLocal
+    from app.scripts import bulk_import
+
+    latencies: list[float] = []
+    real_process = bulk_import.process_log_file_sync
+
+    def _timed(file_path, db):
+        started = time.perf_counter()
+        fight, error = real_process(file_path, db)
+        if not error:
+            latencies.append(time.perf_counter() - started)
+        return fight, error
+
+    bulk_import.process_log_file_sync = _timed
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        stats = bulk_import.bulk_import_logs(str(logs_dir), db)
+        wall_s = time.perf_counter() - started
+    finally:
+        db.close()
+        bulk_import.process_log_file_sync = real_process
+    return summarize("bulk_import", latencies, stats["errors"], wall_s)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Ingest benchmark against a local dps.report stand-in")
+    parser.add_argument("--mode", choices=("upload", "bulk", "both"), default="both")
+    parser.add_argument("--logs", type=Path, default=None, help="Directory of .evtc/.zevtc logs")
+    parser.add_argument("--count", type=int, default=30, help="Synthetic logs per mode when --logs is not given")
+    parser.add_argument("--concurrency", type=int, default=4)
+
+    work_dir = Path(tempfile.mkdtemp(prefix="wvw_bench_"))
+    stub_port = _free_port()
+    # Must be set before the app modules (settings, engine) are imported, the stand-in included
+    os.environ["DATABASE_URL"] = f"sqlite:///{work_dir / 'bench.db'}"
+    os.environ["DPS_REPORT_BASE_URL"] = f"http://127.0.0.1:{stub_port}"
+    os.environ["DPS_REPORT_CACHE_DIR"] = str(work_dir / "dps_cache")
+    os.environ["DPS_REPORT_ENABLED"] = "1"
+
+    from benchmarks import dps_report_stub
+
+    dps_report_stub.add_arguments(parser)
+    args = parser.parse_args()
+
+    from app.db.base import init_db
+    from app.main import app
+
+    init_db()
+    stub_app = dps_report_stub.create_stub_app(dps_report_stub.config_from_args(args))
+    _serve(stub_app, stub_port)
+    app_port = _free_port()
+    _serve(app, app_port)
+
+    print("=" * 80)
+    print("🚀 WvW Analytics - Ingest Benchmark (dps.report stand-in)")
+    print("=" * 80)
+    print(f"Stand-in: http://127.0.0.1:{stub_port} ({len(stub_app.state.sources)} source JSONs)")
+    print(f"Work dir: {work_dir}")
+    print()
+
+    results = []
+    if args.mode in ("upload", "both"):
+        logs = sorted(args.logs.rglob("*.*evtc")) if args.logs else _make_logs(work_dir / "upload_logs", args.count, "upload")
+        results.append(bench_upload(f"http://127.0.0.1:{app_port}", logs, args.concurrency))
+    if args.mode in ("bulk", "both"):
+        logs_dir = args.logs or work_dir / "bulk_logs"
+        if not args.logs:
+            _make_logs(logs_dir, args.count, "bulk")
+        results.append(bench_bulk(logs_dir))
+
+    stats = stub_app.state.stats
+    print(f"Stand-in: {stats.uploads} uploads, {stats.get_json} getJson, {stats.throttled} x 429, {stats.failed} x 500")
+    if any(r["errors"] for r in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
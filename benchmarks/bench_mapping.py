@@ -0,0 +1,101 @@
+"""
+Mapping benchmark over the reference EI JSONs (data/dps_report) or synthetic fights.
+
+Times the shared mapping engine end to end through each JSON source adapter
+(dps.report getJson, local EI CLI output), plus the buff resolution step alone:
+the per-player id index against the old linear scans (14 boons x 4 tables per player).
+
+Usage:
+    python -m benchmarks.bench_mapping [--source data/dps_report] [--repeat 5]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+from app.services.mapping_core import (
+    BOON_IDS,
+    BuffIndex,
+    _find_buff_entries,
+    _flatten_entries,
+)
+from app.services.mapping_sources import DPS_REPORT, EI_CLI, map_fight
+from benchmarks.synthetic import make_ei_json
+
+UPTIME_KEYS = ["buffUptimesActive", "buffUptimes"]
+GENERATION_KEYS = ["buffGenerations", "buffGenerationsActive"]
+
+
+def _scan_buff_entries(player: Dict[str, Any], keys: list[str], buff_id: int) -> list[Dict[str, Any]]:
+    """Reference: the linear scan the mapper used before the per-player index."""
+    for key in keys:
+        for entry in _flatten_entries(player.get(key, []) or []):
+            if entry.get("id") == buff_id:
+                data = entry.get("buffData")
+                return data if isinstance(data, list) and data else [entry]
+    return []
+
+
+def _resolve_scan(players: list[Dict[str, Any]]) -> None:
+    for player in players:
+        for buff_id in BOON_IDS.values():
+            _scan_buff_entries(player, UPTIME_KEYS, buff_id)
+            _scan_buff_entries(player, GENERATION_KEYS, buff_id) or _scan_buff_entries(player, UPTIME_KEYS[::-1], buff_id)
+
+
+def _resolve_indexed(players: list[Dict[str, Any]]) -> None:
+    for player in players:
+        index = BuffIndex(player)
+        for buff_id in BOON_IDS.values():
+            _find_buff_entries(player, UPTIME_KEYS, buff_id, index)
+            _find_buff_entries(player, GENERATION_KEYS, buff_id, index) or _find_buff_entries(
+                player, UPTIME_KEYS[::-1], buff_id, index
+            )
+
+
+def best_of(fn: Callable[[], Any], repeat: int) -> float:
+    """Best wall time in ms over `repeat` runs."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000.0
+
+
+def load_documents(source: Path) -> dict[str, Dict[str, Any]]:
+    """Reference JSONs from `source`, or synthetic 50v50 / 100v100 fights if none exist."""
+    docs = {p.name: json.loads(p.read_text(encoding="utf-8")) for p in sorted(source.glob("*.json"))} if source.exists() else {}
+    if not docs:
+        docs = {
+            "synthetic 50v50": make_ei_json(50, 50, seed=1),
+            "synthetic 100v100": make_ei_json(100, 100, seed=2),
+        }
+    return docs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="dps.report mapping benchmark")
+    parser.add_argument("--source", type=Path, default=Path("data/dps_report"))
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("🚀 WvW Analytics - Mapping Benchmark")
+    print("=" * 80)
+    sources = (DPS_REPORT, EI_CLI)
+    header = "".join(f" {s.name + ' ms':>14s}" for s in sources)
+    print(f"{'document':40s} {'players':>7s}{header} {'buff scan ms':>13s} {'buff index ms':>14s}")
+    for name, doc in load_documents(args.source).items():
+        players = (doc.get("players") or []) + (doc.get("enemyPlayers") or [])
+        map_ms = "".join(f" {best_of(lambda: map_fight(doc, s), args.repeat):14.1f}" for s in sources)
+        scan_ms = best_of(lambda: _resolve_scan(players), args.repeat)
+        index_ms = best_of(lambda: _resolve_indexed(players), args.repeat)
+        print(f"{name[:40]:40s} {len(players):7d}{map_ms} {scan_ms:13.1f} {index_ms:14.1f}")
+
+
+if __name__ == "__main__":
+    main()
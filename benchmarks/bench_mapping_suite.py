@@ -0,0 +1,221 @@
+"""
+Mapping micro-benchmark suite with a stored baseline.
+
+For each reference EI JSON in data/dps_report (or a synthetic fight when there are
+none) and for variants scaled to 10, 50 and 150 players, four stages are timed on
+their own:
+
+- map:     map_dps_json_to_models (JSON -> Fight/PlayerStats)
+- roles:   detect_player_role for every mapped player
+- orm:     building Fight/PlayerStats instances from already-extracted columns
+- persist: insert_fight_rows (bulk Core INSERTs, META rollups, squad boon table)
+           into an in-memory SQLite session, with the rows and the boon table built
+           beforehand as the ingest workers do
+
+Each stage also runs once under tracemalloc to report its peak allocation.
+
+Timings are divided by a fixed pure-Python calibration loop before being compared,
+so one baseline holds across machines. A stage regresses when its normalized time
+is more than --tolerance above the baseline. The script then exits with status 1.
+
+Usage:
+    python -m benchmarks.bench_mapping_suite [--repeat 5] [--tolerance 0.5]
+    python -m benchmarks.bench_mapping_suite --save-baseline
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.db.models import Fight, PlayerStats
+from app.services.dps_mapping import map_dps_json_to_models
+from app.services import squad_boons
+from app.services.fight_store import fight_row, insert_fight_rows, player_rows
+from app.services.roles_service_v2 import detect_player_role
+from benchmarks.synthetic import make_ei_json, scale_players
+
+DEFAULT_BASELINE = Path(__file__).parent / "baselines" / "mapping_suite.json"
+SIZES = (10, 50, 150)
+STAGES = ("map", "roles", "orm", "persist")
+NOISE_FLOOR_MS = 5.0
+
+
+def best_of(fn: Callable[[], Any], repeat: int) -> float:
+    """Best wall time in ms over `repeat` runs (GC paused while timing, like timeit)."""
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            started = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - started)
+        finally:
+            gc.enable()
+    return min(timings) * 1000.0
+
+
+def peak_kib(fn: Callable[[], Any]) -> float:
+    """Peak traced allocation (KiB) above the starting level while fn runs."""
+    tracemalloc.start()
+    try:
+        start, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return (peak - start) / 1024.0
+
+
+def calibration_ms(repeat: int = 5) -> float:
+    """Fixed dict/str workload used to normalize timings across machines."""
+
+    def work() -> None:
+        data = {}
+        for i in range(200_000):
+            data[f"k{i % 5000}"] = data.get(f"k{(i * 7) % 5000}", 0) + i
+
+    return best_of(work, repeat)
+
+
+def load_documents(source: Path, sizes: tuple[int, ...] = SIZES) -> dict[str, Dict[str, Any]]:
+    """Reference JSONs (or one synthetic fight) plus each scaled to `sizes` players."""
+    refs = {p.stem: json.loads(p.read_text(encoding="utf-8")) for p in sorted(source.glob("*.json"))} if source.exists() else {}
+    if not refs:
+        refs = {"synthetic": make_ei_json(30, 30, seed=7)}
+    docs: dict[str, Dict[str, Any]] = {}
+    for name, doc in refs.items():
+        docs[name] = doc
+        for n in sizes:
+            docs[f"{name}@{n}"] = scale_players(doc, n - n // 2, n // 2)
+    return docs
+
+
+def _columns(obj: Any) -> Dict[str, Any]:
+    return {c.name: getattr(obj, c.name) for c in obj.__table__.columns if c.name not in {"id", "fight_id"}}
+
+
+def measure(doc: Dict[str, Any], repeat: int) -> Dict[str, Dict[str, float]]:
+    """{stage: {"ms": best time, "peak_kib": tracemalloc peak}} for one document."""
+    mapped = map_dps_json_to_models(doc)
+    fight_cols = _columns(mapped.fight)
+    player_cols = [_columns(ps) for ps in mapped.player_stats]
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+
+    def roles() -> None:
+        for ps in mapped.player_stats:
+            detect_player_role(ps)
+
+    def orm() -> None:
+        fight = Fight(**fight_cols)
+        fight.player_stats = [PlayerStats(**cols) for cols in player_cols]
+
+    mapped.fight.evtc_filename = "bench.zevtc"
+    # Built in the worker process on the real ingest path, not in the writer
+    rows = fight_row(mapped.fight)
+    players = player_rows(mapped.player_stats)
+    boon_uptimes = squad_boons.summary_rows(mapped.fight.duration_ms, mapped.player_stats)
+
+    def persist() -> None:
+        with Session() as session:
+            insert_fight_rows(session, rows, players, boon_uptimes)
+            session.rollback()
+
+    stages: dict[str, Callable[[], Any]] = {
+        "map": lambda: map_dps_json_to_models(doc),
+        "roles": roles,
+        "orm": orm,
+        "persist": persist,
+    }
+    results = {stage: {"ms": best_of(fn, repeat), "peak_kib": peak_kib(fn)} for stage, fn in stages.items()}
+    engine.dispose()
+    return results
+
+
+def compare(
+    results: Dict[str, Dict[str, Dict[str, float]]],
+    calib_ms: float,
+    baseline: Optional[Dict[str, Any]],
+    tolerance: float,
+) -> list[str]:
+    """Regression messages for stages slower than baseline * (1 + tolerance)."""
+    if not baseline:
+        return []
+    regressions = []
+    stored = baseline.get("stages", {})
+    for doc, stages in results.items():
+        for stage, values in stages.items():
+            ref = stored.get(f"{doc}/{stage}")
+            if ref is None:
+                continue
+            normalized = values["ms"] / calib_ms
+            # Stages of a few milliseconds are dominated by scheduler noise
+            if values["ms"] >= NOISE_FLOOR_MS and normalized > ref * (1.0 + tolerance):
+                regressions.append(f"{doc}/{stage}: {normalized:.3f} vs baseline {ref:.3f} (+{(normalized / ref - 1) * 100:.0f}%)")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Mapping micro-benchmark suite")
+    parser.add_argument("--source", type=Path, default=Path("data/dps_report"))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Allowed slowdown vs baseline (0.5 = 50%%)")
+    parser.add_argument("--save-baseline", action="store_true", help="Write the current run as the new baseline")
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("🚀 WvW Analytics - Mapping Benchmark Suite")
+    print("=" * 80)
+    calib = calibration_ms()
+    print(f"Calibration: {calib:.1f} ms")
+    print()
+    print(f"{'document':32s} {'players':>7s} " + " ".join(f"{s + ' ms':>10s} {'KiB':>8s}" for s in STAGES))
+
+    results: Dict[str, Dict[str, Dict[str, float]]] = {}
+    for name, doc in load_documents(args.source).items():
+        players = len(doc.get("players") or []) + len(doc.get("enemyPlayers") or [])
+        results[name] = measure(doc, args.repeat)
+        cells = " ".join(f"{results[name][s]['ms']:10.1f} {results[name][s]['peak_kib']:8.0f}" for s in STAGES)
+        print(f"{name[:32]:32s} {players:7d} {cells}")
+    print()
+
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "calibration_ms": calib,
+            "stages": {f"{doc}/{stage}": round(v["ms"] / calib, 4) for doc, stages in results.items() for stage, v in stages.items()},
+        }
+        args.baseline.write_text(json.dumps(payload, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        print(f"💾 Baseline written to {args.baseline}")
+        return
+
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8")) if args.baseline.exists() else None
+    if baseline is None:
+        print("ℹ️  No baseline found; run with --save-baseline to create one.")
+        return
+    regressions = compare(results, calib, baseline, args.tolerance)
+    if regressions:
+        print("❌ Regressions:")
+        for line in regressions:
+            print(f"   {line}")
+        sys.exit(1)
+    print(f"✅ All stages within {args.tolerance * 100:.0f}% of baseline")
+
+
+if __name__ == "__main__":
+    main()
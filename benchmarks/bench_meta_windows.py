@@ -0,0 +1,150 @@
+"""
+META response time per time window as the archive grows.
+
+A synthetic SQLite archive (benchmarks.synthetic_db) grows the way a real one
+does: the same community (--roster accounts) uploading --fights-per-day, with
+each --sizes step adding older history. At every size, get_meta_stats
+(uncached) is timed for each window: all time, the last 7/30/90 days and a
+patch-like window. For contrast, the all-time (spec, role) breakdown is also
+timed straight from fights/player_stats ("raw all").
+
+The windows sum a fixed number of daily rollup buckets, so their times should
+stay flat while "raw all" grows with the archive. All time sums one bucket per
+day of history: it grows with the number of days, not with fights x players.
+The script exits with status 1 if a fixed window's time at the largest size is
+more than --max-growth times its time at the smallest size.
+
+Usage:
+    python -m benchmarks.bench_meta_windows [--sizes 2000 8000 32000] [--fights-per-day 40] [--repeat 5]
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+from app.db.base import Base
+from app.db.models import Fight, FightContext, PlayerStats
+from app.services.meta_service import get_meta_stats
+from app.services.meta_windows import ALL_TIME, MetaWindow, available_windows
+from benchmarks.synthetic_db import populate
+
+
+
+def median_ms(fn: Callable[[], object], repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - started) * 1000.0)
+    times.sort()
+    return times[len(times) // 2]
+
+
+def bench_windows(today=None) -> list[MetaWindow]:
+    """The standard windows plus a 30-day patch-like window ending 15 days ago."""
+    today = today or datetime.utcnow().date()
+    patch = MetaWindow("patch", "Patch", since=today - timedelta(days=45), until=today - timedelta(days=15))
+    windows = available_windows(today, patches_file=Path("/nonexistent"))
+    return [w for w in windows if not w.key.startswith("patch-")] + [patch]
+
+
+def raw_breakdown(db: Session, context: FightContext):
+    return db.execute(
+        select(PlayerStats.elite_spec, PlayerStats.detected_role, func.count(PlayerStats.id))
+        .join(Fight, Fight.id == PlayerStats.fight_id)
+        .where(Fight.context == context)
+        .group_by(PlayerStats.elite_spec, PlayerStats.detected_role)
+    ).all()
+
+
+def measure(db: Session, windows: list[MetaWindow], repeat: int) -> Dict[str, float]:
+    context = FightContext.ZERG
+    results = {
+        window.key: median_ms(lambda: get_meta_stats(db, context, window.since, window.until), repeat)
+        for window in windows
+    }
+    results["raw all"] = median_ms(lambda: raw_breakdown(db, context), repeat)
+    return results
+
+
+def run(
+    sizes: list[int], fights_per_day: float, players: int, roster: int, repeat: int, db_path: Path
+) -> Dict[int, Dict[str, float]]:
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(engine)
+    windows = bench_windows()
+    results: Dict[int, Dict[str, float]] = {}
+    current = 0
+    for size in sorted(sizes):
+        # Older history: the new fights go before everything inserted so far
+        populate(
+            engine,
+            n_fights=size - current,
+            players_per_fight=players,
+            days=(size - current) / fights_per_day,
+            seed=size,
+            roster=roster,
+            offset_days=current / fights_per_day,
+        )
+        current = size
+        with Session(bind=engine) as db:
+            results[size] = measure(db, windows, repeat)
+    engine.dispose()
+    return results
+
+
+def growth(results: Dict[int, Dict[str, float]]) -> Dict[str, float]:
+    """Largest-size time over smallest-size time, per column."""
+    smallest, largest = results[min(results)], results[max(results)]
+    return {key: largest[key] / smallest[key] if smallest[key] > 0 else 0.0 for key in smallest}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="META time-window benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2000, 8000, 32000], help="Archive sizes (fights)")
+    parser.add_argument("--fights-per-day", type=float, default=40.0)
+    parser.add_argument("--players", type=int, default=15, help="Players per fight")
+    parser.add_argument("--roster", type=int, default=300, help="Accounts the players are drawn from")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-growth", type=float, default=3.0, help="Allowed window slowdown, largest vs smallest size")
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("🚀 WvW Analytics - META Time-Window Benchmark")
+    print("=" * 80)
+    print(
+        f"Sizes: {args.sizes} fights x {args.players} players, {args.fights_per_day:g} fights/day, "
+        f"{args.roster} accounts"
+    )
+    print()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = run(
+            args.sizes, args.fights_per_day, args.players, args.roster, args.repeat, Path(tmp) / "meta_bench.db"
+        )
+
+    columns = list(results[min(results)])
+    print(f"{'fights':>8s} " + " ".join(f"{c + ' ms':>10s}" for c in columns))
+    for size, row in results.items():
+        print(f"{size:8d} " + " ".join(f"{row[c]:10.2f}" for c in columns))
+    ratios = growth(results)
+    print(f"{'growth':>8s} " + " ".join(f"{ratios[c]:9.1f}x" for c in columns))
+    print()
+
+    too_slow = [key for key, ratio in ratios.items() if key not in {ALL_TIME, "raw all"} and ratio > args.max_growth]
+    if too_slow:
+        print(f"❌ Windows slower than {args.max_growth:.1f}x at the largest size: {', '.join(too_slow)}")
+        sys.exit(1)
+    print(f"✅ Every fixed window within {args.max_growth:.1f}x of its time at the smallest size")
+
+
+if __name__ == "__main__":
+    main()
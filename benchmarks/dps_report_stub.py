@@ -0,0 +1,199 @@
+"""
+Local stand-in for dps.report (`/uploadContent` + `/getJson`) for load and integration runs.
+
+Uploaded logs are answered with a permalink pointing at one of the cached EI JSONs
+in the source directory (data/dps_report by default), chosen deterministically from
+the upload's content hash. If the directory has no JSON, synthetic documents are
+generated. Latency, a shared throughput cap, 429s and failures can be injected.
+
+Usage:
+    python -m benchmarks.dps_report_stub [--port 9123] [--source data/dps_report]
+        [--latency-ms 200] [--throughput-kbps 2048] [--rate-429 0.05] [--failure-rate 0.01]
+
+Then point the app at it:
+    DPS_REPORT_BASE_URL=http://127.0.0.1:9123 uvicorn app.main:app
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import itertools
+import json
+import random
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from fastapi import FastAPI, File, Query, Request, UploadFile
+from fastapi.responses import FileResponse, JSONResponse
+
+from benchmarks.synthetic import make_ei_json
+
+
+@dataclass
+class StubConfig:
+    source_dir: Path
+    latency_ms: float = 0.0
+    throughput_kbps: float = 0.0  # 0 = unlimited; shared across all requests
+    rate_429: float = 0.0
+    failure_rate: float = 0.0
+    seed: int = 0
+    synthetic_docs: int = 3
+
+
+@dataclass
+class StubStats:
+    uploads: int = 0
+    get_json: int = 0
+    throttled: int = 0
+    failed: int = 0
+    bytes_in: int = 0
+    bytes_out: int = 0
+
+
+class _Throttle:
+    """Shared bandwidth cap: every transfer reserves its slot on one timeline."""
+
+    def __init__(self, bytes_per_s: float) -> None:
+        self.bytes_per_s = bytes_per_s
+        self._next_free = 0.0
+        self._lock = threading.Lock()
+
+    def delay_for(self, size: int) -> float:
+        if self.bytes_per_s <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_free)
+            self._next_free = start + size / self.bytes_per_s
+            return self._next_free - now
+
+
+def _load_sources(config: StubConfig) -> list[Path]:
+    sources = sorted(config.source_dir.glob("*.json")) if config.source_dir.exists() else []
+    if sources:
+        return sources
+    tmp_dir = Path(tempfile.mkdtemp(prefix="dps_report_stub_"))
+    for i in range(config.synthetic_docs):
+        path = tmp_dir / f"synthetic{i}.json"
+        path.write_text(json.dumps(make_ei_json(seed=config.seed + i)), encoding="utf-8")
+        sources.append(path)
+    return sources
+
+
+def create_stub_app(config: StubConfig) -> FastAPI:
+    """Build the stand-in FastAPI app."""
+    app = FastAPI(title="dps.report stand-in")
+    sources = _load_sources(config)
+    rng = random.Random(config.seed)
+    rng_lock = threading.Lock()
+    throttle = _Throttle(config.throughput_kbps * 1024)
+    slugs: dict[str, Path] = {}
+    counter = itertools.count(1)
+    stats = StubStats()
+    app.state.stats = stats
+    app.state.sources = sources
+
+    def _roll(rate: float) -> bool:
+        with rng_lock:
+            return rate > 0 and rng.random() < rate
+
+    async def _inject(size: int) -> Optional[JSONResponse]:
+        delay = config.latency_ms / 1000.0 + throttle.delay_for(size)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if _roll(config.rate_429):
+            stats.throttled += 1
+            return JSONResponse({"error": "Too many requests"}, status_code=429, headers={"Retry-After": "1"})
+        if _roll(config.failure_rate):
+            stats.failed += 1
+            return JSONResponse({"error": "Injected failure"}, status_code=500)
+        return None
+
+    @app.post("/uploadContent")
+    async def upload_content(
+        request: Request,
+        file: UploadFile = File(...),
+        json_flag: int = Query(1, alias="json"),
+    ):
+        digest = hashlib.sha256()
+        size = 0
+        while chunk := await file.read(1024 * 1024):
+            digest.update(chunk)
+            size += len(chunk)
+        stats.bytes_in += size
+        error = await _inject(size)
+        if error is not None:
+            return error
+        stats.uploads += 1
+        source = sources[int(digest.hexdigest(), 16) % len(sources)]
+        slug = f"{source.stem}-{next(counter)}"
+        slugs[slug] = source
+        base = str(request.base_url).rstrip("/")
+        return {"id": slug, "permalink": f"{base}/{slug}", "uploadTime": int(time.time()), "encounter": {"success": True}}
+
+    @app.get("/getJson")
+    async def get_json(permalink: str = Query(...)):
+        slug = permalink.rstrip("/").split("/")[-1]
+        source = slugs.get(slug)
+        if source is None:
+            return JSONResponse({"error": "Unknown permalink"}, status_code=404)
+        size = source.stat().st_size
+        error = await _inject(size)
+        if error is not None:
+            return error
+        stats.get_json += 1
+        stats.bytes_out += size
+        return FileResponse(source, media_type="application/json")
+
+    @app.get("/stats")
+    async def get_stats():
+        return {
+            "uploads": stats.uploads,
+            "get_json": stats.get_json,
+            "throttled": stats.throttled,
+            "failed": stats.failed,
+            "bytes_in": stats.bytes_in,
+            "bytes_out": stats.bytes_out,
+        }
+
+    return app
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--source", type=Path, default=Path("data/dps_report"), help="Directory of cached EI JSONs")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--throughput-kbps", type=float, default=0.0, help="Shared bandwidth cap (0 = unlimited)")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Probability of answering 429")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Probability of answering 500")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def config_from_args(args: argparse.Namespace) -> StubConfig:
+    return StubConfig(
+        source_dir=args.source,
+        latency_ms=args.latency_ms,
+        throughput_kbps=args.throughput_kbps,
+        rate_429=args.rate_429,
+        failure_rate=args.failure_rate,
+        seed=args.seed,
+    )
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Local dps.report stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9123)
+    add_arguments(parser)
+    args = parser.parse_args()
+    uvicorn.run(create_stub_app(config_from_args(args)), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Synthetic EI (dps.report getJson) documents for benchmarks and stand-in servers.
+
+The shape follows what `map_dps_json_to_models` reads (players/enemyPlayers, buff
+tables, boonGraph states, phase 0 stat tables) plus some bulk (rotation) so that
+parse and transfer costs look like real WvW logs.
+"""
+from __future__ import annotations
+
+import random
+from typing import Any, Dict, Optional
+
+from app.services.mapping_core import BOON_IDS
+
+EXTRA_BUFFS = 120
+
+SPECS = [
+    ("Guardian", "Firebrand"),
+    ("Necromancer", "Scourge"),
+    ("Warrior", "Spellbreaker"),
+    ("Revenant", "Herald"),
+    ("Elementalist", "Tempest"),
+    ("Mesmer", "Chronomancer"),
+    ("Engineer", "Scrapper"),
+    ("Ranger", "Druid"),
+    ("Thief", "Deadeye"),
+]
+
+
+def _states(rng: random.Random, duration_s: float, stacks: bool) -> list[list[float]]:
+    t = 0.0
+    states: list[list[float]] = []
+    while t < duration_s:
+        value = rng.randint(1, 25) if stacks else rng.choice((0, 1))
+        states.append([round(t, 3), value])
+        t += rng.uniform(0.5, 8.0)
+    states.append([round(duration_s, 3), 0])
+    return states
+
+
+def _player(rng: random.Random, idx: int, group: int, duration_ms: int, ally: bool) -> Dict[str, Any]:
+    prof, elite = SPECS[idx % len(SPECS)]
+    duration_s = duration_ms / 1000.0
+    buff_uptimes: list[Dict[str, Any]] = []
+    buff_generations: list[Dict[str, Any]] = []
+    boon_graph = []
+    for name, buff_id in BOON_IDS.items():
+        states = _states(rng, duration_s, stacks=(name == "might"))
+        buff_uptimes.append(
+            {"id": buff_id, "buffData": [{"uptime": round(rng.uniform(0, 100), 2), "presence": 0, "states": states}]}
+        )
+        buff_generations.append({"id": buff_id, "buffData": [{"generation": round(rng.uniform(0, 30), 3)}]})
+        boon_graph.append({"id": buff_id, "states": states})
+    # Real logs list 100+ non-boon buffs (sigils, traits, conditions) per player
+    for extra_id in range(EXTRA_BUFFS):
+        buff_uptimes.append({"id": 50_000 + extra_id, "buffData": [{"uptime": round(rng.uniform(0, 100), 2)}]})
+        buff_generations.append({"id": 50_000 + extra_id, "buffData": [{"generation": 0.0}]})
+    return {
+        "name": f"{'Ally' if ally else 'Foe'} {idx}",
+        "account": f"player{idx}.{1000 + idx}",
+        "group": group,
+        "profession": prof,
+        "eliteSpec": elite,
+        "dpsAll": [{"damage": rng.randint(10_000, 900_000), "dps": rng.randint(100, 9000), "breakbarDamage": 0}],
+        "statsAll": [
+            {
+                "downed": rng.randint(0, 5),
+                "killed": rng.randint(0, 5),
+                "evaded": rng.randint(0, 30),
+                "blocked": rng.randint(0, 30),
+                "missed": rng.randint(0, 10),
+                "interrupts": rng.randint(0, 3),
+                "dodgeCount": rng.randint(0, 40),
+                "swapCount": rng.randint(0, 20),
+                "stackDist": rng.uniform(100, 2000),
+                "distToCom": rng.uniform(100, 2000),
+                "skillCastUptime": rng.uniform(20, 80),
+                "skillCastUptimeNoAA": rng.uniform(10, 60),
+            }
+        ],
+        "support": [
+            {
+                "condiCleanse": rng.randint(0, 200),
+                "condiCleanseSelf": rng.randint(0, 50),
+                "boonStrips": rng.randint(0, 100),
+                "healing": rng.randint(0, 500_000),
+                "barrier": rng.randint(0, 200_000),
+                "resurrects": rng.randint(0, 3),
+                "stunBreak": rng.randint(0, 5),
+            }
+        ],
+        "defenses": [
+            {
+                "damageTaken": rng.randint(0, 500_000),
+                "damageBarrier": rng.randint(0, 100_000),
+                "downCount": rng.randint(0, 3),
+                "deadCount": rng.randint(0, 2),
+                "deadDuration": rng.randint(0, duration_ms // 4),
+                "dcDuration": 0,
+            }
+        ],
+        "buffUptimes": buff_uptimes,
+        "buffGenerations": buff_generations,
+        "details": {"boonGraph": boon_graph},
+        "rotation": [
+            {"id": 1000 + s, "skills": [{"castTime": rng.randint(0, duration_ms), "duration": 500} for _ in range(40)]}
+            for s in range(10)
+        ],
+    }
+
+
+def make_ei_json(n_allies: int = 50, n_enemies: int = 50, duration_ms: int = 180_000, seed: int = 0) -> Dict[str, Any]:
+    """
+    Build a synthetic EI JSON document with the requested player counts.
+    """
+    rng = random.Random(seed)
+    allies = [_player(rng, i, 1 + i // 5, duration_ms, ally=True) for i in range(n_allies)]
+    enemies = [_player(rng, i, 0, duration_ms, ally=False) for i in range(n_enemies)]
+
+    def _row(width: int) -> list[float]:
+        return [rng.randint(0, 1000) for _ in range(width)]
+
+    return {
+        "eiEncounterID": 1,
+        "fightName": "Detailed WvW - Synthetic",
+        "durationMS": duration_ms,
+        "success": rng.choice((True, False)),
+        "mapID": 38,
+        "players": allies,
+        "enemyPlayers": enemies,
+        "phases": [
+            {
+                "name": "Full Fight",
+                "duration": duration_ms,
+                "dpsStats": [_row(4) for _ in allies],
+                "defStats": [_row(19) for _ in allies],
+                "supportStats": [_row(10) for _ in allies],
+                "gameplayStats": [_row(9) for _ in allies],
+            }
+        ],
+    }
+
+
+def scale_players(json_data: Dict[str, Any], n_allies: int, n_enemies: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Resize a real EI document to n_allies (and optionally n_enemies) by cycling its
+    players and phase rows.
+    """
+    players = json_data.get("players") or []
+    if not players:
+        return json_data
+    scaled = dict(json_data)
+    scaled["players"] = [dict(players[i % len(players)], name=f"{players[i % len(players)].get('name')} #{i}") for i in range(n_allies)]
+    enemies = json_data.get("enemyPlayers") or []
+    if n_enemies is not None:
+        scaled["enemyPlayers"] = [
+            dict(enemies[i % len(enemies)], name=f"{enemies[i % len(enemies)].get('name')} #{i}") for i in range(n_enemies)
+        ] if enemies else []
+    phases = []
+    for phase_idx, phase in enumerate(json_data.get("phases") or []):
+        phase = dict(phase)
+        if phase_idx == 0:
+            for key in ("dpsStats", "defStats", "supportStats", "gameplayStats"):
+                rows = phase.get(key) or []
+                if rows:
+                    phase[key] = [rows[i % len(rows)] for i in range(n_allies)]
+        phases.append(phase)
+    scaled["phases"] = phases
+    return scaled
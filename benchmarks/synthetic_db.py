@@ -0,0 +1,93 @@
+"""
+Synthetic database contents for query benchmarks and query-plan tests.
+
+`populate` bulk-inserts fights and player rows directly (Core executemany, no
+mapping), spread over the last `days` days and over every context, so META and
+listing queries see realistic selectivity at any size. The META rollups are
+rebuilt afterwards, as ingestion would have kept them.
+"""
+from __future__ import annotations
+
+import random
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import insert, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.db.models import Fight, FightContext, FightResult, PlayerStats
+from app.services import meta_rollups
+from benchmarks.synthetic import SPECS
+
+ROLES = ("Pure DPS", "Strip DPS", "Healer", "Boon Support", "Stab Support", "Hybrid")
+CONTEXTS = (FightContext.ZERG, FightContext.GUILD_RAID, FightContext.ROAM, FightContext.UNKNOWN)
+RESULTS = (FightResult.VICTORY, FightResult.DEFEAT, FightResult.DRAW)
+
+
+def populate(
+    engine: Engine,
+    n_fights: int = 2000,
+    players_per_fight: int = 20,
+    days: int = 180,
+    seed: int = 0,
+    batch: int = 500,
+    roster: Optional[int] = None,
+    offset_days: float = 0.0,
+) -> None:
+    """
+    Insert n_fights fights with players_per_fight players each, rebuild the rollups, then ANALYZE.
+
+    Fights are spread over the `days` days ending `offset_days` ago. Players are
+    drawn from `roster` accounts (default: one per 4 fights, at least 50), with two
+    characters each.
+    """
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    accounts = [f"player{i}.{1000 + i}" for i in range(roster or max(50, n_fights // 4))]
+    fights_table = Fight.__table__
+    players_table = PlayerStats.__table__
+
+    with engine.begin() as conn:
+        next_id = (conn.execute(text("SELECT MAX(id) FROM fights")).scalar() or 0) + 1
+        for start in range(0, n_fights, batch):
+            fights = []
+            players = []
+            for fight_id in range(next_id + start, next_id + min(start + batch, n_fights)):
+                duration_ms = rng.randint(30_000, 900_000)
+                fights.append(
+                    {
+                        "id": fight_id,
+                        "evtc_filename": f"{fight_id:08d}.zevtc",
+                        "upload_timestamp": now - timedelta(days=offset_days, seconds=rng.uniform(0, days * 86400)),
+                        "duration_ms": duration_ms,
+                        "context": rng.choice(CONTEXTS),
+                        "result": rng.choice(RESULTS),
+                        "ally_count": players_per_fight,
+                        "enemy_count": players_per_fight,
+                    }
+                )
+                for slot in range(players_per_fight):
+                    prof, elite = rng.choice(SPECS)
+                    players.append(
+                        {
+                            "fight_id": fight_id,
+                            "is_ally": True,
+                            "character_name": f"Char {rng.randrange(len(accounts) * 2)}",
+                            "account_name": rng.choice(accounts),
+                            "profession": prof,
+                            "elite_spec": elite,
+                            "detected_role": rng.choice(ROLES),
+                            "subgroup": 1 + slot // 5,
+                            "total_damage": rng.randint(0, 2_000_000),
+                            "dps": rng.uniform(0, 10_000),
+                            "stability_uptime": rng.uniform(0, 100),
+                            "quickness_uptime": rng.uniform(0, 100),
+                            "might_uptime": rng.uniform(0, 25),
+                        }
+                    )
+            conn.execute(insert(fights_table), fights)
+            conn.execute(insert(players_table), players)
+        meta_rollups.rebuild(Session(bind=conn))
+        if engine.dialect.name in {"sqlite", "postgresql"}:
+            conn.execute(text("ANALYZE"))
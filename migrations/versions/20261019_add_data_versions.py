@@ -0,0 +1,33 @@
+"""add data_versions table for META cache invalidation
+
+Revision ID: 20261019_add_data_versions
+Revises: 20261019_add_meta_rollups
+Create Date: 2026-10-19 00:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261019_add_data_versions"
+down_revision = "20261019_add_meta_rollups"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if "data_versions" in inspector.get_table_names():
+        return
+
+    op.create_table(
+        "data_versions",
+        sa.Column("name", sa.String(), primary_key=True),
+        sa.Column("version", sa.String(length=32), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table("data_versions")
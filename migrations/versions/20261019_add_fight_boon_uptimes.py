@@ -0,0 +1,56 @@
+"""add fight_boon_uptimes (squad boon uptime table per fight)
+
+Revision ID: 20261019_add_fight_boon_uptimes
+Revises: 20261019_add_meta_spec_results
+Create Date: 2026-10-19 00:00:00.000000
+
+Existing fights get their rows with `python -m app.scripts.backfill_squad_boons`;
+until then the fight view computes the table on each request.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261019_add_fight_boon_uptimes"
+down_revision = "20261019_add_meta_spec_results"
+branch_labels = None
+depends_on = None
+
+
+BOONS = (
+    "might",
+    "fury",
+    "quickness",
+    "alacrity",
+    "protection",
+    "regeneration",
+    "vigor",
+    "aegis",
+    "stability",
+    "swiftness",
+    "resistance",
+    "resolution",
+    "superspeed",
+    "stealth",
+)
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if "fight_boon_uptimes" in inspector.get_table_names():
+        return
+
+    op.create_table(
+        "fight_boon_uptimes",
+        sa.Column("fight_id", sa.Integer(), sa.ForeignKey("fights.id"), primary_key=True),
+        sa.Column("subgroup", sa.Integer(), primary_key=True),
+        sa.Column("player_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("active_ms", sa.Float(), nullable=False, server_default="0"),
+        *[sa.Column(f"{boon}_uptime", sa.Float(), nullable=False, server_default="0") for boon in BOONS],
+    )
+
+
+def downgrade():
+    op.drop_table("fight_boon_uptimes")
@@ -0,0 +1,33 @@
+"""add ingest_jobs.session_id for multi-file upload sessions
+
+Revision ID: 20261019_add_ingest_job_sessions
+Revises: 20261019_add_ingest_jobs
+Create Date: 2026-10-19 00:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261019_add_ingest_job_sessions"
+down_revision = "20261019_add_ingest_jobs"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    columns = {col["name"] for col in inspector.get_columns("ingest_jobs")}
+    if "session_id" not in columns:
+        with op.batch_alter_table("ingest_jobs") as batch_op:
+            batch_op.add_column(sa.Column("session_id", sa.String(length=32), nullable=True))
+    indexes = {idx["name"] for idx in inspector.get_indexes("ingest_jobs")}
+    if "ix_ingest_jobs_session_id" not in indexes:
+        op.create_index("ix_ingest_jobs_session_id", "ingest_jobs", ["session_id"])
+
+
+def downgrade():
+    op.drop_index("ix_ingest_jobs_session_id", table_name="ingest_jobs")
+    with op.batch_alter_table("ingest_jobs") as batch_op:
+        batch_op.drop_column("session_id")
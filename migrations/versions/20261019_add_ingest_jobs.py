@@ -0,0 +1,44 @@
+"""add ingest_jobs table for background log ingestion
+
+Revision ID: 20261019_add_ingest_jobs
+Revises: 20261019_add_player_boon_timelines
+Create Date: 2026-10-19 00:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261019_add_ingest_jobs"
+down_revision = "20261019_add_player_boon_timelines"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if "ingest_jobs" in inspector.get_table_names():
+        return
+
+    op.create_table(
+        "ingest_jobs",
+        sa.Column("id", sa.String(length=32), primary_key=True),
+        sa.Column("filename", sa.String(), nullable=False),
+        sa.Column("file_path", sa.String(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False, server_default="queued"),
+        sa.Column("stage", sa.String(), nullable=False, server_default="queued"),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("owner", sa.String(), nullable=True),
+        sa.Column("fight_id", sa.Integer(), sa.ForeignKey("fights.id", ondelete="SET NULL"), nullable=True),
+        sa.Column("error", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_ingest_jobs_status", "ingest_jobs", ["status"])
+
+
+def downgrade():
+    op.drop_index("ix_ingest_jobs_status", table_name="ingest_jobs")
+    op.drop_table("ingest_jobs")
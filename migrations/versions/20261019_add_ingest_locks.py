@@ -0,0 +1,37 @@
+"""add ingest_locks table for single-flight log ingestion
+
+Revision ID: 20261019_add_ingest_locks
+Revises: d6fc23497851
+Create Date: 2026-10-19 00:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261019_add_ingest_locks"
+down_revision = "d6fc23497851"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if "ingest_locks" in inspector.get_table_names():
+        return
+
+    op.create_table(
+        "ingest_locks",
+        sa.Column("content_hash", sa.String(length=64), primary_key=True),
+        sa.Column("status", sa.String(), nullable=False, server_default="running"),
+        sa.Column("fight_id", sa.Integer(), sa.ForeignKey("fights.id", ondelete="SET NULL"), nullable=True),
+        sa.Column("owner", sa.String(), nullable=True),
+        sa.Column("error", sa.String(), nullable=True),
+        sa.Column("acquired_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table("ingest_locks")
@@ -0,0 +1,102 @@
+"""add daily META rollup tables
+
+Revision ID: 20261019_add_meta_rollups
+Revises: 20261019_add_query_indexes
+Create Date: 2026-10-19 00:00:00.000000
+
+The tables are filled on the next application start (meta_rollups.ensure_built),
+or with `python -m app.scripts.rebuild_meta_rollups`.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "20261019_add_meta_rollups"
+down_revision = "20261019_add_query_indexes"
+branch_labels = None
+depends_on = None
+
+
+CONTEXTS = ("ZERG", "GUILD_RAID", "ROAM", "UNKNOWN")
+
+SUM_COLUMNS = [
+    ("sum_total_damage", sa.BigInteger()),
+    ("sum_dps", sa.Float()),
+    ("sum_downs", sa.BigInteger()),
+    ("sum_kills", sa.BigInteger()),
+    ("sum_deaths", sa.BigInteger()),
+    ("sum_damage_taken", sa.BigInteger()),
+    ("sum_strips_out", sa.BigInteger()),
+    ("sum_cleanses", sa.BigInteger()),
+    ("sum_healing_out", sa.BigInteger()),
+    ("sum_barrier_out", sa.BigInteger()),
+    ("sum_stab_out_ms", sa.BigInteger()),
+    ("sum_active_ms", sa.Float()),
+]
+
+
+def _context_column():
+    # The fightcontext type already exists on Postgres (fights.context)
+    context_type = sa.Enum(*CONTEXTS, name="fightcontext").with_variant(
+        postgresql.ENUM(*CONTEXTS, name="fightcontext", create_type=False), "postgresql"
+    )
+    return sa.Column("context", context_type, primary_key=True)
+
+
+def _counter(name, type_=None):
+    return sa.Column(name, type_ or sa.Integer(), nullable=False, server_default="0")
+
+
+def upgrade():
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "meta_daily_totals" not in existing:
+        op.create_table(
+            "meta_daily_totals",
+            _context_column(),
+            sa.Column("day", sa.Date(), primary_key=True),
+            _counter("fights"),
+            _counter("wins"),
+            _counter("losses"),
+            _counter("draws"),
+            _counter("duration_ms", sa.BigInteger()),
+        )
+
+    if "meta_daily_spec_roles" not in existing:
+        op.create_table(
+            "meta_daily_spec_roles",
+            _context_column(),
+            sa.Column("day", sa.Date(), primary_key=True),
+            sa.Column("elite_spec", sa.String(), primary_key=True),
+            sa.Column("detected_role", sa.String(), primary_key=True),
+            _counter("players"),
+            _counter("wins"),
+            _counter("losses"),
+            _counter("draws"),
+            _counter("duration_ms", sa.BigInteger()),
+            *(_counter(name, type_) for name, type_ in SUM_COLUMNS),
+        )
+
+    if "meta_daily_players" not in existing:
+        op.create_table(
+            "meta_daily_players",
+            _context_column(),
+            sa.Column("day", sa.Date(), primary_key=True),
+            sa.Column("character_name", sa.String(), primary_key=True),
+            _counter("appearances"),
+        )
+        op.create_index(
+            "ix_meta_daily_players_context_character_name",
+            "meta_daily_players",
+            ["context", "character_name"],
+        )
+
+
+def downgrade():
+    op.drop_index("ix_meta_daily_players_context_character_name", table_name="meta_daily_players")
+    op.drop_table("meta_daily_players")
+    op.drop_table("meta_daily_spec_roles")
+    op.drop_table("meta_daily_totals")
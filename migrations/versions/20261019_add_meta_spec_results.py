@@ -0,0 +1,48 @@
+"""add meta_daily_spec_results rollup for spec win rates
+
+Revision ID: 20261019_add_meta_spec_results
+Revises: 20261019_add_data_versions
+Create Date: 2026-10-19 00:00:00.000000
+
+Filled on the next application start (meta_rollups.ensure_built), or with
+`python -m app.scripts.rebuild_meta_rollups`.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "20261019_add_meta_spec_results"
+down_revision = "20261019_add_data_versions"
+branch_labels = None
+depends_on = None
+
+
+CONTEXTS = ("ZERG", "GUILD_RAID", "ROAM", "UNKNOWN")
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if "meta_daily_spec_results" in inspector.get_table_names():
+        return
+
+    # The fightcontext type already exists on Postgres (fights.context)
+    context_type = sa.Enum(*CONTEXTS, name="fightcontext").with_variant(
+        postgresql.ENUM(*CONTEXTS, name="fightcontext", create_type=False), "postgresql"
+    )
+    op.create_table(
+        "meta_daily_spec_results",
+        sa.Column("context", context_type, primary_key=True),
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("elite_spec", sa.String(), primary_key=True),
+        sa.Column("fights", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("wins", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("losses", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("draws", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+
+def downgrade():
+    op.drop_table("meta_daily_spec_results")
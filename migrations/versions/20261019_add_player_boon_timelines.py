@@ -0,0 +1,28 @@
+"""add boon_timelines blob to player_stats for persisted boon state series
+
+Revision ID: 20261019_add_player_boon_timelines
+Revises: 20261019_add_ingest_locks
+Create Date: 2026-10-19 00:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261019_add_player_boon_timelines"
+down_revision = "20261019_add_ingest_locks"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    columns = {col["name"] for col in inspector.get_columns("player_stats")}
+    if "boon_timelines" not in columns:
+        op.add_column("player_stats", sa.Column("boon_timelines", sa.LargeBinary(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table("player_stats") as batch_op:
+        batch_op.drop_column("boon_timelines")
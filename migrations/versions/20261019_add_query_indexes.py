@@ -0,0 +1,43 @@
+"""add indexes for fight listing, dedupe and META queries
+
+Revision ID: 20261019_add_query_indexes
+Revises: 20261019_add_ingest_job_sessions
+Create Date: 2026-10-19 00:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261019_add_query_indexes"
+down_revision = "20261019_add_ingest_job_sessions"
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ("ix_fights_evtc_filename", "fights", ["evtc_filename"]),
+    ("ix_fights_upload_timestamp", "fights", ["upload_timestamp"]),
+    ("ix_fights_context_upload_timestamp", "fights", ["context", "upload_timestamp"]),
+    ("ix_player_stats_fight_id_elite_spec", "player_stats", ["fight_id", "elite_spec"]),
+    ("ix_player_stats_fight_id_detected_role", "player_stats", ["fight_id", "detected_role"]),
+    ("ix_player_stats_elite_spec_detected_role", "player_stats", ["elite_spec", "detected_role"]),
+    ("ix_player_stats_account_name", "player_stats", ["account_name"]),
+]
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    existing = {
+        table: {idx["name"] for idx in inspector.get_indexes(table)}
+        for table in ("fights", "player_stats")
+    }
+    for name, table, columns in INDEXES:
+        if name not in existing[table]:
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
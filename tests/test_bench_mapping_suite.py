@@ -0,0 +1,38 @@
+from pathlib import Path
+
+from benchmarks.bench_mapping_suite import compare, load_documents, measure
+
+
+def test_load_documents_scales_reference_to_each_size(tmp_path: Path):
+    docs = load_documents(tmp_path / "missing", sizes=(4, 10))
+
+    assert set(docs) == {"synthetic", "synthetic@4", "synthetic@10"}
+    sized = docs["synthetic@10"]
+    assert len(sized["players"]) + len(sized["enemyPlayers"]) == 10
+    assert len(sized["phases"][0]["dpsStats"]) == len(sized["players"])
+
+
+def test_measure_reports_every_stage():
+    doc = load_documents(Path("/nonexistent"), sizes=(4,))["synthetic@4"]
+    results = measure(doc, repeat=1)
+
+    assert set(results) == {"map", "roles", "orm", "persist"}
+    assert all(v["ms"] >= 0 and v["peak_kib"] >= 0 for v in results.values())
+
+
+def test_compare_flags_only_slowdowns_past_tolerance():
+    baseline = {"stages": {"a/map": 1.0, "a/roles": 1.0, "a/orm": 1.0}}
+    results = {
+        "a": {
+            "map": {"ms": 200.0},  # 2.0 normalized: regression
+            "roles": {"ms": 120.0},  # within 50%
+            "orm": {"ms": 2.0},  # below the noise floor
+            "persist": {"ms": 500.0},  # no baseline entry
+        }
+    }
+
+    regressions = compare(results, calib_ms=100.0, baseline=baseline, tolerance=0.5)
+
+    assert len(regressions) == 1
+    assert regressions[0].startswith("a/map")
+    assert compare(results, 100.0, None, 0.5) == []
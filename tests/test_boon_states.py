@@ -0,0 +1,105 @@
+import numpy as np
+import pytest
+
+from app.services import boon_states
+
+
+def _loop_active_ms(states):
+    """The interval loop the mapper and fight view used before StateSeries."""
+    states_sorted = sorted(states, key=lambda x: x[0])
+    active = 0.0
+    for (t, val), (t_next, _) in zip(states_sorted, states_sorted[1:]):
+        if val and val > 0:
+            active += max(0.0, t_next - t)
+    return active
+
+
+def test_active_ms_matches_interval_loop():
+    rng = np.random.default_rng(7)
+    times = np.sort(rng.uniform(0, 60_000, 200)).tolist()
+    states = [[t, int(v)] for t, v in zip(times, rng.integers(0, 3, 200))]
+    rng.shuffle(states)
+
+    assert boon_states.active_ms(states) == pytest.approx(_loop_active_ms(states))
+
+
+def test_series_conversion_skips_bad_samples_and_scales():
+    series = boon_states.to_series([[2, 1], "bad", [0, 1], [1, 0], [3, None]], time_scale=1000.0)
+
+    assert series.times.tolist() == [0.0, 1000.0, 2000.0, 3000.0]
+    assert series.values.tolist() == [1.0, 0.0, 1.0, 0.0]
+    assert boon_states.active_ms(series) == 2000.0
+    assert not boon_states.to_series([])
+
+
+def test_clipping_and_stack_weighted_average():
+    might = [[0, 10], [1000, 25], [3000, 0], [4000, 0]]
+
+    assert boon_states.active_ms(might, start=500, end=2000) == 1500.0
+    assert boon_states.stack_weighted_average(might) == pytest.approx((10 * 1000 + 25 * 2000) / 4000)
+    assert boon_states.stack_weighted_average(might, start=1000, end=3000) == pytest.approx(25.0)
+    assert boon_states.uptime_pct(might, duration_ms=2000) == 100.0
+
+
+def test_active_ms_many_matches_active_ms_per_series():
+    rng = np.random.default_rng(3)
+    many = [
+        [[t, int(v)] for t, v in zip(np.sort(rng.uniform(0, 10_000, n)).tolist(), rng.integers(0, 2, n))]
+        for n in (5, 0, 1, 40, 2)
+    ]
+
+    for start, end in ((None, None), (0.0, 6000.0), (2500.0, None)):
+        expected = [boon_states.active_ms(states, start, end) for states in many]
+        assert boon_states.active_ms_many(many, start, end).tolist() == pytest.approx(expected)
+    assert boon_states.active_ms_many([]).size == 0
+
+
+def test_timelines_round_trip_is_compact():
+    times = np.arange(0, 600_000, 250.0)
+    might = boon_states.StateSeries(times, (np.arange(times.size) % 25).astype(float))
+    quickness = boon_states.to_series([[0, 1], [1500, 0], [4000, 1], [9000, 0]])
+
+    blob = boon_states.encode_timelines({740: might, 1187: quickness, 725: []})
+    restored = boon_states.decode_timelines(blob)
+
+    assert restored[740].times.tolist() == times.tolist()
+    assert restored[740].values.tolist() == might.values.tolist()
+    assert boon_states.active_ms(restored[1187]) == 6500.0
+    assert len(restored[725]) == 0
+    assert len(blob) < times.nbytes // 10
+    assert boon_states.decode_timelines(None) == {}
+
+
+def test_timelines_persist_and_feed_boon_states(db_session):
+    from app.db.models import PlayerStats
+    from app.services.dps_mapping import BOON_IDS, map_dps_json_to_models
+
+    quickness = BOON_IDS["quickness"]
+    player = {
+        "name": "Player One",
+        "group": 1,
+        "dpsAll": [{"damage": 1}],
+        "details": {"boonGraph": [{"id": quickness, "states": [[0, 1], [2.5, 0], [4, 1], [6, 0]]}, {"id": 1, "states": [[0, 1]]}]},
+    }
+    mapped = map_dps_json_to_models({"durationMS": 6000, "players": [player]})
+    db_session.add(mapped.fight)
+    db_session.commit()
+    ps_id = mapped.player_stats[0].id
+    db_session.expunge_all()
+
+    ps = db_session.get(PlayerStats, ps_id)
+    assert "boon_timelines" not in ps.__dict__  # deferred until needed
+    assert list(ps.boon_states) == [quickness]  # only surfaced boons are stored
+    assert boon_states.active_ms(ps.boon_states[quickness]) == 4500.0
+
+
+def test_reassigned_timelines_replace_decoded_states():
+    from app.db.models import PlayerStats
+
+    ps = PlayerStats(boon_timelines=boon_states.encode_timelines({740: [[0, 1], [1000, 0]]}))
+    assert boon_states.active_ms(ps.boon_states[740]) == 1000.0
+
+    ps.boon_timelines = boon_states.encode_timelines({740: [[0, 1], [3000, 0]]})
+    assert boon_states.active_ms(ps.boon_states[740]) == 3000.0
+    ps.boon_timelines = None
+    assert ps.boon_states == {}
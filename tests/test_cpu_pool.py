@@ -0,0 +1,89 @@
+import json
+from pathlib import Path
+
+import httpx
+
+from app.config import settings
+from app.db.models import Fight
+from app.integrations import dps_report
+from app.services import cpu_pool, logs_service
+from app.services.dps_mapping import map_dps_json_to_models
+from app.services.fight_store import fight_row, player_rows
+from app.services.roles_service_v2 import detect_player_role
+from app.services.squad_boons import summary_rows
+from benchmarks.synthetic import make_ei_json
+
+
+def _cached_json(tmp_path: Path) -> Path:
+    path = tmp_path / "fight.json"
+    path.write_text(json.dumps(make_ei_json(5, 3, seed=11)), encoding="utf-8")
+    return path
+
+
+def test_pool_returns_the_same_rows_as_inline_mapping(tmp_path, monkeypatch):
+    path = _cached_json(tmp_path)
+    mapped = map_dps_json_to_models(json.loads(path.read_text()))
+    for ps in mapped.player_stats:
+        ps.detected_role, _ = detect_player_role(ps)
+    expected = {
+        "fight": fight_row(mapped.fight),
+        "players": player_rows(mapped.player_stats),
+        "boon_uptimes": summary_rows(mapped.fight.duration_ms, mapped.player_stats),
+    }
+
+    monkeypatch.setattr(settings, "CPU_POOL_WORKERS", 0)
+    assert cpu_pool.get_executor() is None
+    assert cpu_pool.run_cpu(cpu_pool.map_ei_file, str(path)) == expected
+
+    monkeypatch.setattr(settings, "CPU_POOL_WORKERS", 1)
+    try:
+        assert cpu_pool.run_cpu(cpu_pool.map_ei_file, str(path)) == expected
+    finally:
+        cpu_pool.shutdown()
+
+
+def test_cached_json_is_streamed_unless_disabled(tmp_path, monkeypatch):
+    path = _cached_json(tmp_path)
+    doc = json.loads(path.read_text())
+    doc["players"][0]["rotation"] = [{"id": 1, "skills": []}]
+    path.write_text(json.dumps(doc), encoding="utf-8")
+
+    monkeypatch.setattr(settings, "DPS_REPORT_STREAM_JSON", True)
+    assert "rotation" not in cpu_pool.load_cached_json(path)["players"][0]
+
+    monkeypatch.setattr(settings, "DPS_REPORT_STREAM_JSON", False)
+    assert cpu_pool.load_cached_json(path)["players"][0]["rotation"] == [{"id": 1, "skills": []}]
+    monkeypatch.setattr(cpu_pool, "STREAM_ABOVE_BYTES", 0)
+    assert "rotation" not in cpu_pool.load_cached_json(path)["players"][0]
+
+
+def test_dps_report_import_maps_cached_json_and_bulk_inserts(tmp_path, monkeypatch, db_session):
+    doc = make_ei_json(4, 2, seed=5)
+    real_client = httpx.Client
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/uploadContent":
+            return httpx.Response(200, json={"permalink": "https://dps.report/AbCd-pool"})
+        return httpx.Response(200, json=doc)
+
+    def client_factory(*args, **kwargs):
+        kwargs["transport"] = httpx.MockTransport(handler)
+        return real_client(*args, **kwargs)
+
+    monkeypatch.setattr(dps_report.httpx, "Client", client_factory)
+    monkeypatch.setattr(settings, "DPS_REPORT_CACHE_DIR", tmp_path / "cache")
+    monkeypatch.setattr(settings, "CPU_POOL_WORKERS", 0)
+    log = tmp_path / "0123.zevtc"
+    log.write_bytes(b"PK\x03\x04" + bytes(64))
+    stages = []
+
+    fight, error = logs_service.process_log_file_sync(log, db_session, progress=stages.append, original_name="evening.zevtc")
+
+    assert error is None
+    assert stages == ["validating", "uploading", "mapping", "saving"]
+    assert fight.evtc_filename == "evening.zevtc"
+    assert fight.dps_permalink == "https://dps.report/AbCd-pool"
+    assert Path(fight.dps_json_path).exists()
+    assert (fight.ally_count, fight.enemy_count) == (4, 2)
+    assert all(ps.detected_role for ps in fight.player_stats)
+    assert db_session.query(Fight).count() == 1
@@ -59,3 +59,54 @@ def test_outgoing_boons_clamped_to_duration():
     ps = mapped.player_stats[0]
     # durationMS is 60000 -> clamp expected
     assert ps.stab_out_ms == 60000
+
+
+def test_buff_index_keeps_first_entry_and_table_priority():
+    from app.services.mapping_core import BuffIndex, _find_buff_entries
+
+    player = {
+        "buffUptimesActive": [[{"id": 1187, "buffData": [{"uptime": 10}]}]],
+        "buffUptimes": [
+            {"id": 1187, "buffData": [{"uptime": 50}]},
+            {"id": 740, "buffData": [{"uptime": 20}]},
+            {"id": 740, "buffData": [{"uptime": 99}]},
+            {"id": 1122, "uptime": 5},
+        ],
+    }
+    index = BuffIndex(player)
+    keys = ["buffUptimesActive", "buffUptimes"]
+    assert _find_buff_entries(player, keys, 1187, index) == [{"uptime": 10}]
+    assert _find_buff_entries(player, keys, 740, index) == [{"uptime": 20}]
+    assert _find_buff_entries(player, keys, 1122, index) == [{"id": 1122, "uptime": 5}]
+    assert _find_buff_entries(player, keys, 717, index) == []
+
+
+class _Parser:
+    """Stands in for a parsed EVTCParser: one 60 s fight, one ally."""
+
+    def __init__(self, *players):
+        self._players = players
+
+    def get_combat_start_time(self):
+        return 1000
+
+    def get_combat_end_time(self):
+        return 61000
+
+    def get_map_id(self):
+        return 95
+
+    def extract_player_stats(self):
+        return {p.addr: p for p in self._players}
+
+
+def test_parser_fallback_stores_damage_per_second():
+    from app.parser.evtc_parser import PlayerStatsData
+    from app.services.mapping_sources import LOCAL_PARSER, map_fight
+
+    ally = PlayerStatsData(addr=1, character_name="Ally", subgroup=1, is_ally=True, total_damage=120000)
+    ps = map_fight(_Parser(ally), LOCAL_PARSER).player_stats[0]
+    assert ps.total_damage == 120000
+    assert ps.dps == 2000.0
+    # The EI JSON paths keep the total damage in `dps`
+    assert map_dps_json_to_models(_base_json()).player_stats[0].dps == 1000.0
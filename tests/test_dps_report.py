@@ -0,0 +1,67 @@
+import zipfile
+from pathlib import Path
+
+import httpx
+import pytest
+
+from app.integrations import dps_report
+
+
+@pytest.fixture
+def captured_uploads(monkeypatch):
+    """Route dps.report calls through a mock transport and record uploaded files."""
+    uploads = []
+    real_client = httpx.Client
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = request.read()
+        uploads.append(body)
+        return httpx.Response(200, json={"permalink": "https://dps.report/AbCd-test"})
+
+    def client_factory(*args, **kwargs):
+        kwargs["transport"] = httpx.MockTransport(handler)
+        return real_client(*args, **kwargs)
+
+    monkeypatch.setattr(dps_report.httpx, "Client", client_factory)
+    return uploads
+
+
+def test_raw_evtc_is_zipped_before_upload(tmp_path: Path, captured_uploads):
+    raw = b"EVTC20240101" + bytes(200_000)
+    log = tmp_path / "20240101-201010.evtc"
+    log.write_bytes(raw)
+
+    data = dps_report.upload_log(log)
+
+    body = captured_uploads[0]
+    assert b'filename="20240101-201010.zevtc"' in body
+    stats = data["upload_stats"]
+    assert stats["raw_bytes"] == len(raw)
+    assert stats["sent_bytes"] < len(raw)
+    assert stats["compression_ratio"] > 5
+
+
+def test_zevtc_passes_through(tmp_path: Path, captured_uploads):
+    log = tmp_path / "fight.zevtc"
+    with zipfile.ZipFile(log, "w") as zf:
+        zf.writestr("fight.evtc", b"EVTC" + bytes(1000))
+
+    data = dps_report.upload_log(log)
+
+    assert b'filename="fight.zevtc"' in captured_uploads[0]
+    assert log.read_bytes() in captured_uploads[0]
+    assert data["upload_stats"]["compression_ratio"] == 1.0
+
+
+def test_compress_evtc_roundtrip(tmp_path: Path):
+    raw = b"EVTC" + bytes(range(256)) * 100
+    log = tmp_path / "fight.evtc"
+    log.write_bytes(raw)
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+
+    zevtc = dps_report.compress_evtc(log, out_dir)
+
+    with zipfile.ZipFile(zevtc) as zf:
+        assert zf.namelist() == ["fight.evtc"]
+        assert zf.read("fight.evtc") == raw
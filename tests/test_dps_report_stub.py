@@ -0,0 +1,38 @@
+import json
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from benchmarks.dps_report_stub import StubConfig, create_stub_app
+
+
+def _source_dir(tmp_path: Path) -> Path:
+    source = tmp_path / "dps_report"
+    source.mkdir()
+    (source / "AbCd-ref.json").write_text(json.dumps({"players": [], "durationMS": 1000}), encoding="utf-8")
+    return source
+
+
+def test_upload_then_get_json_serves_cached_document(tmp_path: Path):
+    client = TestClient(create_stub_app(StubConfig(source_dir=_source_dir(tmp_path))))
+
+    resp = client.post("/uploadContent", params={"json": 1}, files={"file": ("a.zevtc", b"PK\x03\x04data")})
+    assert resp.status_code == 200
+    permalink = resp.json()["permalink"]
+    assert permalink.split("/")[-1].startswith("AbCd-ref-")
+
+    resp = client.get("/getJson", params={"permalink": permalink})
+    assert resp.status_code == 200
+    assert resp.json() == {"players": [], "durationMS": 1000}
+
+
+def test_injected_429_and_failures(tmp_path: Path):
+    source = _source_dir(tmp_path)
+    throttled = TestClient(create_stub_app(StubConfig(source_dir=source, rate_429=1.0)))
+    resp = throttled.post("/uploadContent", files={"file": ("a.zevtc", b"x")})
+    assert resp.status_code == 429
+
+    failing = TestClient(create_stub_app(StubConfig(source_dir=source, failure_rate=1.0)))
+    resp = failing.post("/uploadContent", files={"file": ("a.zevtc", b"x")})
+    assert resp.status_code == 500
+    assert failing.get("/stats").json()["failed"] == 1
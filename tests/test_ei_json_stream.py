@@ -0,0 +1,71 @@
+import json
+from pathlib import Path
+
+from app.integrations.ei_json_stream import load_ei_json
+
+
+def _player(name: str, group: int) -> dict:
+    return {
+        "name": name,
+        "account": f"{name}.1234",
+        "group": group,
+        "profession": "Guardian",
+        "eliteSpec": "Firebrand",
+        "dpsAll": [{"damage": 1000, "dps": 16}],
+        "defenses": [{"deadCount": 0, "deadDuration": 0, "dcDuration": 0}],
+        "buffUptimes": [{"id": 1187, "buffData": [{"uptime": 42.5}]}],
+        "buffGenerations": [{"id": 1122, "buffData": [{"generation": 3.5}]}],
+        "details": {"boonGraph": [{"id": 740, "states": [[0, 5], [30, 0]]}], "rotationGraph": [1, 2, 3]},
+        "rotation": [{"id": 1, "skills": [{"castTime": t} for t in range(50)]}],
+        "damage1S": [[i for i in range(60)]],
+    }
+
+
+def _document() -> dict:
+    return {
+        "eiEncounterID": 1,
+        "durationMS": 60000,
+        "success": True,
+        "mapID": 38,
+        "players": [_player("One", 1), _player("Two", 2)],
+        "enemyPlayers": [_player("Foe", 0)],
+        "phases": [
+            {
+                "name": "Full Fight",
+                "duration": 60000,
+                "dpsStats": [[1000, 0, 0, 5], [2000, 0, 0, 0]],
+                "defStats": [[10, 1], [20, 2]],
+                "supportStats": [[1, 0, 0, 0, 2, 0.5], [0, 0, 0, 0, 0, 0]],
+                "gameplayStats": [[0.1], [0.2]],
+                "dmgModifiersCommon": [[1, 2, 3]],
+            },
+            {"name": "Phase 2", "duration": 30000, "dpsStats": [[5, 0, 0, 0]]},
+        ],
+        "combatReplayData": {"polling": 150, "positions": [[1.0, 2.0]] * 100},
+        "skillMap": {"s1": {"name": "Skill"}},
+    }
+
+
+def test_extraction_keeps_only_mapping_subtrees(tmp_path: Path):
+    path = tmp_path / "log.json"
+    path.write_text(json.dumps(_document()), encoding="utf-8")
+
+    data = load_ei_json(path)
+
+    assert data["durationMS"] == 60000
+    assert data["success"] is True
+    assert "combatReplayData" not in data
+    assert "skillMap" not in data
+
+    player = data["players"][0]
+    assert player["name"] == "One"
+    assert player["buffUptimes"] == [{"id": 1187, "buffData": [{"uptime": 42.5}]}]
+    assert player["details"] == {"boonGraph": [{"id": 740, "states": [[0, 5], [30, 0]]}]}
+    assert "rotation" not in player
+    assert "damage1S" not in player
+
+    phases = data["phases"]
+    assert phases[0]["dpsStats"] == [[1000, 0, 0, 5], [2000, 0, 0, 0]]
+    assert "dmgModifiersCommon" not in phases[0]
+    assert phases[1] == {"name": "Phase 2", "duration": 30000}
+
@@ -0,0 +1,110 @@
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from app.integrations.elite_insights import EliteInsightsClient, EliteInsightsError, EliteInsightsPool, output_name
+
+FAKE_CLI = """
+import json, sys, time
+from pathlib import Path
+
+args = sys.argv[1:]
+inputs = args[args.index("-c") + 1:args.index("-o")]
+out_dir = Path(args[args.index("-o") + 1])
+with open(sys.argv[0] + ".calls", "a") as f:
+    f.write(" ".join(Path(p).name for p in inputs) + "\\n")
+failed = False
+for p in inputs:
+    stem = Path(p).stem
+    if stem.startswith("slow"):
+        time.sleep(30)
+    if stem.startswith("bad"):
+        failed = True
+        continue
+    (out_dir / f"{stem}.json").write_text(json.dumps({"input": Path(p).name}))
+sys.exit(3 if failed else 0)
+"""
+
+
+@pytest.fixture
+def fake_cli(tmp_path: Path) -> Path:
+    script = tmp_path / "fake_ei.py"
+    script.write_text(FAKE_CLI)
+    return script
+
+
+def _client(fake_cli: Path, tmp_path: Path, timeout_s: float = 10) -> EliteInsightsClient:
+    return EliteInsightsClient(f"{sys.executable} {fake_cli}", tmp_path / "out", timeout_s=timeout_s)
+
+
+def _logs(tmp_path: Path, *names: str) -> list[Path]:
+    paths = []
+    for name in names:
+        path = tmp_path / "logs" / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"EVTC")
+        paths.append(path)
+    return paths
+
+
+def _calls(fake_cli: Path) -> list[str]:
+    calls = Path(f"{fake_cli}.calls")
+    return calls.read_text().splitlines() if calls.exists() else []
+
+
+def test_run_single_log(fake_cli: Path, tmp_path: Path):
+    (log,) = _logs(tmp_path, "fight.zevtc")
+    data, json_path = _client(fake_cli, tmp_path).run(log)
+    assert data == {"input": "fight.zevtc"}
+    assert json_path == tmp_path / "out" / output_name(log)
+    assert json_path.name.startswith("fight.")
+
+
+def test_batch_uses_one_invocation_and_reports_per_log_errors(fake_cli: Path, tmp_path: Path):
+    logs = _logs(tmp_path, "a.zevtc", "bad.zevtc", "c.evtc")
+    results = _client(fake_cli, tmp_path).run_batch(logs)
+
+    assert _calls(fake_cli) == ["a.zevtc bad.zevtc c.evtc"]
+    assert [r.ok for r in results] == [True, False, True]
+    assert "code 3" in results[1].error
+    assert results[2].load() == {"input": "c.evtc"}
+
+
+def test_same_stem_from_different_uploads_keeps_both_outputs(fake_cli: Path, tmp_path: Path):
+    first, second = tmp_path / "u1" / "20240101-2000.zevtc", tmp_path / "u2" / "20240101-2000.zevtc"
+    for path, content in ((first, b"EVTC one"), (second, b"EVTC two")):
+        path.parent.mkdir()
+        path.write_bytes(content)
+    client = _client(fake_cli, tmp_path)
+
+    (a,) = client.run_batch([first])
+    (b,) = client.run_batch([second])
+
+    assert a.json_path != b.json_path
+    assert a.load() == b.load() == {"input": "20240101-2000.zevtc"}
+    assert a.json_path.exists() and b.json_path.exists()
+
+
+def test_pool_splits_batches_and_times_out(fake_cli: Path, tmp_path: Path):
+    logs = _logs(tmp_path, "a.zevtc", "b.zevtc", "c.zevtc", "slow.zevtc")
+    pool = EliteInsightsPool(_client(fake_cli, tmp_path, timeout_s=0.5), workers=2, batch_size=3)
+
+    results = pool.run(logs)
+
+    assert sorted(_calls(fake_cli)) == ["a.zevtc b.zevtc c.zevtc", "slow.zevtc"]
+    assert [r.ok for r in results] == [True, True, True, False]
+    assert "timed out" in results[3].error
+
+
+def test_cancel_kills_running_process(fake_cli: Path, tmp_path: Path):
+    (log,) = _logs(tmp_path, "slow.zevtc")
+    client = _client(fake_cli, tmp_path, timeout_s=60)
+    threading.Timer(0.5, client.cancel).start()
+
+    started = time.monotonic()
+    with pytest.raises(EliteInsightsError, match="cancelled"):
+        client.run(log)
+    assert time.monotonic() - started < 10
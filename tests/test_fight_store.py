@@ -0,0 +1,38 @@
+from app.db.models import Fight, FightResult
+from app.services import boon_states
+from app.services.dps_mapping import map_dps_json_to_models
+from app.services.fight_store import insert_mapped_fight
+from benchmarks.synthetic import make_ei_json
+
+
+def test_insert_mapped_fight_writes_fight_players_and_roles(db_session):
+    mapped = map_dps_json_to_models(make_ei_json(6, 4, seed=3))
+    mapped.fight.evtc_filename = "bulk.zevtc"
+    for i, ps in enumerate(mapped.player_stats):
+        ps.detected_role = f"role{i}"
+
+    fight_id = insert_mapped_fight(db_session, mapped)
+    db_session.commit()
+
+    # Inserted through Core: the mapped instances stay out of the session
+    assert mapped.fight not in db_session and mapped.fight.id is None
+
+    fight = db_session.get(Fight, fight_id)
+    assert fight.upload_timestamp is not None  # callable default applied by the INSERT
+    assert fight.result in (FightResult.VICTORY, FightResult.DEFEAT)
+    assert (fight.ally_count, fight.enemy_count) == (6, 4)
+    stored = sorted(fight.player_stats, key=lambda p: p.id)
+    assert [p.character_name for p in stored] == [p.character_name for p in mapped.player_stats]
+    assert [p.detected_role for p in stored] == [f"role{i}" for i in range(10)]
+    assert stored[0].total_damage == mapped.player_stats[0].total_damage
+    assert boon_states.decode_timelines(stored[0].boon_timelines).keys() == mapped.player_stats[0].boon_states.keys()
+
+
+def test_insert_mapped_fight_rolls_back_with_session(db_session):
+    mapped = map_dps_json_to_models({"durationMS": 1000, "players": [{"name": "Solo", "profession": "Thief"}]})
+    mapped.fight.evtc_filename = "gone.zevtc"
+
+    insert_mapped_fight(db_session, mapped)
+    db_session.rollback()
+
+    assert db_session.query(Fight).count() == 0
@@ -0,0 +1,174 @@
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy.orm import sessionmaker
+
+from app.db.models import Fight, IngestJob
+from app.services import ingest_jobs, logs_service
+
+
+def _wait_for(db, job_id, statuses, timeout_s=5.0):
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        db.expire_all()
+        job = db.get(IngestJob, job_id)
+        if job.status in statuses:
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} still {job.status}")
+
+
+def test_worker_pool_processes_queued_jobs_and_records_stages(db_session, tmp_path):
+    factory = sessionmaker(bind=db_session.get_bind())
+    seen_stages = []
+
+    def processor(file_path: Path, filename, db, progress):
+        for stage in ("uploading", "mapping", "saving"):
+            progress(stage)
+            with factory() as other:
+                seen_stages.append(other.query(IngestJob.stage).filter_by(file_path=str(file_path)).scalar())
+        if file_path.name == "bad.zevtc":
+            return None, "dps.report error: 503"
+        fight = Fight(evtc_filename=filename)
+        db.add(fight)
+        db.commit()
+        return fight.id, None
+
+    job_ids = [
+        ingest_jobs.enqueue(db_session, tmp_path / "good.zevtc").id,
+        ingest_jobs.enqueue(db_session, tmp_path / "bad.zevtc").id,
+    ]
+    pool = ingest_jobs.IngestWorkerPool(factory, workers=2, processor=processor, poll_interval_s=0.05)
+    pool.start()
+    try:
+        good = _wait_for(db_session, job_ids[0], {"done", "failed"})
+        bad = _wait_for(db_session, job_ids[1], {"done", "failed"})
+    finally:
+        pool.stop()
+
+    assert good.status == "done" and good.stage == "done" and good.attempts == 1
+    assert db_session.get(Fight, good.fight_id).evtc_filename == "good.zevtc"
+    assert bad.status == "failed" and bad.fight_id is None and bad.error == "dps.report error: 503"
+    assert good.finished_at is not None
+    assert sorted(seen_stages) == sorted(["uploading", "mapping", "saving"] * 2)
+
+
+def test_stale_running_jobs_are_requeued_then_failed(db_session, tmp_path):
+    job = ingest_jobs.enqueue(db_session, tmp_path / "a.zevtc")
+    claimed = ingest_jobs.claim_next(db_session)
+    assert claimed.id == job.id and claimed.status == "running"
+    assert ingest_jobs.claim_next(db_session) is None
+
+    # Fresh heartbeat: left alone
+    assert ingest_jobs.requeue_stale(db_session, stale_after_s=60, max_attempts=2) == 0
+
+    db_session.query(IngestJob).update({"updated_at": datetime.utcnow() - timedelta(minutes=10)})
+    db_session.commit()
+    assert ingest_jobs.requeue_stale(db_session, stale_after_s=60, max_attempts=2) == 1
+    db_session.expire_all()
+    assert db_session.get(IngestJob, job.id).status == "queued"
+
+    ingest_jobs.claim_next(db_session)  # second attempt
+    db_session.query(IngestJob).update({"updated_at": datetime.utcnow() - timedelta(minutes=10)})
+    db_session.commit()
+    ingest_jobs.requeue_stale(db_session, stale_after_s=60, max_attempts=2)
+    db_session.expire_all()
+    failed = db_session.get(IngestJob, job.id)
+    assert failed.status == "failed" and failed.attempts == 2
+
+
+def test_upload_returns_202_with_pollable_job(client, db_session):
+    resp = client.post("/analyze/upload", files={"file": ("fight.zevtc", b"PK\x03\x04data")})
+    assert resp.status_code == 202
+    job_id = resp.headers["X-Job-Id"]
+    assert resp.headers["Location"] == f"/analyze/jobs/{job_id}"
+    assert f'hx-get="/analyze/jobs/{job_id}"' in resp.text
+
+    job = db_session.get(IngestJob, job_id)
+    try:
+        resp = client.get(f"/analyze/jobs/{job_id}", headers={"Accept": "application/json"})
+        assert resp.json()["status"] == "queued"
+
+        fight = Fight(evtc_filename="fight.zevtc")
+        db_session.add(fight)
+        db_session.flush()
+        job.status, job.stage, job.fight_id = "done", "done", fight.id
+        db_session.commit()
+        resp = client.get(f"/analyze/jobs/{job_id}", headers={"HX-Request": "true"})
+        assert resp.status_code == 200
+        assert resp.headers["HX-Redirect"] == f"/analyze/fight/{fight.id}"
+        assert "hx-get" not in resp.text
+    finally:
+        Path(job.file_path).unlink(missing_ok=True)
+
+
+def test_upload_rejects_invalid_file_without_queueing(client, db_session):
+    resp = client.post("/analyze/upload", files={"file": ("notes.txt", b"hello")})
+    assert resp.status_code == 400
+    assert db_session.query(IngestJob).count() == 0
+    assert client.get("/analyze/jobs/missing").status_code == 404
+
+
+def _zip_of(**members: bytes) -> bytes:
+    import io
+    import zipfile
+
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    return buf.getvalue()
+
+
+def test_batch_upload_groups_files_and_zip_members_in_one_session(client, db_session):
+    archive = _zip_of(
+        **{
+            "evening/b.zevtc": b"PK\x03\x04b",
+            "evening/c.evtc": b"EVTCc",
+            "evening/again.zevtc": b"PK\x03\x04a",  # same bytes as a.zevtc
+            "readme.txt": b"x",
+        }
+    )
+    files = [
+        ("files", ("a.zevtc", b"PK\x03\x04a")),
+        ("files", ("a.zevtc", b"PK\x03\x04a")),
+        # Same name from another folder: a different log
+        ("files", ("a.zevtc", b"PK\x03\x04other")),
+        ("files", ("renamed.zevtc", b"PK\x03\x04a")),
+        ("files", ("logs.zip", archive)),
+        ("files", ("notes.txt", b"hello")),
+    ]
+    resp = client.post("/analyze/upload/batch", files=files)
+    assert resp.status_code == 202
+    session_id = resp.headers["X-Session-Id"]
+    assert f'hx-get="/analyze/sessions/{session_id}"' in resp.text
+
+    jobs = ingest_jobs.get_session_jobs(db_session, session_id)
+    try:
+        status = client.get(f"/analyze/sessions/{session_id}", headers={"Accept": "application/json"}).json()
+        by_name = {}
+        for f in status["files"]:
+            by_name.setdefault(f["filename"], []).append(f)
+        assert status["total"] == 8 and status["pending"] == 4 and status["failed"] == 4
+        assert [f["status"] for f in by_name["a.zevtc"]].count("queued") == 2
+        assert by_name["renamed.zevtc"][0]["status"] == by_name["again.zevtc"][0]["status"] == "failed"
+        assert by_name["b.zevtc"][0]["status"] == by_name["c.evtc"][0]["status"] == "queued"
+        assert by_name["notes.txt"][0]["status"] == "failed"
+        assert "readme.txt" not in by_name
+        assert not list(logs_service.UPLOAD_TMP_DIR.iterdir())  # archive removed after extraction
+
+        for job in jobs:
+            if job.status == "queued":
+                fight = Fight(evtc_filename=job.filename)
+                db_session.add(fight)
+                db_session.flush()
+                job.status, job.fight_id = "done", fight.id
+        db_session.commit()
+        resp = client.get(f"/analyze/sessions/{session_id}")
+        assert "4 / 8 processed" in resp.text and "hx-get" not in resp.text
+    finally:
+        for job in jobs:
+            if job.file_path:
+                Path(job.file_path).unlink(missing_ok=True)
+    assert client.get("/analyze/sessions/unknown").status_code == 404
@@ -0,0 +1,99 @@
+from app.parser.evtc_parser import PlayerStatsData
+from app.services import dps_mapping, ei_mapping
+from app.services.mapping_sources import DPS_REPORT, EI_CLI, LOCAL_PARSER, map_fight
+
+
+def _columns(mapped):
+    return [
+        {c.name: getattr(ps, c.name) for c in ps.__table__.columns if c.name not in {"id", "fight_id"}}
+        for ps in mapped.player_stats
+    ]
+
+
+def _ei_json():
+    return {
+        "durationMS": 60000,
+        "success": True,
+        "players": [
+            {
+                "name": "Ally",
+                "account": "ally.1234",
+                "group": 2,
+                "profession": "Guardian",
+                "eliteSpec": "Firebrand",
+                "dpsAll": [{"damage": 12000}],
+                "defenses": [{"damageTaken": 3000, "deadCount": 1}],
+                "buffUptimes": [{"id": 13017, "buffData": [{"uptime": 12.5}]}, {"id": 740, "buffData": [{"uptime": 18.0}]}],
+                "buffGenerations": [{"id": 1122, "buffData": [{"generation": 4.5}]}],
+            }
+        ],
+        "enemyPlayers": [{"name": "Foe", "profession": "Necromancer", "dpsAll": [{"damage": 500}]}],
+    }
+
+
+def test_boon_ids_are_shared():
+    assert ei_mapping.BOON_IDS is dps_mapping.BOON_IDS
+    assert dps_mapping.BOON_IDS["stealth"] == 13017
+
+
+def test_json_sources_map_identically():
+    doc = _ei_json()
+    via_dps = map_fight(doc, DPS_REPORT)
+    via_cli = ei_mapping.map_ei_json_to_models(doc)
+
+    assert _columns(via_dps) == _columns(via_cli)
+    assert via_dps.player_stats[0].stealth_uptime == 12.5
+    assert (via_cli.fight.ally_count, via_cli.fight.enemy_count) == (1, 1)
+
+
+def test_ei_cli_legacy_integer_duration():
+    doc = _ei_json()
+    del doc["durationMS"]
+    doc["fightDuration"] = 30000
+    assert map_fight(doc, EI_CLI).fight.duration_ms == 30000
+
+
+class _FakeParser:
+    def __init__(self, players):
+        self._players = players
+
+    def get_combat_start_time(self):
+        return 1000
+
+    def get_combat_end_time(self):
+        return 61000
+
+    def get_map_id(self):
+        return 95
+
+    def extract_player_stats(self):
+        return {p.addr: p for p in self._players}
+
+
+def test_local_parser_source_matches_ei_json_mapping():
+    ally = PlayerStatsData(
+        addr=1,
+        character_name="Ally",
+        account_name="ally.1234",
+        profession_name="Guardian",
+        elite_spec_name="Firebrand",
+        subgroup=2,
+        is_ally=True,
+        total_damage=12000,
+        damage_taken=3000,
+        deaths=1,
+        stealth_uptime_ms=7500,
+        might_total_stacks=18 * 60000,
+        might_sample_count=1,
+        stab_out_ms=4500,
+    )
+    foe = PlayerStatsData(addr=2, character_name="Foe", profession_name="Necromancer", total_damage=500)
+
+    from_parser = map_fight(_FakeParser([ally, foe]), LOCAL_PARSER)
+    from_json = map_fight(_ei_json(), DPS_REPORT)
+
+    assert from_parser.fight.map_id == 95
+    parser_ally, json_ally = _columns(from_parser)[0], _columns(from_json)[0]
+    for column in ("total_damage", "damage_taken", "deaths", "stealth_uptime", "might_uptime", "stab_out_ms", "spec_name", "subgroup"):
+        assert parser_ally[column] == json_ally[column], column
+    assert [ps.character_name for ps in from_parser.player_stats if not ps.is_ally] == ["Foe"]
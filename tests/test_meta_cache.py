@@ -0,0 +1,112 @@
+import time
+
+from app.db.models import FightContext, FightResult
+from app.services import meta_cache
+from app.services.fight_store import insert_fight_rows
+from app.services.meta_cache import ResultCache, bump_data_version, data_version
+
+
+class Counter:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, db):
+        self.calls += 1
+        return {"calls": self.calls}
+
+
+def test_entries_are_served_until_the_data_version_changes(db_session, tmp_path):
+    cache = ResultCache(tmp_path / "cache.db")
+    compute = Counter()
+
+    assert cache.get(db_session, "k", compute) == {"calls": 1}
+    assert cache.get(db_session, "k", compute) == {"calls": 1}
+    assert (cache.misses, cache.hits, compute.calls) == (1, 1, 1)
+
+    bump_data_version(db_session)
+    db_session.commit()
+
+    # Stale entry answers immediately, one background refresh replaces it
+    assert cache.get(db_session, "k", compute) == {"calls": 1}
+    cache.join()
+    assert cache.get(db_session, "k", compute) == {"calls": 2}
+    assert (cache.stale_hits, compute.calls) == (1, 2)
+
+
+def test_workers_share_entries_and_refresh_lease(db_session, tmp_path):
+    path = tmp_path / "cache.db"
+    first, second = ResultCache(path), ResultCache(path)
+    compute = Counter()
+
+    first.get(db_session, "k", compute)
+    assert second.get(db_session, "k", compute) == {"calls": 1}
+    assert second.hits == 1 and compute.calls == 1
+
+    bump_data_version(db_session)
+    db_session.commit()
+    # Worker one holds the refresh lease: worker two keeps serving the stale value
+    assert first._claim_refresh("k")
+    second.get(db_session, "k", compute)
+    second.join()
+    assert compute.calls == 1
+
+    first._save("k", data_version(db_session), {"calls": "fresh"})
+    assert second.get(db_session, "k", compute) == {"calls": "fresh"}
+
+
+def test_expired_lease_can_be_taken_over(db_session, tmp_path):
+    cache = ResultCache(tmp_path / "cache.db", refresh_lease_s=0.01)
+    cache.get(db_session, "k", Counter())
+
+    assert cache._claim_refresh("k")
+    assert not cache._claim_refresh("k")
+    time.sleep(0.02)
+    assert cache._claim_refresh("k")
+
+
+def test_ingest_bumps_the_meta_data_version(db_session):
+    before = data_version(db_session)
+    insert_fight_rows(
+        db_session,
+        {"evtc_filename": "a.zevtc", "context": FightContext.ZERG, "result": FightResult.VICTORY},
+        [{"character_name": "Solo", "elite_spec": "Willbender"}],
+        [],
+    )
+    db_session.commit()
+
+    assert data_version(db_session) not in {before, ""}
+
+
+def test_ingest_bumps_once_per_commit(db_session, monkeypatch):
+    bumps = []
+    real_bump = meta_cache.bump_data_version
+
+    def counting_bump(db, name=meta_cache.META_DATA_VERSION):
+        bumps.append(name)
+        return real_bump(db, name)
+
+    monkeypatch.setattr(meta_cache, "bump_data_version", counting_bump)
+    # A write-queue batch: one SAVEPOINT per fight, one COMMIT
+    for i in range(3):
+        with db_session.begin_nested():
+            insert_fight_rows(db_session, {"evtc_filename": f"{i}.zevtc"}, [{"character_name": "Solo"}], [])
+    db_session.commit()
+    assert bumps == ["meta"]
+
+    before = data_version(db_session)
+    insert_fight_rows(db_session, {"evtc_filename": "dropped.zevtc"}, [{"character_name": "Solo"}], [])
+    db_session.rollback()
+    db_session.commit()
+    assert bumps == ["meta"] and data_version(db_session) == before
+
+
+def test_cached_meta_stats_keep_the_context_enum(db_session, tmp_path, monkeypatch):
+    from app.services import meta_service
+
+    monkeypatch.setattr(meta_cache, "_cache", ResultCache(tmp_path / "cache.db"))
+    stats = meta_service.get_meta_stats_cached(db_session, FightContext.ROAM)
+    again = meta_service.get_meta_stats_cached(db_session, FightContext.ROAM)
+
+    assert stats == again
+    assert again["context"] is FightContext.ROAM
+    assert meta_cache.get_cache().hits == 1
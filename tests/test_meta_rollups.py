@@ -0,0 +1,83 @@
+from datetime import date, datetime
+
+from sqlalchemy import select
+
+from app.db.models import FightContext, FightResult, MetaDailyPlayer, MetaDailySpecRole, MetaDailyTotals
+from app.services import meta_rollups
+from app.services.dps_mapping import map_dps_json_to_models
+from app.services.fight_store import insert_fight_rows, insert_mapped_fight
+from benchmarks.synthetic import make_ei_json
+
+
+def _rollup_rows(db):
+    return {
+        model.__tablename__: sorted(
+            tuple(getattr(row, c.name) for c in model.__table__.columns)
+            for row in db.execute(select(model)).scalars()
+        )
+        for model in meta_rollups.ROLLUP_MODELS
+    }
+
+
+def _ingest(db, context, result, start_time, seed):
+    mapped = map_dps_json_to_models(make_ei_json(5, 3, seed=seed))
+    mapped.fight.evtc_filename = f"{seed}.zevtc"
+    mapped.fight.context = context
+    mapped.fight.result = result
+    mapped.fight.start_time = start_time
+    for i, ps in enumerate(mapped.player_stats):
+        ps.detected_role = None if i == 0 else ("Healer" if i % 2 else "Pure DPS")
+    return insert_mapped_fight(db, mapped)
+
+
+def test_ingest_updates_rollups_like_a_rebuild(db_session):
+    _ingest(db_session, FightContext.ZERG, FightResult.VICTORY, datetime(2026, 3, 1, 20, 0), seed=1)
+    _ingest(db_session, FightContext.ZERG, FightResult.DEFEAT, datetime(2026, 3, 1, 21, 0), seed=1)
+    _ingest(db_session, FightContext.ZERG, FightResult.DRAW, datetime(2026, 3, 2, 20, 0), seed=2)
+    _ingest(db_session, FightContext.ROAM, FightResult.VICTORY, None, seed=3)
+    db_session.commit()
+
+    incremental = _rollup_rows(db_session)
+    meta_rollups.rebuild(db_session)
+    db_session.commit()
+
+    assert incremental == _rollup_rows(db_session)
+
+    # Same day, same roster: one totals row and one row per character
+    first_day = db_session.get(MetaDailyTotals, (FightContext.ZERG, date(2026, 3, 1)))
+    assert (first_day.fights, first_day.wins, first_day.losses, first_day.draws) == (2, 1, 1, 0)
+    players = db_session.execute(
+        select(MetaDailyPlayer).where(MetaDailyPlayer.day == date(2026, 3, 1))
+    ).scalars().all()
+    assert len(players) == 8 and {p.appearances for p in players} == {2}
+    # Fights without a start time fall back to the upload day
+    roam_days = db_session.execute(
+        select(MetaDailyTotals.day).where(MetaDailyTotals.context == FightContext.ROAM)
+    ).scalars().all()
+    assert roam_days == [datetime.utcnow().date()]
+    assert db_session.execute(
+        select(MetaDailySpecRole).where(MetaDailySpecRole.detected_role == meta_rollups.NO_VALUE)
+    ).scalars().first() is not None
+
+
+def test_rollups_roll_back_with_the_fight(db_session):
+    insert_fight_rows(
+        db_session,
+        {"evtc_filename": "gone.zevtc", "context": FightContext.ZERG, "result": FightResult.VICTORY},
+        [{"character_name": "Solo", "elite_spec": "Willbender", "dps": 100.0}],
+        [],
+    )
+    db_session.rollback()
+
+    assert _rollup_rows(db_session) == {model.__tablename__: [] for model in meta_rollups.ROLLUP_MODELS}
+
+
+def test_ensure_built_backfills_existing_fights_once(db_session):
+    _ingest(db_session, FightContext.ZERG, FightResult.VICTORY, datetime(2026, 3, 1), seed=4)
+    for model in meta_rollups.ROLLUP_MODELS:
+        db_session.query(model).delete()
+    db_session.commit()
+
+    assert meta_rollups.ensure_built(db_session) is True
+    assert meta_rollups.ensure_built(db_session) is False
+    assert db_session.get(MetaDailyTotals, (FightContext.ZERG, date(2026, 3, 1))).fights == 1
@@ -1,9 +1,10 @@
 import pytest
 from datetime import datetime
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 
 from app.db.models import Fight, PlayerStats, FightContext, FightResult
-from app.services import meta_service
+from app.services import meta_rollups, meta_service
 
 
 def test_get_meta_stats_empty(db_session: Session):
@@ -48,6 +49,7 @@ def test_get_meta_stats_with_fights(db_session: Session):
     
     db_session.add_all([fight1, fight2, fight3])
     db_session.commit()
+    meta_rollups.rebuild(db_session)
     
     stats = meta_service.get_meta_stats(db_session, FightContext.ZERG)
     
@@ -92,6 +94,7 @@ def test_get_meta_stats_with_player_stats(db_session: Session):
     
     db_session.add_all([player1, player2, player3])
     db_session.commit()
+    meta_rollups.rebuild(db_session)
     
     stats = meta_service.get_meta_stats(db_session, FightContext.ZERG)
     
@@ -124,6 +127,7 @@ def test_get_all_contexts_summary(db_session: Session):
     
     db_session.add_all([fight1, fight2])
     db_session.commit()
+    meta_rollups.rebuild(db_session)
     
     summary = meta_service.get_all_contexts_summary(db_session)
     
@@ -133,3 +137,48 @@ def test_get_all_contexts_summary(db_session: Session):
     assert summary["zerg"]["fights"] == 1
     assert summary["guild_raid"]["fights"] == 1
     assert summary["roam"]["fights"] == 0
+
+
+def _capture(db: Session, run):
+    """Run `run()` and return its result with the SQL statements it sent through the session."""
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.get_bind(), "before_cursor_execute", record)
+    try:
+        return run(), statements
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", record)
+
+
+def test_get_meta_stats_reads_rollups_only(db_session: Session):
+    """Totals and breakdowns come from the daily rollups, never from fights/player_stats."""
+    for i, result in enumerate([FightResult.VICTORY, FightResult.DRAW, FightResult.DRAW]):
+        fight = Fight(
+            evtc_filename=f"f{i}.evtc",
+            context=FightContext.ROAM,
+            result=result,
+            duration_ms=None if i == 2 else 1000,
+        )
+        fight.player_stats = [
+            PlayerStats(character_name="Same", elite_spec="Willbender", detected_role=None),
+            PlayerStats(character_name=f"Other {i}", elite_spec=None, detected_role="Pure DPS"),
+        ]
+        db_session.add(fight)
+    db_session.commit()
+    meta_rollups.rebuild(db_session)
+
+    def roam_stats():
+        return meta_service.get_meta_stats(db_session, FightContext.ROAM)
+
+    stats, statements = _capture(db_session, roam_stats)
+
+    assert len(statements) == 4
+    assert not any(" fights" in s or "player_stats" in s for s in statements)
+    assert (stats["total_fights"], stats["total_wins"], stats["total_draws"]) == (3, 1, 2)
+    assert stats["total_duration_ms"] == 2000
+    assert stats["unique_players"] == 4
+    assert stats["top_specs"] == [{"spec": "Willbender", "count": 3}]
+    assert stats["role_distribution"] == {"Pure DPS": 3}
@@ -0,0 +1,83 @@
+import json
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from app.db.models import FightContext, FightResult
+from app.services import meta_service
+from app.services.fight_store import insert_fight_rows
+from app.services.meta_windows import available_windows, resolve_window
+from benchmarks.bench_meta_windows import growth, run
+
+TODAY = date(2026, 6, 15)
+
+
+def test_recent_windows_include_today():
+    window = resolve_window("7d", today=TODAY, patches_file=Path("/nonexistent"))
+    assert (window.since, window.until) == (date(2026, 6, 9), None)
+    assert resolve_window(None, today=TODAY).since is None
+    assert resolve_window("3d", today=TODAY) is None
+
+
+def test_patch_windows_end_the_day_before_the_next_patch(tmp_path):
+    patches = tmp_path / "patches.json"
+    patches.write_text(
+        json.dumps([{"name": "Spring Balance", "start": "2026-05-12"}, {"name": "Winter Balance", "start": "2026-02-03"}]),
+        encoding="utf-8",
+    )
+
+    keys = [w.key for w in available_windows(TODAY, patches)]
+    assert keys == ["all", "7d", "30d", "90d", "patch-spring-balance", "patch-winter-balance"]
+    winter = resolve_window("patch-winter-balance", TODAY, patches)
+    assert (winter.since, winter.until) == (date(2026, 2, 3), date(2026, 5, 11))
+    assert resolve_window("patch-spring-balance", TODAY, patches).until is None
+
+
+def test_unreadable_patch_list_offers_no_patch_windows(tmp_path):
+    patches = tmp_path / "patches.json"
+    patches.write_text("[{\"name\": \"No start\"}]", encoding="utf-8")
+
+    assert [w.key for w in available_windows(TODAY, patches)] == ["all", "7d", "30d", "90d"]
+
+
+def test_meta_stats_sum_only_the_window_buckets(db_session):
+    now = datetime.utcnow()
+    for days_ago, result, name in ((0, FightResult.VICTORY, "New"), (40, FightResult.DEFEAT, "Old")):
+        insert_fight_rows(
+            db_session,
+            {
+                "evtc_filename": f"{days_ago}.zevtc",
+                "context": FightContext.ZERG,
+                "result": result,
+                "start_time": now - timedelta(days=days_ago),
+                "duration_ms": 1000,
+            },
+            [{"character_name": name, "elite_spec": "Firebrand", "detected_role": "Stab Support"}],
+            [],
+        )
+    db_session.commit()
+
+    recent = meta_service.get_meta_stats(db_session, FightContext.ZERG, since=resolve_window("30d").since)
+    assert (recent["total_fights"], recent["total_wins"], recent["total_losses"]) == (1, 1, 0)
+    assert recent["unique_players"] == 1
+    assert recent["spec_winrates"]["Firebrand"]["fights"] == 1
+    older = meta_service.get_meta_stats(db_session, FightContext.ZERG, until=(now - timedelta(days=30)).date())
+    assert (older["total_fights"], older["total_losses"]) == (1, 1)
+    everything = meta_service.get_meta_stats(db_session, FightContext.ZERG)
+    assert everything["total_fights"] == 2 and everything["role_distribution"] == {"Stab Support": 2}
+
+
+def test_meta_routes_accept_a_window(client: TestClient):
+    response = client.get("/meta/roam?window=30d")
+    assert response.status_code == 200
+    assert "Last 30 days" in response.text
+    assert client.get("/meta/zerg?window=bogus").status_code == 400
+
+
+def test_window_benchmark_runs_on_a_tiny_archive(tmp_path):
+    results = run([40, 80], fights_per_day=20, players=3, roster=10, repeat=1, db_path=tmp_path / "bench.db")
+
+    assert set(results) == {40, 80}
+    assert set(results[40]) == {"all", "7d", "30d", "90d", "patch", "raw all"}
+    assert set(growth(results)) == set(results[40])
@@ -0,0 +1,33 @@
+import pytest
+
+from app.services.player_fields import PLAYER_FIELDS, build_context, compile_fields, extract_player_fields
+
+
+def test_first_present_source_wins_and_defaults_apply():
+    phase0 = {"defStats": [[1200, 300, 4]], "supportStats": [[]]}
+    sections = {
+        "defense": {"damageTaken": 999, "missedCount": 7, "deadCount": 0, "dead": 3},
+        "combat": {"missed": 11, "evaded": "5"},
+        "support": {"condiCleanse": 2},
+    }
+    fields = extract_player_fields(build_context(phase0, 0, sections))
+
+    assert fields["damage_taken"] == 1200  # defStats[0] before defense.damageTaken
+    assert fields["missed_count"] == 4  # defStats[2] exists
+    assert fields["evaded_count"] == 5  # defStats too short -> defense -> combat
+    assert fields["deaths"] == 0  # a present 0 is not skipped
+    assert fields["cleanses_other"] == 2  # empty supportStats row falls through
+    assert fields["stun_break_time"] == 0.0
+    assert set(fields) == set(PLAYER_FIELDS)
+
+
+def test_rows_for_other_players_are_not_used():
+    fields = extract_player_fields(build_context({"dpsStats": [[500]]}, 3, {"dps": {"damage": 42}}))
+    assert fields["total_damage"] == 42
+
+
+def test_spec_is_validated_at_compile_time():
+    with pytest.raises(ValueError, match="no column"):
+        compile_fields({"not_a_column": (int, "dps.damage")})
+    with pytest.raises(ValueError, match="Unknown field source"):
+        compile_fields({"total_damage": (int, "phases.damage[0]")})
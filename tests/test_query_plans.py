@@ -0,0 +1,86 @@
+"""
+Query-plan regression suite.
+
+Each service query runs against a synthetic database (thousands of fights). Every
+SELECT it emits is captured and explained: EXPLAIN QUERY PLAN on SQLite, and
+EXPLAIN with sequential scans disabled on Postgres (set TEST_POSTGRES_URL to an
+empty scratch database). A full scan of fights or player_stats fails the test.
+"""
+import os
+import re
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session
+
+from app.db.base import Base
+from app.db.models import FightContext
+from app.scripts.bulk_import import is_already_imported
+from app.services import logs_service, meta_service
+from benchmarks.synthetic_db import populate
+
+TABLES = ("fights", "player_stats")
+
+QUERIES = {
+    "recent_fights": lambda db: logs_service.get_recent_fights(db, limit=20),
+    "already_imported": lambda db: is_already_imported(db, "00000042.zevtc"),
+    "fight_view": lambda db: logs_service.get_fight_by_id(db, 42, with_boon_timelines=True).player_stats,
+    "meta_stats": lambda db: meta_service.get_meta_stats(db, FightContext.ZERG),
+    "contexts_summary": lambda db: meta_service.get_all_contexts_summary(db),
+}
+
+BACKENDS = ["sqlite", pytest.param("postgresql", marks=pytest.mark.skipif(
+    not os.getenv("TEST_POSTGRES_URL"), reason="TEST_POSTGRES_URL not set"
+))]
+
+
+@pytest.fixture(scope="module", params=BACKENDS)
+def large_db(request, tmp_path_factory):
+    if request.param == "sqlite":
+        engine = create_engine(f"sqlite:///{tmp_path_factory.mktemp('plans') / 'large.db'}")
+    else:
+        engine = create_engine(os.environ["TEST_POSTGRES_URL"])
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    populate(engine, n_fights=3000, players_per_fight=10, seed=1)
+    yield engine
+    if request.param != "sqlite":
+        Base.metadata.drop_all(engine)
+    engine.dispose()
+
+
+def _captured_selects(engine, run):
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and any(t in statement for t in TABLES):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        with Session(bind=engine) as db:
+            run(db)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    return statements
+
+
+def _full_scans(engine, statement, parameters) -> list[str]:
+    with engine.connect() as conn:
+        if engine.dialect.name == "sqlite":
+            rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+            # "SCAN t" is a full table scan; "SCAN t USING INDEX" walks an index in order
+            return [r[-1] for r in rows if re.fullmatch(rf"SCAN ({'|'.join(TABLES)})", r[-1])]
+        conn.execute(text("SET enable_seqscan = off"))
+        rows = conn.exec_driver_sql(f"EXPLAIN {statement}", parameters).fetchall()
+        return [r[0] for r in rows if re.search(rf"Seq Scan on ({'|'.join(TABLES)})\b", r[0])]
+
+
+@pytest.mark.parametrize("name", list(QUERIES))
+def test_service_queries_use_indexes(large_db, name):
+    statements = _captured_selects(large_db, QUERIES[name])
+    assert statements, f"{name} issued no queries on {TABLES}"
+
+    for statement, parameters in statements:
+        scans = _full_scans(large_db, statement, parameters)
+        assert not scans, f"{name}: full scan {scans} in\n{statement}"
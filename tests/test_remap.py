@@ -0,0 +1,76 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from app.db.models import Fight, PlayerStats
+from app.services import squad_boons
+from app.services.dps_mapping import map_dps_json_to_models
+from app.services.remap_service import read_checkpoint, remap_all
+from app.services.roles_service_v2 import detect_player_role
+
+
+def _fight_json(names):
+    return {
+        "durationMS": 60000,
+        "success": True,
+        "players": [
+            {"name": name, "group": 1, "profession": "Guardian", "dpsAll": [{"damage": 1000 * (i + 1)}], "defenses": [{"damageTaken": 50}]}
+            for i, name in enumerate(names)
+        ],
+    }
+
+
+def _store(db, tmp_path, doc, name):
+    path = tmp_path / f"{name}.json"
+    path.write_text(json.dumps(doc))
+    mapped = map_dps_json_to_models(doc)
+    fight = mapped.fight
+    fight.evtc_filename = f"{name}.zevtc"
+    fight.upload_timestamp = datetime.utcnow()
+    fight.dps_json_path = str(path)
+    for ps in mapped.player_stats:
+        ps.detected_role, _ = detect_player_role(ps)
+    db.add(fight)
+    db.commit()
+    return fight
+
+
+def test_remap_writes_only_changed_columns_and_checkpoints(db_session, tmp_path):
+    fight = _store(db_session, tmp_path, _fight_json(["A", "B"]), "one")
+    stale = fight.player_stats[1]
+    stale.damage_taken = 0
+    stale.total_damage = 1
+    db_session.commit()
+    missing = Fight(evtc_filename="gone.zevtc", dps_json_path=str(tmp_path / "gone.json"))
+    db_session.add(missing)
+    db_session.commit()
+
+    checkpoint = tmp_path / "checkpoint.json"
+    with ThreadPoolExecutor(2) as pool:
+        stats = remap_all(db_session.get_bind(), checkpoint=checkpoint, executor=pool)
+
+    assert stats.fights == 2
+    assert stats.players_updated == 1
+    assert dict(stats.columns_changed) == {"damage_taken": 1, "total_damage": 1}
+    assert [fid for fid, _ in stats.errors] == [missing.id]
+    db_session.expire_all()
+    assert (stale.damage_taken, stale.total_damage) == (50, 2000)
+    assert read_checkpoint(checkpoint) == missing.id
+
+    with ThreadPoolExecutor(1) as pool:
+        assert remap_all(db_session.get_bind(), checkpoint=checkpoint, executor=pool).fights == 0
+
+
+def test_remap_replaces_rows_when_roster_changed(db_session, tmp_path):
+    fight = _store(db_session, tmp_path, _fight_json(["A"]), "two")
+    (tmp_path / "two.json").write_text(json.dumps(_fight_json(["A", "C"])))
+
+    with ThreadPoolExecutor(1) as pool:
+        stats = remap_all(db_session.get_bind(), executor=pool)
+
+    assert stats.players_replaced == 2
+    db_session.expire_all()
+    names = [p.character_name for p in db_session.query(PlayerStats).filter_by(fight_id=fight.id).order_by(PlayerStats.id)]
+    assert names == ["A", "C"]
+    assert fight.ally_count == 2
+    assert [row["player_count"] for row in squad_boons.load(db_session, fight.id)] == [2, 2]
@@ -0,0 +1,57 @@
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy.orm import Session
+
+from app.db.models import Fight
+from app.services.single_flight import run_single_flight
+
+
+def _make_fight(engine) -> int:
+    with Session(bind=engine) as s:
+        fight = Fight(evtc_filename="dup.zevtc", upload_timestamp=datetime.utcnow())
+        s.add(fight)
+        s.commit()
+        return fight.id
+
+
+def test_concurrent_callers_share_one_import(db_session: Session):
+    engine = db_session.get_bind()
+    calls = []
+
+    def work():
+        calls.append(1)
+        time.sleep(0.3)
+        return _make_fight(engine), None
+
+    results = []
+
+    def caller():
+        results.append(run_single_flight(engine, "a" * 64, work, timeout_s=5))
+
+    threads = [threading.Thread(target=caller) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    fight_ids = {fight_id for fight_id, _, _ in results}
+    assert len(fight_ids) == 1 and None not in fight_ids
+    assert sum(1 for _, _, leader in results if leader) == 1
+
+    # A later upload of the same content is redirected without work
+    fight_id, error, leader = run_single_flight(engine, "a" * 64, work)
+    assert (fight_id, error, leader) == (fight_ids.pop(), None, False)
+    assert len(calls) == 1
+
+
+def test_failed_import_is_retried_by_next_caller(db_session: Session):
+    engine = db_session.get_bind()
+
+    fight_id, error, _ = run_single_flight(engine, "b" * 64, lambda: (None, "dps.report error: 503"))
+    assert fight_id is None and error == "dps.report error: 503"
+
+    fight_id, error, leader = run_single_flight(engine, "b" * 64, lambda: (_make_fight(engine), None))
+    assert leader is True and error is None and fight_id is not None
@@ -0,0 +1,87 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app.db.models import Fight, FightContext, FightResult, PlayerStats
+from app.services import meta_service
+from app.services.fight_store import insert_fight_rows
+from app.services.spec_winrates import get_spec_winrates, wilson_interval
+from benchmarks.synthetic_db import populate
+
+
+def test_wilson_interval_matches_reference_values():
+    low, high = wilson_interval(8, 10)
+    assert (round(low, 4), round(high, 4)) == (0.4902, 0.9433)
+    low, high = wilson_interval(0, 5)
+    assert low == 0.0 and round(high, 4) == 0.4345
+    assert wilson_interval(0, 0) == (0.0, 1.0)
+
+
+def _raw_winrates(db):
+    """Reference computation straight from fights/player_stats."""
+    counts = defaultdict(lambda: [0, 0])
+    rows = db.execute(
+        select(Fight.context, Fight.result, PlayerStats.elite_spec)
+        .join(Fight, Fight.id == PlayerStats.fight_id)
+        .where(PlayerStats.is_ally.is_(True), PlayerStats.elite_spec.is_not(None))
+    )
+    for context, result, spec in rows:
+        if result in (FightResult.VICTORY, FightResult.DEFEAT, FightResult.DRAW):
+            counts[(context, spec)][0] += 1
+            counts[(context, spec)][1] += int(result == FightResult.VICTORY)
+    return counts
+
+
+def test_spec_winrates_match_raw_tables(db_session):
+    populate(db_session.get_bind(), n_fights=200, players_per_fight=10, days=30, seed=5)
+    db_session.expire_all()
+
+    expected = _raw_winrates(db_session)
+    winrates = get_spec_winrates(db_session)
+
+    got = {
+        (context, spec): [row["fights"], row["wins"]]
+        for context, specs in winrates.items()
+        for spec, row in specs.items()
+    }
+    assert got == dict(expected)
+    for specs in winrates.values():
+        fights = [row["fights"] for row in specs.values()]
+        assert fights == sorted(fights, reverse=True)
+        for row in specs.values():
+            assert row["ci_low"] <= row["win_rate"] <= row["ci_high"]
+
+
+def test_spec_winrates_skip_enemies_and_filter_by_day(db_session):
+    today = datetime.utcnow().replace(hour=12)
+    for days_ago, result in ((0, FightResult.VICTORY), (10, FightResult.DEFEAT), (1, FightResult.UNKNOWN)):
+        insert_fight_rows(
+            db_session,
+            {
+                "evtc_filename": f"{days_ago}.zevtc",
+                "context": FightContext.ROAM,
+                "result": result,
+                "start_time": today - timedelta(days=days_ago),
+            },
+            [
+                {"character_name": "Ally", "elite_spec": "Willbender", "is_ally": True},
+                {"character_name": "Foe", "elite_spec": "Deadeye", "is_ally": False},
+            ],
+            [],
+        )
+    db_session.commit()
+
+    all_time = get_spec_winrates(db_session, [FightContext.ROAM])[FightContext.ROAM]
+    assert list(all_time) == ["Willbender"]
+    assert (all_time["Willbender"]["fights"], all_time["Willbender"]["wins"]) == (2, 1)
+    assert all_time["Willbender"]["win_rate"] == pytest.approx(50.0)
+
+    recent = get_spec_winrates(db_session, since=(today - timedelta(days=7)).date())
+    assert recent[FightContext.ROAM]["Willbender"]["fights"] == 1
+    assert recent[FightContext.ROAM]["Willbender"]["win_rate"] == pytest.approx(100.0)
+    assert get_spec_winrates(db_session, until=(today - timedelta(days=30)).date()) == {}
+
+    stats = meta_service.get_meta_stats(db_session, FightContext.ROAM)
+    assert stats["spec_winrates"] == all_time
@@ -0,0 +1,97 @@
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+
+from app.db.models import Fight, FightBoonUptime, FightContext, PlayerStats
+from app.services import squad_boons
+from app.services.dps_mapping import map_dps_json_to_models
+from app.services.fight_store import insert_fight_rows, insert_mapped_fight
+from benchmarks.synthetic import make_ei_json
+from benchmarks.synthetic_db import populate
+
+
+def _player(name, subgroup, might, is_ally=True, dead_ms=0):
+    return {
+        "character_name": name,
+        "is_ally": is_ally,
+        "subgroup": subgroup,
+        "might_uptime": might,
+        "dead_duration_ms": dead_ms,
+        "dc_duration_ms": 0,
+    }
+
+
+def _insert(db, fight, players):
+    table = squad_boons.summary_rows(fight["duration_ms"], [SimpleNamespace(**p) for p in players])
+    return insert_fight_rows(db, fight, players, table)
+
+
+def test_uptimes_are_weighted_by_active_time_of_squad_members(db_session):
+    players = [
+        _player("A", 1, 100.0, dead_ms=5000),  # 5 s active, all of it with might
+        _player("B", 1, 0.0),
+        _player("C", 2, 50.0),
+        _player("Foe", 1, 100.0, is_ally=False),
+        _player("Commander tag", 50, 100.0),
+    ]
+    fight_id = _insert(
+        db_session, {"evtc_filename": "weights.zevtc", "context": FightContext.ZERG, "duration_ms": 10000}, players
+    )
+    db_session.commit()
+
+    table = squad_boons.load(db_session, fight_id)
+    assert [(row["label"], row["group"], row["player_count"]) for row in table] == [
+        ("Squad Average", None, 3),
+        ("Group 1", 1, 2),
+        ("Group 2", 2, 1),
+    ]
+    assert [row["boons"]["might"] for row in table] == [40.0, 33.3, 50.0]
+    assert table[0]["boons"]["stealth"] == 0.0
+
+
+def test_stored_table_matches_the_table_built_from_timelines(db_session):
+    mapped = map_dps_json_to_models(make_ei_json(20, 10, seed=7))
+    mapped.fight.evtc_filename = "mapped.zevtc"
+    mapped_id = insert_mapped_fight(db_session, mapped)
+    db_session.commit()
+
+    players = db_session.query(PlayerStats).filter_by(fight_id=mapped_id).all()
+    expected = squad_boons.table_rows(squad_boons.summary_rows(mapped.fight.duration_ms, players))
+    assert len(expected) > 2
+    assert squad_boons.load(db_session, mapped_id) == expected
+
+
+def test_backfill_fills_only_fights_without_a_table(db_session):
+    populate(db_session.get_bind(), n_fights=30, players_per_fight=10, seed=3)
+    stored_id = _insert(db_session, {"evtc_filename": "new.zevtc", "duration_ms": 1000}, [_player("A", 1, 10.0)])
+    db_session.commit()
+    assert squad_boons.load(db_session, 1) is None
+
+    assert squad_boons.backfill(db_session, batch_size=7) == 30
+    assert squad_boons.backfill(db_session) == 0
+
+    fight = db_session.get(Fight, 1)
+    assert squad_boons.load(db_session, 1) == squad_boons.table_rows(
+        squad_boons.summary_rows(fight.duration_ms, fight.player_stats)
+    )
+    assert db_session.query(FightBoonUptime).filter_by(fight_id=stored_id).count() == 2
+
+
+def test_fight_view_serves_the_stored_table(client: TestClient, db_session):
+    fight_id = _insert(db_session, {"evtc_filename": "view.zevtc", "duration_ms": 10000}, [_player("A", 1, 100.0)])
+    db_session.execute(
+        update(FightBoonUptime).where(FightBoonUptime.fight_id == fight_id).values(quickness_uptime=42.0)
+    )
+    db_session.commit()
+
+    response = client.get(f"/analyze/fight/{fight_id}")
+    assert response.status_code == 200
+    assert "Squad Average" in response.text and "Group 1" in response.text
+    assert "42%" in response.text
+
+    db_session.query(FightBoonUptime).delete()
+    db_session.commit()
+    response = client.get(f"/analyze/fight/{fight_id}")
+    assert response.status_code == 200
+    assert "Group 1" in response.text and "42%" not in response.text
@@ -0,0 +1,76 @@
+import hashlib
+import io
+import zipfile
+
+import anyio
+import pytest
+from fastapi import UploadFile
+
+from app.services import logs_service
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    tmp_dir = tmp_path / ".tmp"
+    tmp_dir.mkdir()
+    monkeypatch.setattr(logs_service, "UPLOAD_DIR", tmp_path)
+    monkeypatch.setattr(logs_service, "UPLOAD_TMP_DIR", tmp_dir)
+    monkeypatch.setattr(logs_service, "UPLOAD_CHUNK_BYTES", 8)
+    return tmp_path
+
+
+def _save(name: str, data: bytes, **kwargs):
+    upload = UploadFile(file=io.BytesIO(data), filename=name)
+    return anyio.run(lambda: logs_service.save_upload_file(upload, **kwargs))
+
+
+def test_upload_is_hashed_and_renamed_into_content_addressed_store(store):
+    data = b"PK\x03\x04" + b"x" * 50
+    stored, error = _save("Fight.ZEVTC", data)
+
+    sha = hashlib.sha256(data).hexdigest()
+    assert error is None
+    assert (stored.sha256, stored.size, stored.filename) == (sha, len(data), "Fight.ZEVTC")
+    assert stored.path == store / sha[:2] / f"{sha}.zevtc"
+    assert stored.path.read_bytes() == data
+    assert logs_service.stored_content_hash(stored.path) == sha
+    assert not list((store / ".tmp").iterdir())
+
+    again, _ = _save("copy.zevtc", data)
+    assert again.path == stored.path
+
+
+@pytest.mark.parametrize(
+    "name, data, kwargs, message",
+    [
+        ("notes.txt", b"EVTC", {}, "Invalid file extension"),
+        ("fight.evtc", b"GIF89a....", {}, "unrecognized header"),
+        ("fight.evtc", b"", {}, "File is empty"),
+        ("fight.evtc", b"EV", {}, "too short"),
+        ("fight.evtc", b"EVTC" + b"x" * 100, {"max_bytes": 64}, "File too large"),
+        ("logs.zip", b"EVTC....", {"extensions": (".zip",)}, "unrecognized header"),
+    ],
+)
+def test_bad_uploads_are_rejected_while_streaming(store, name, data, kwargs, message):
+    stored, error = _save(name, data, **kwargs)
+
+    assert stored is None and message in error
+    assert not list((store / ".tmp").iterdir())
+    assert not [p for p in store.rglob("*") if p.is_file()]
+
+
+def test_archive_members_go_through_the_same_checks(store):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        zf.writestr("day1/a.evtc", b"EVTC" + b"a" * 20)
+        zf.writestr("day1/b.zevtc", b"not a zip")
+        zf.writestr("other.txt", b"ignored")
+    archive, error = _save("logs.zip", buf.getvalue(), extensions=(".zip",), content_addressed=False)
+    assert error is None and archive.path.parent == store / ".tmp"
+
+    stored, rejected = logs_service.expand_log_archive(archive.path, max_files=10)
+
+    assert [s.filename for s in stored] == ["a.evtc"]
+    assert stored[0].path.read_bytes() == b"EVTC" + b"a" * 20
+    assert [name for name, _ in rejected] == ["b.zevtc"]
+    assert not archive.path.exists()
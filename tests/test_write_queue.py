@@ -0,0 +1,64 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from app.db.base import Base, configure_sqlite
+from app.db.models import Fight
+from app.db.write_queue import WriteQueue
+
+
+@pytest.fixture
+def file_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'queue.db'}", connect_args={"check_same_thread": False})
+    configure_sqlite(engine)
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def test_sqlite_connections_use_wal_and_busy_timeout(file_engine):
+    with file_engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() > 0
+
+
+def test_pending_writes_share_one_commit_and_fail_independently(file_engine):
+    writer = WriteQueue(file_engine, batch_window_s=0.2)
+
+    def add(name):
+        def write(session):
+            fight = Fight(evtc_filename=name)
+            session.add(fight)
+            session.flush()
+            if name == "bad":
+                raise ValueError("rejected")
+            return fight.id
+
+        return write
+
+    try:
+        futures = [writer.submit(add(name)) for name in ("a", "b", "bad", "c")]
+        ids = [f.result(timeout=5) for f in futures if f is not futures[2]]
+        with pytest.raises(ValueError, match="rejected"):
+            futures[2].result(timeout=5)
+    finally:
+        writer.stop()
+
+    assert (writer.batches, writer.items) == (1, 4)
+    with Session(bind=file_engine) as session:
+        stored = session.query(Fight).order_by(Fight.id).all()
+    assert [f.evtc_filename for f in stored] == ["a", "b", "c"]
+    assert [f.id for f in stored] == ids
+
+
+def test_queue_follows_the_db_write_queue_setting(file_engine, monkeypatch):
+    from app.config import settings
+    from app.db import write_queue
+
+    monkeypatch.setattr(settings, "DB_WRITE_QUEUE", "0")
+    assert write_queue.for_engine(file_engine) is None
+    monkeypatch.setattr(settings, "DB_WRITE_QUEUE", "auto")
+    writer = write_queue.for_engine(file_engine)
+    assert writer is not None and write_queue.for_engine(file_engine) is writer
+    write_queue.stop_all()